@@ -0,0 +1,341 @@
+"""Linear regression solvers for the lesson 2 / homework 2 models.
+
+`train_linear_regression` in the notebooks forms X^T X and inverts it. That squares the condition number
+of X and breaks down on collinear features, e.g. the one-hot columns of a categorical next to the bias.
+The functions here return the same (w0, w) pair, but solve the system instead of inverting it:
+
+    cholesky  factorize X^T X + rI (fast; falls back to lstsq if X^T X is not positive definite)
+    qr        QR of [X; sqrt(r) I], never forms X^T X (stable for ill-conditioned X)
+    lstsq     SVD-based least squares (slowest, works for rank-deficient X)
+
+As in train_linear_regression_reg, the ridge term r is added to the whole diagonal, bias included.
+Cholesky is the fastest for tall data (millions of rows) but squares the condition number, so keep it in
+float64; qr/lstsq give float32-accurate weights in float32 as well.
+
+`NormalEquations` accumulates X^T X and X^T y chunk by chunk, so a model can be fit on data that does
+not fit in memory (see `fit_csv`).
+
+`ridge_path` fits a whole vector of r values from one SVD of the training matrix, and `ridge_path_seeds`
+does the same for the splits of many seeds with one stacked SVD, replacing the homework's refit loops.
+
+    python linear_regression.py    # accuracy and speed vs the inverse-based version
+"""
+
+import argparse
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+from scipy import linalg
+
+from splits import shuffle_split
+
+SOLVERS = ('cholesky', 'qr', 'lstsq')
+BASE = ['engine_displacement', 'horsepower', 'vehicle_weight', 'model_year']
+CATEGORICAL = ['origin', 'fuel_type', 'drivetrain']
+TARGET = 'fuel_efficiency_mpg'
+
+
+def add_bias(X, dtype=np.float64):
+    X = np.asarray(X, dtype=dtype)
+    return np.column_stack([np.ones(X.shape[0], dtype=dtype), X])
+
+
+def solve_normal_equations(XTX, XTy, r=0.0, solver='cholesky'):
+    """
+    Weights (bias first) from the sufficient statistics X^T X and X^T y of the bias-augmented X.
+    """
+    A = XTX + r * np.eye(XTX.shape[0], dtype=XTX.dtype)
+    if solver == 'cholesky':
+        try:
+            return linalg.cho_solve(linalg.cho_factor(A), XTy)
+        except linalg.LinAlgError:
+            warnings.warn('X^T X + rI is not positive definite (collinear features?), using lstsq')
+    elif solver != 'lstsq':
+        raise ValueError(f"solver must be 'cholesky' or 'lstsq' for normal equations, got {solver!r}")
+    return np.linalg.lstsq(A, XTy, rcond=None)[0]
+
+
+def solve_least_squares(X, y, r=0.0, solver='qr'):
+    """
+    Weights minimizing ||Xw - y||^2 + r ||w||^2 for an X that already has the bias column.
+    """
+    if solver == 'cholesky':
+        return solve_normal_equations(X.T @ X, X.T @ y, r, solver)
+    if solver not in ('qr', 'lstsq'):
+        raise ValueError(f'solver must be one of {SOLVERS}, got {solver!r}')
+
+    if r > 0:
+        # Ridge as ordinary least squares on [X; sqrt(r) I] and [y; 0]
+        X = np.vstack([X, np.sqrt(r) * np.eye(X.shape[1], dtype=X.dtype)])
+        y = np.concatenate([y, np.zeros(X.shape[1], dtype=y.dtype)])
+
+    if solver == 'qr':
+        Q, R = np.linalg.qr(X)
+        diag = np.abs(np.diag(R))
+        if diag.min() > diag.max() * X.shape[0] * np.finfo(X.dtype).eps:
+            return linalg.solve_triangular(R, Q.T @ y)
+        warnings.warn('X is rank deficient (collinear features?), using lstsq')
+    return np.linalg.lstsq(X, y, rcond=None)[0]
+
+
+def train_linear_regression(X, y, r=0.0, solver='qr', dtype=np.float64):
+    """
+    Drop-in for the notebooks' train_linear_regression / train_linear_regression_reg: returns (w0, w).
+    """
+    X = add_bias(X, dtype)
+    y = np.asarray(y, dtype=dtype)
+
+    w_full = solve_least_squares(X, y, r, solver)
+    return w_full[0], w_full[1:]
+
+
+def train_linear_regression_inv(X, y, r=0.0):
+    # The notebook version, kept as the baseline for the benchmark
+    ones = np.ones(X.shape[0])
+    X = np.column_stack([ones, X])
+
+    XTX = X.T.dot(X)
+    XTX = XTX + r * np.eye(XTX.shape[0])
+
+    XTX_inv = np.linalg.inv(XTX)
+    w_full = XTX_inv.dot(X.T).dot(y)
+
+    return w_full[0], w_full[1:]
+
+
+class NormalEquations:
+    """
+    Running X^T X and X^T y of the bias-augmented X, filled chunk by chunk with `update`.
+
+    Memory is O(features^2) whatever the number of rows. Statistics from separate workers can be added
+    together with `merge`. Accumulate in float64 even for float32 chunks: the sums lose precision fast.
+    """
+
+    def __init__(self, n_features, dtype=np.float64):
+        self.XTX = np.zeros((n_features + 1, n_features + 1), dtype=dtype)
+        self.XTy = np.zeros(n_features + 1, dtype=dtype)
+        self.n = 0
+
+    def update(self, X, y):
+        X = add_bias(X, self.XTX.dtype)
+        y = np.asarray(y, dtype=self.XTX.dtype)
+
+        self.XTX += X.T @ X
+        self.XTy += X.T @ y
+        self.n += X.shape[0]
+        return self
+
+    def merge(self, other):
+        self.XTX += other.XTX
+        self.XTy += other.XTy
+        self.n += other.n
+        return self
+
+    def solve(self, r=0.0, solver='cholesky'):
+        w_full = solve_normal_equations(self.XTX, self.XTy, r, solver)
+        return w_full[0], w_full[1:]
+
+
+def _ridge_factors(s, rs, n_rows):
+    # s / (s^2 + r) for every (r, singular value); r = 0 drops the null space like lstsq does
+    rs = np.asarray(rs, dtype=s.dtype)[..., None]
+    tol = s.max(axis=-1, keepdims=True) * max(n_rows, s.shape[-1]) * np.finfo(s.dtype).eps
+    with np.errstate(divide='ignore', invalid='ignore'):
+        factors = s[..., None, :] / (s[..., None, :] ** 2 + rs)
+    return np.where((s[..., None, :] > tol[..., None]) | (rs > 0), factors, 0.0)
+
+
+def _path_rmse(Z, y, coefs):
+    """
+    Validation RMSE of every row of `coefs` without forming the (n_val, r) predictions:
+    ||Z c - y||^2 = c^T (Z^T Z) c - 2 c^T Z^T y + y^T y, in float64 to keep the cancellation harmless.
+    """
+    Z = Z.astype(np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    coefs = coefs.astype(np.float64)
+
+    G = np.swapaxes(Z, -1, -2) @ Z
+    b = np.einsum('...nk,...n->...k', Z, y)
+    sse = (np.einsum('...rk,...kl,...rl->...r', coefs, G, coefs)
+           - 2 * np.einsum('...rk,...k->...r', coefs, b)
+           + (y * y).sum(axis=-1)[..., None])
+    return np.sqrt(np.maximum(sse, 0.0) / y.shape[-1])
+
+
+def ridge_path(X_train, y_train, X_val, y_val, rs, dtype=np.float64):
+    """
+    Weights and validation RMSE for every r in `rs` from a single SVD of the bias-augmented X_train.
+
+    With X = U S V^T, w(r) = V diag(s / (s^2 + r)) U^T y, so each extra r costs O(features^2).
+    Returns W of shape (len(rs), features + 1) with the bias first, and the RMSE per r.
+    """
+    X = add_bias(X_train, dtype)
+    U, s, Vt = np.linalg.svd(X, full_matrices=False)
+
+    Uty = U.T @ np.asarray(y_train, dtype=dtype)
+    coefs = _ridge_factors(s, rs, X.shape[0]) * Uty  # (r, k): weights in the V basis
+    W = coefs @ Vt
+
+    scores = _path_rmse(add_bias(X_val, dtype) @ Vt.T, y_val, coefs)
+    return W, scores
+
+
+def ridge_path_seeds(X, y, seeds, rs, dtype=np.float64):
+    """
+    `ridge_path` for the homework split of every seed, all splits factorized in one stacked SVD.
+
+    Returns W of shape (len(seeds), len(rs), features + 1) and the validation RMSE as (len(seeds), len(rs)).
+    """
+    X = add_bias(X, dtype)
+    y = np.asarray(y, dtype=dtype)
+    splits = [split_indices(len(X), seed) for seed in seeds]
+    train_idx = np.stack([train for train, _, _ in splits])
+    val_idx = np.stack([val for _, val, _ in splits])
+
+    U, s, Vt = np.linalg.svd(X[train_idx], full_matrices=False)  # (seed, n_train, k), (seed, k), (seed, k, p)
+
+    Uty = np.einsum('snk,sn->sk', U, y[train_idx])
+    coefs = _ridge_factors(s, rs, train_idx.shape[1]) * Uty[:, None, :]  # (seed, r, k)
+    W = coefs @ Vt
+
+    scores = _path_rmse(X[val_idx] @ np.swapaxes(Vt, -1, -2), y[val_idx], coefs)
+    return W, scores
+
+
+def split_indices(n, seed=42, val=0.2, test=0.2):
+    """
+    Train / validation / test row indices of the homework split (np.random.seed(seed) + shuffle).
+    """
+    split = shuffle_split(n, seed, val, test)
+    return split['train'], split['val'], split['test']
+
+
+def rmse(y, y_pred):
+    se = (y - y_pred) ** 2
+    mse = se.mean()
+    return np.sqrt(mse)
+
+
+def prepare_X(df, categories=None):
+    """
+    Homework features filled with 0, plus (with `categories`) one-hot columns for every value,
+    i.e. one column per category more than the bias allows: exactly collinear without a ridge term.
+    """
+    X = df[BASE].fillna(0)
+    for name, values in (categories or {}).items():
+        for value in values:
+            X[f'{name}_{value}'] = (df[name] == value).astype(int)
+    return X.values
+
+
+def fit_csv(path, features=BASE, target=TARGET, r=0.0, chunksize=100_000, solver='cholesky'):
+    """
+    Fit on a CSV chunk by chunk (features filled with 0, log1p target, as in the homework).
+    """
+    stats = NormalEquations(len(features))
+    for chunk in pd.read_csv(path, usecols=features + [target], chunksize=chunksize):
+        stats.update(chunk[features].fillna(0).values, np.log1p(chunk[target].values))
+    return stats.solve(r, solver)
+
+
+def timed(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best * 1000
+
+
+def benchmark(name, X_train, y_train, X_val, y_val, r, repeat):
+    # Reference weights: float64 lstsq (SVD), the most robust of the solvers
+    w0_ref, w_ref = train_linear_regression(X_train, y_train, r, solver='lstsq')
+    w_ref = np.concatenate([[w0_ref], w_ref])
+
+    print(f'\n{name}: X {X_train.shape}, cond(X) {np.linalg.cond(add_bias(X_train)):.1e}, r={r}')
+    print(f'{"solver":<18} {"time ms":>9} {"val RMSE":>10} {"max |w - w_lstsq|":>18}')
+
+    candidates = {'inv (notebook)': lambda: train_linear_regression_inv(X_train, y_train, r)}
+    for dtype in (np.float64, np.float32):
+        for solver in SOLVERS:
+            candidates[f'{solver} {np.dtype(dtype).name}'] = (
+                lambda solver=solver, dtype=dtype: train_linear_regression(X_train, y_train, r, solver, dtype))
+
+    for label, fn in candidates.items():
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            try:
+                (w0, w), ms = timed(fn, repeat)
+            except np.linalg.LinAlgError as e:
+                print(f'{label:<18} failed: {e}')
+                continue
+        error = np.abs(np.concatenate([[w0], w]) - w_ref).max()
+        print(f'{label:<18} {ms:9.2f} {rmse(y_val, w0 + X_val @ w):10.5f} {error:18.2e}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Linear regression solvers vs the inverse-based version')
+    parser.add_argument('--data', default='car_fuel_efficiency.csv')
+    parser.add_argument('--rows', type=int, default=1_000_000, help='rows of the synthetic speed test')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--r-values', type=int, default=100, help='points of the ridge path benchmark')
+    parser.add_argument('--seeds', type=int, default=10, help='split seeds of the ridge path benchmark')
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.data)
+
+    # Same split as homework 2
+    train_idx, val_idx, _ = split_indices(len(df), seed=42)
+    df_train = df.iloc[train_idx].reset_index(drop=True)
+    df_val = df.iloc[val_idx].reset_index(drop=True)
+    y_train = np.log1p(df_train[TARGET].values)
+    y_val = np.log1p(df_val[TARGET].values)
+
+    benchmark('homework features', prepare_X(df_train), y_train, prepare_X(df_val), y_val, 0.0, args.repeat)
+
+    categories = {name: sorted(df[name].dropna().unique()) for name in CATEGORICAL}
+    X_train, X_val = prepare_X(df_train, categories), prepare_X(df_val, categories)
+    for r in (0.0, 0.001):
+        benchmark('+ one-hot of every category (collinear)', X_train, y_train, X_val, y_val, r, args.repeat)
+
+    rng = np.random.default_rng(1)
+    X_big = rng.normal(size=(args.rows, 50))
+    y_big = X_big @ rng.normal(size=50) + rng.normal(size=args.rows)
+    benchmark('synthetic', X_big, y_big, X_big[:10_000], y_big[:10_000], 0.0, max(1, args.repeat // 2))
+
+    # Out of core: the CSV is streamed in chunks and only X^T X / X^T y are kept
+    (w0, w), ms = timed(lambda: fit_csv(args.data, chunksize=1000), args.repeat)
+    w0_mem, w_mem = train_linear_regression(df[BASE].fillna(0).values, np.log1p(df[TARGET].values))
+    print(f'\nfit_csv (1000-row chunks, full data): {ms:.1f} ms, '
+          f'max |w - in-memory qr| {np.abs(np.concatenate([[w0 - w0_mem], w - w_mem])).max():.2e}')
+
+    # Ridge sweep: one SVD for the whole path vs one notebook fit per r
+    rs = np.concatenate([[0.0], np.logspace(-6, 3, args.r_values - 1)])
+    X_train, X_val = prepare_X(df_train), prepare_X(df_val)
+    (W, scores), ms_path = timed(lambda: ridge_path(X_train, y_train, X_val, y_val, rs), args.repeat)
+    loop, ms_loop = timed(lambda: [train_linear_regression_inv(X_train, y_train, r) for r in rs], args.repeat)
+    W_loop = np.array([np.concatenate([[w0], w]) for w0, w in loop])
+    print(f'\nridge path, {len(rs)} r values: ridge_path {ms_path:.2f} ms, inv loop {ms_loop:.2f} ms, '
+          f'one fit {ms_loop / len(rs):.3f} ms, max |w - w_inv| {np.abs(W - W_loop).max():.2e}')
+    print(f'best r {rs[scores.argmin()]:g}, val RMSE {scores.min():.5f}')
+
+    # Seeds x r: one stacked SVD vs the homework loop (split, fit and score per seed and r)
+    seeds = list(range(args.seeds))
+    X_all, y_all = prepare_X(df), np.log1p(df[TARGET].values)
+
+    def seed_loop():
+        scores = np.empty((len(seeds), len(rs)))
+        for i, seed in enumerate(seeds):
+            train, val, _ = split_indices(len(X_all), seed)
+            for j, r in enumerate(rs):
+                w0, w = train_linear_regression_inv(X_all[train], y_all[train], r)
+                scores[i, j] = rmse(y_all[val], w0 + X_all[val] @ w)
+        return scores
+
+    (_, seed_scores), ms_seeds = timed(lambda: ridge_path_seeds(X_all, y_all, seeds, rs), args.repeat)
+    loop_scores, ms_seed_loop = timed(seed_loop, 1)
+    print(f'{len(seeds)} seeds x {len(rs)} r values: ridge_path_seeds {ms_seeds:.2f} ms, '
+          f'loop {ms_seed_loop:.1f} ms, max |RMSE diff| {np.abs(seed_scores - loop_scores).max():.2e}')
+    print(f'r=0: val RMSE std over seeds {seed_scores[:, 0].std():.4f}')
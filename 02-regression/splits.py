@@ -0,0 +1,243 @@
+"""Deterministic train / validation / test splits and K-fold indexes, computed once and cached.
+
+The notebooks rebuild their splits in every run and every sweep re-slices the frames with iloc +
+reset_index. `SplitManager` computes the index arrays once per (dataset hash, scheme, parameters),
+keeps them in memory and in an .npz file under `cache_dir`, and hands out parts of the data:
+
+    shuffle   np.random.seed(seed) + shuffle, as in homework 2 (60/20/20 by default)
+    sklearn   train_test_split twice (test, then val out of full_train), as in 06-trees
+    kfold     KFold, StratifiedKFold, GroupKFold or StratifiedGroupKFold depending on stratify / groups
+
+`SplitManager.views` makes one reordered copy of the data in which every part of a holdout split is a
+contiguous block; the parts are then slices of that copy rather than one fancy-indexed copy per part.
+
+    python splits.py    # cold vs cached split, views vs iloc re-slicing
+"""
+
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+import time
+import weakref
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import (GroupKFold, KFold, StratifiedGroupKFold, StratifiedKFold,
+                                     train_test_split)
+
+CACHE_DIR = '.splits'
+PARTS = ('train', 'val', 'test')
+
+
+def dataset_hash(data):
+    """
+    Content hash of a DataFrame / array (values and column names, not the index).
+    """
+    digest = hashlib.sha256()
+    if isinstance(data, pd.DataFrame):
+        digest.update(json.dumps([str(c) for c in data.columns]).encode())
+        digest.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+    else:
+        data = np.ascontiguousarray(data)
+        digest.update(f'{data.shape}{data.dtype}'.encode())
+        digest.update(data.tobytes())
+    return digest.hexdigest()[:16]
+
+
+def shuffle_split(n, seed=42, val=0.2, test=0.2):
+    """
+    Homework 2 split: train / val / test indexes after np.random.seed(seed) + np.random.shuffle.
+    """
+    n_val = int(n * val)
+    n_test = int(n * test)
+    n_train = n - n_val - n_test
+
+    idx = np.arange(n)
+    np.random.RandomState(seed).shuffle(idx)
+    return {'train': idx[:n_train], 'val': idx[n_train:n_train + n_val], 'test': idx[n_train + n_val:]}
+
+
+def sklearn_split(n, seed=1, val=0.25, test=0.2, stratify=None):
+    """
+    06-trees split: train_test_split(test_size=test), then val taken out of full_train (val of it).
+    """
+    idx = np.arange(n)
+    full_train, test_idx = train_test_split(idx, test_size=test, random_state=seed, stratify=stratify)
+    stratify_full = stratify[full_train] if stratify is not None else None
+    train, val_idx = train_test_split(full_train, test_size=val, random_state=seed, stratify=stratify_full)
+    return {'train': train, 'val': val_idx, 'test': test_idx}
+
+
+def kfold_split(n, n_splits=5, seed=1, stratify=None, groups=None):
+    """
+    K-fold indexes as a dict: 'fold' = fold number of every row (the validation fold it belongs to).
+    """
+    if groups is not None and stratify is not None:
+        splitter = StratifiedGroupKFold(n_splits=n_splits, shuffle=True, random_state=seed)
+    elif groups is not None:
+        splitter = GroupKFold(n_splits=n_splits, shuffle=True, random_state=seed)
+    elif stratify is not None:
+        splitter = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed)
+    else:
+        splitter = KFold(n_splits=n_splits, shuffle=True, random_state=seed)
+
+    fold = np.empty(n, dtype=np.int64)
+    y = stratify if stratify is not None else np.zeros(n)
+    for k, (_, val_idx) in enumerate(splitter.split(np.zeros(n), y, groups)):
+        fold[val_idx] = k
+    return {'fold': fold}
+
+
+SCHEMES = {'shuffle': shuffle_split, 'sklearn': sklearn_split, 'kfold': kfold_split}
+
+
+class SplitManager:
+    """
+    Split indexes keyed by (dataset hash, scheme, parameters), cached in memory and in cache_dir.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._cache = {}
+        self._hashes = {}
+
+    def _dataset_hash(self, data):
+        # Hashing 1M rows takes ~0.3 s: remember it per object (pass a new object after editing data in place).
+        # Objects without weak references (lists) are hashed on every call.
+        try:
+            ref = weakref.ref(data)
+        except TypeError:
+            return dataset_hash(data)
+        cached, digest = self._hashes.get(id(data), (None, None))
+        if cached is None or cached() is not data:
+            digest = dataset_hash(data)
+            self._hashes[id(data)] = (ref, digest)
+        return digest
+
+    @staticmethod
+    def _params(scheme, params):
+        # Explicit defaults (seed=42 for 'shuffle') must give the same key as leaving them out
+        bound = inspect.signature(SCHEMES[scheme]).bind(0, **params)
+        bound.apply_defaults()
+        return {name: value for name, value in bound.arguments.items() if name not in ('n', 'stratify', 'groups')}
+
+    def _key(self, data, scheme, params, stratify, groups):
+        key = {'data': self._dataset_hash(data), 'scheme': scheme, **params}
+        if stratify is not None:
+            key['stratify'] = dataset_hash(np.asarray(stratify).astype(str))
+        if groups is not None:
+            key['groups'] = dataset_hash(np.asarray(groups).astype(str))
+        return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()[:16]
+
+    def split(self, data, scheme='shuffle', stratify=None, groups=None, **params):
+        """
+        Index arrays of `scheme` for `data`: {'train', 'val', 'test'} for holdout schemes, {'fold'} for kfold.
+        """
+        if scheme not in SCHEMES:
+            raise ValueError(f'scheme must be one of {sorted(SCHEMES)}, got {scheme!r}')
+        if groups is not None and scheme != 'kfold':
+            raise ValueError('groups are only supported by the kfold scheme')
+        if stratify is not None and scheme == 'shuffle':
+            raise ValueError("stratify is not supported by the shuffle scheme, use 'sklearn' or 'kfold'")
+
+        params = self._params(scheme, params)
+        key = self._key(data, scheme, params, stratify, groups)
+        if key in self._cache:
+            return self._cache[key]
+
+        path = os.path.join(self.cache_dir, f'{key}.npz') if self.cache_dir else None
+        if path and os.path.exists(path):
+            with np.load(path, allow_pickle=False) as f_in:
+                indexes = {name: f_in[name] for name in f_in.files}
+        else:
+            if stratify is not None:
+                params['stratify'] = np.asarray(stratify)
+            if groups is not None:
+                params['groups'] = np.asarray(groups)
+            indexes = SCHEMES[scheme](len(data), **params)
+            if path:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                np.savez(path, **indexes)
+
+        for values in indexes.values():
+            values.flags.writeable = False  # shared between callers
+        self._cache[key] = indexes
+        return indexes
+
+    def folds(self, data, n_splits=5, seed=1, stratify=None, groups=None):
+        """
+        [(train_idx, val_idx), ...] from the cached fold assignment.
+        """
+        fold = self.split(data, 'kfold', stratify=stratify, groups=groups, n_splits=n_splits, seed=seed)['fold']
+        return [(np.flatnonzero(fold != k), np.flatnonzero(fold == k)) for k in range(n_splits)]
+
+    def views(self, split, *arrays):
+        """
+        {'train': (X_train, y_train, ...), 'val': ..., 'test': ...} for a holdout split.
+
+        Every array is copied once, reordered (train rows first, then val, then test); each part is then a
+        slice of that copy. NumPy parts are views of it. DataFrame / Series parts get their own 0-based
+        RangeIndex, like iloc + reset_index in the notebooks.
+        """
+        parts = [part for part in PARTS if part in split]
+        order = np.concatenate([split[part] for part in parts])
+        bounds = np.cumsum([0] + [len(split[part]) for part in parts])
+
+        reordered = []
+        for array in arrays:
+            if isinstance(array, (pd.DataFrame, pd.Series)):
+                reordered.append(array.iloc[order].reset_index(drop=True))
+            else:
+                reordered.append(np.asarray(array)[order])
+
+        def part_of(array, i):
+            part = array[bounds[i]:bounds[i + 1]]
+            # A slice keeps the row labels of the reordered copy: val and test would start at len(train)
+            return part.reset_index(drop=True) if isinstance(part, (pd.DataFrame, pd.Series)) else part
+
+        return {
+            part: tuple(part_of(array, i) for array in reordered)
+            for i, part in enumerate(parts)
+        }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Cached splits vs rebuilding and re-slicing them')
+    parser.add_argument('--data', default='car_fuel_efficiency.csv')
+    parser.add_argument('--rows', type=int, default=1_000_000, help='rows of the resampled benchmark frame')
+    parser.add_argument('--seeds', type=int, default=10)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.data).sample(args.rows, replace=True, random_state=1).reset_index(drop=True)
+    X = df.select_dtypes('number').fillna(0).to_numpy()
+    y = np.log1p(df['fuel_efficiency_mpg'].to_numpy())
+    seeds = range(args.seeds)
+
+    def timed(fn):
+        start = time.perf_counter()
+        result = fn()
+        return result, (time.perf_counter() - start) * 1000
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        manager = SplitManager(cache_dir)
+        _, cold = timed(lambda: [manager.split(df, 'shuffle', seed=seed) for seed in seeds])
+        _, memory = timed(lambda: [manager.split(df, 'shuffle', seed=seed) for seed in seeds])
+        # A new process / notebook session: the dataset is hashed once, the indexes come from disk
+        session = SplitManager(cache_dir)
+        _, disk = timed(lambda: [session.split(df, 'shuffle', seed=seed) for seed in seeds])
+    print(f'{args.seeds} seeds x {args.rows} rows, split indexes: computed {cold:.0f} ms, '
+          f'in-memory cache {memory:.1f} ms, from disk {disk:.0f} ms')
+
+    split = manager.split(df, 'shuffle', seed=42)
+    _, iloc_ms = timed(lambda: [(X[split[part]], y[split[part]]) for part in PARTS])
+    _, views_ms = timed(lambda: manager.views(split, X, y))
+    views = manager.views(split, X, y)
+    print(f'X and y per part: fancy indexing {iloc_ms:.1f} ms, views {views_ms:.1f} ms; parts are views of one '
+          f'reordered copy: {all(views[part][0].base is views["train"][0].base for part in PARTS)}')
+
+    strat = pd.qcut(y, 5, labels=False)
+    folds = manager.folds(X, n_splits=5, stratify=strat)
+    print(f'stratified 5-fold: fold target means {[round(float(y[val].mean()), 4) for _, val in folds]}')
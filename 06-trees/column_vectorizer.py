@@ -0,0 +1,150 @@
+"""Columnar replacement for `df.to_dict(orient='records')` + `DictVectorizer` on a DataFrame.
+
+DictVectorizer needs one Python dict per row and looks every key up in its vocabulary, row by row.
+`ColumnVectorizer` produces the same matrix (same feature names, same sorted column order) working a
+column at a time:
+
+    numeric / bool columns   the column's NumPy array (a view of the frame, no per-row conversion)
+                             written into its output column
+    other columns            one-hot "name=value": category codes from pandas, mapped to output columns
+                             with a precomputed code -> column index array
+
+Output is dense (sparse=False) or CSR (sparse=True). As with DictVectorizer, categories not seen in fit
+get no column. Unlike it, a missing categorical value gives an all-zero one-hot block instead of a
+numeric "name" feature holding NaN.
+
+    python column_vectorizer.py    # parity with DictVectorizer + speed at 10k / 1M rows
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse as sp
+from sklearn.feature_extraction import DictVectorizer
+
+
+class ColumnVectorizer:
+    """
+    DictVectorizer-compatible encoder for DataFrames: fit / transform / fit_transform,
+    feature_names_, vocabulary_ and get_feature_names_out().
+    """
+
+    def __init__(self, sparse=True, dtype=np.float64, separator='='):
+        self.sparse = sparse
+        self.dtype = dtype
+        self.separator = separator
+
+    def fit(self, df, y=None):
+        self.numeric_ = [c for c in df.columns
+                         if pd.api.types.is_numeric_dtype(df[c]) or pd.api.types.is_bool_dtype(df[c])]
+        self.categories_ = {
+            c: np.sort(df[c].dropna().astype(str).unique())
+            for c in df.columns if c not in self.numeric_
+        }
+
+        names = list(self.numeric_)
+        for column, categories in self.categories_.items():
+            names += [f'{column}{self.separator}{value}' for value in categories]
+        self.feature_names_ = sorted(names)
+        self.vocabulary_ = {name: i for i, name in enumerate(self.feature_names_)}
+
+        # Output column of every numeric column and of every category code (code order = categories_ order)
+        self._numeric_index = np.array([self.vocabulary_[c] for c in self.numeric_], dtype=np.intp)
+        self._category_index = {
+            column: np.array([self.vocabulary_[f'{column}{self.separator}{value}'] for value in categories],
+                             dtype=np.intp)
+            for column, categories in self.categories_.items()
+        }
+        return self
+
+    def _codes(self, df, column):
+        # -1 for missing values and for categories unseen in fit
+        values = df[column]
+        if not pd.api.types.is_string_dtype(values):
+            values = values.astype(str).where(values.notna())
+        return pd.Categorical(values, categories=self.categories_[column]).codes
+
+    def transform(self, df):
+        n_rows = len(df)
+        n_features = len(self.feature_names_)
+
+        if not self.sparse:
+            X = np.zeros((n_rows, n_features), dtype=self.dtype)
+            for column, j in zip(self.numeric_, self._numeric_index):
+                X[:, j] = df[column].to_numpy(copy=False)
+            rows = np.arange(n_rows)
+            for column, index in self._category_index.items():
+                codes = self._codes(df, column)
+                valid = codes >= 0
+                X[rows[valid], index[codes[valid]]] = 1
+            return X
+
+        # CSR from (row, column, value) triplets: numerics column by column, then one entry per one-hot block
+        rows, cols, data = [], [], []
+        row_ids = np.arange(n_rows)
+        for column, j in zip(self.numeric_, self._numeric_index):
+            values = df[column].to_numpy(dtype=self.dtype, copy=False)
+            nonzero = values != 0
+            rows.append(row_ids[nonzero])
+            cols.append(np.full(nonzero.sum(), j, dtype=np.intp))
+            data.append(values[nonzero])
+        for column, index in self._category_index.items():
+            codes = self._codes(df, column)
+            valid = codes >= 0
+            rows.append(row_ids[valid])
+            cols.append(index[codes[valid]])
+            data.append(np.ones(valid.sum(), dtype=self.dtype))
+
+        X = sp.coo_matrix((np.concatenate(data), (np.concatenate(rows), np.concatenate(cols))),
+                          shape=(n_rows, n_features), dtype=self.dtype)
+        return X.tocsr()
+
+    def fit_transform(self, df, y=None):
+        return self.fit(df).transform(df)
+
+    def get_feature_names_out(self, input_features=None):
+        return np.asarray(self.feature_names_, dtype=object)
+
+
+def timed(fn, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='ColumnVectorizer vs to_dict + DictVectorizer')
+    parser.add_argument('--data', default='car_fuel_efficiency.csv')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 1_000_000])
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.data).drop(columns='fuel_efficiency_mpg')
+    numeric_columns = df.select_dtypes(include='number').columns
+    df[numeric_columns] = df[numeric_columns].fillna(0)
+
+    print(f'{"rows":>9} {"output":<6} {"DictVectorizer s":>17} {"ColumnVectorizer s":>19} {"speedup":>8}  same')
+    for n_rows in args.rows:
+        df_n = df.sample(n_rows, replace=True, random_state=1).reset_index(drop=True)
+        for is_sparse in (False, True):
+            def dict_path():
+                return DictVectorizer(sparse=is_sparse).fit_transform(df_n.to_dict(orient='records'))
+
+            def column_path():
+                return ColumnVectorizer(sparse=is_sparse).fit_transform(df_n)
+
+            X_dv, t_dv = timed(dict_path, repeat=1 if n_rows > 100_000 else 3)
+            X_cv, t_cv = timed(column_path, repeat=1 if n_rows > 100_000 else 3)
+            sample = df_n.head(1000)
+            same_names = (DictVectorizer().fit(sample.to_dict(orient='records')).feature_names_
+                          == ColumnVectorizer().fit(sample).feature_names_)
+            if is_sparse:
+                same = same_names and (X_dv != X_cv).nnz == 0
+            else:
+                same = same_names and np.array_equal(X_dv, X_cv)
+            print(f'{n_rows:>9} {"csr" if is_sparse else "dense":<6} {t_dv:17.3f} {t_cv:19.3f} '
+                  f'{t_dv / t_cv:7.1f}x  {same}')
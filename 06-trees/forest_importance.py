@@ -0,0 +1,65 @@
+"""Permutation importance of the homework's final RandomForestRegressor and XGBoost models.
+
+The increase in validation RMSE when one feature is shuffled, with a Student's t confidence interval
+over the repeats. The importance is measured on the validation split of `load_data`, never on the training
+rows: a model scored on its own training data is rewarded for what it memorised, and the importances
+then come out skewed towards the overfitted features. One-hot columns of the same field
+(`fuel_type=Diesel`, `fuel_type=Gasoline`, ...) are shuffled together.
+
+The engine is `permutation_importance` from midterm-project/importance.py, imported from there (one
+implementation for any fitted estimator). It runs the (feature, repeat) pairs in a process pool and sets
+the models' n_jobs to 1 inside the workers, so the forest's joblib pool doesn't oversubscribe the cores.
+
+    python forest_importance.py
+    python forest_importance.py --repeats 10 --processes 4
+"""
+
+import argparse
+import os
+import sys
+
+import pandas as pd
+import xgboost as xgb
+from sklearn.ensemble import RandomForestRegressor
+
+from forest_sweep import load_data
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'midterm-project'))
+from importance import N_REPEATS, permutation_importance  # noqa: E402
+
+
+def onehot_groups(feature_names):
+    """
+    {field: [columns]} for the `field=value` columns of ColumnVectorizer / DictVectorizer.
+    """
+    groups = {}
+    for name in feature_names:
+        if '=' in name:
+            groups.setdefault(name.split('=', 1)[0], []).append(name)
+    return groups
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Permutation importance of the homework models on the validation set')
+    parser.add_argument('--data', default='car_fuel_efficiency.csv')
+    parser.add_argument('--repeats', type=int, default=N_REPEATS)
+    parser.add_argument('--processes', type=int, default=None)
+    args = parser.parse_args()
+
+    X_train, y_train, X_val, y_val, feature_names = load_data(args.data)
+    X_train = pd.DataFrame(X_train, columns=feature_names)
+    X_val = pd.DataFrame(X_val, columns=feature_names)
+    groups = onehot_groups(feature_names)
+
+    # Final models of the homework (xgboost through its sklearn API: same parameters, picklable for the pool)
+    models = {
+        'random forest (10)': RandomForestRegressor(n_estimators=10, max_depth=20, random_state=1, n_jobs=-1),
+        'xgboost (200 rounds)': xgb.XGBRegressor(learning_rate=0.1, max_depth=6, min_child_weight=1,
+                                                 n_estimators=200, objective='reg:squarederror', random_state=1),
+    }
+    for name, model in models.items():
+        model.fit(X_train, y_train)
+        df_importance = permutation_importance(model, X_val, y_val, groups=groups,
+                                               n_repeats=args.repeats, processes=args.processes)
+        print(f'\n{name}: validation RMSE {df_importance.attrs["baseline"]:.4f} on {len(X_val)} rows')
+        print(df_importance.round(4).to_string(index=False))
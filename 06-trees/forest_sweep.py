@@ -0,0 +1,148 @@
+"""n_estimators x max_depth sweep of the homework's RandomForestRegressor without refitting every point.
+
+The homework loop fits a new forest for each n_estimators in 10..200 and each max_depth: ~8,400 trees for
+80 RMSE values. With a fixed random_state, sklearn draws the seed of tree i from the same sequence
+whatever n_estimators is, so a forest of n trees is exactly the first n trees of a 200-tree forest.
+The sweep therefore fits one forest per depth (the depths in parallel processes) and scores every
+prefix of it:
+
+    prefix      average the per-tree predictions with a cumulative sum (one 200-tree fit per depth)
+    warm_start  grow the same forest 10 trees at a time with warm_start=True and predict after each step
+
+    python forest_sweep.py            # full grid, as in the homework
+    python forest_sweep.py --check    # + refit a few grid points from scratch and compare
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import root_mean_squared_error
+
+from column_vectorizer import ColumnVectorizer
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '02-regression'))
+from splits import CACHE_DIR, SplitManager  # noqa: E402
+
+N_ESTIMATORS = list(range(10, 201, 10))
+DEPTHS = [10, 15, 20, 25]
+TARGET = 'fuel_efficiency_mpg'
+
+
+def load_data(path='car_fuel_efficiency.csv'):
+    """
+    Train / validation matrices and feature names as in the homework (numeric NaN -> 0, one-hot encoding),
+    encoded with ColumnVectorizer, which gives the same matrices as to_dict + DictVectorizer.
+    The split is the homework's train_test_split(test_size=0.2), then 0.25 of full_train, random_state=1,
+    taken from the SplitManager cache next to the data file.
+    """
+    df = pd.read_csv(path)
+    numeric_columns = df.select_dtypes(include='number').columns
+    df[numeric_columns] = df[numeric_columns].fillna(0)
+
+    manager = SplitManager(os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR))
+    split = manager.split(df, 'sklearn', seed=1, val=0.25, test=0.2)
+    views = manager.views(split, df.drop(columns=[TARGET]), df[TARGET].to_numpy())
+    df_train, y_train = views['train']
+    df_val, y_val = views['val']
+
+    dv = ColumnVectorizer(sparse=False)
+    X_train = dv.fit_transform(df_train)
+    X_val = dv.transform(df_val)
+    return X_train, y_train, X_val, y_val, dv.get_feature_names_out().tolist()
+
+
+def prefix_rmse(forest, X_val, y_val, n_estimators):
+    """
+    RMSE of the forest made of the first n trees, for every n in `n_estimators`.
+    """
+    tree_preds = np.stack([tree.predict(X_val) for tree in forest.estimators_])
+    prefix_sums = np.cumsum(tree_preds, axis=0)
+
+    n = np.asarray(n_estimators)
+    y_pred = prefix_sums[n - 1] / n[:, None]
+    return np.sqrt(((y_pred - y_val) ** 2).mean(axis=1))
+
+
+def sweep_depth(X_train, y_train, X_val, y_val, max_depth, n_estimators=N_ESTIMATORS,
+                method='prefix', random_state=1, n_jobs=1):
+    """
+    [(n_estimators, max_depth, rmse), ...] for one depth from a single growing forest.
+    """
+    forest = RandomForestRegressor(max_depth=max_depth, random_state=random_state, n_jobs=n_jobs)
+
+    if method == 'prefix':
+        forest.set_params(n_estimators=max(n_estimators))
+        forest.fit(X_train, y_train)
+        scores = prefix_rmse(forest, X_val, y_val, n_estimators)
+    elif method == 'warm_start':
+        forest.set_params(warm_start=True)
+        scores = []
+        for n in sorted(n_estimators):
+            forest.set_params(n_estimators=n)
+            forest.fit(X_train, y_train)  # only the trees beyond the current n are trained
+            scores.append(root_mean_squared_error(y_val, forest.predict(X_val)))
+    else:
+        raise ValueError(f"method must be 'prefix' or 'warm_start', got {method!r}")
+
+    return [(n, max_depth, float(rmse)) for n, rmse in zip(sorted(n_estimators), scores)]
+
+
+def forest_sweep(X_train, y_train, X_val, y_val, depths=DEPTHS, n_estimators=N_ESTIMATORS,
+                 method='prefix', random_state=1, processes=None):
+    """
+    RMSE grid as a DataFrame with the homework's columns: n_estimators, max_depth, rmse.
+
+    Each depth runs in its own process; the CPUs are split between the processes (n_jobs per forest).
+    """
+    processes = processes or min(len(depths), os.cpu_count())
+    n_jobs = max(1, os.cpu_count() // processes)
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [
+            executor.submit(sweep_depth, X_train, y_train, X_val, y_val, depth, n_estimators,
+                            method, random_state, n_jobs)
+            for depth in depths
+        ]
+        scores = [row for future in futures for row in future.result()]
+
+    return pd.DataFrame(scores, columns=['n_estimators', 'max_depth', 'rmse'])
+
+
+def refit_rmse(X_train, y_train, X_val, y_val, n, max_depth, random_state=1):
+    # One grid point the homework way, from scratch
+    rf = RandomForestRegressor(n_estimators=n, max_depth=max_depth, random_state=random_state, n_jobs=-1)
+    rf.fit(X_train, y_train)
+    return root_mean_squared_error(y_val, rf.predict(X_val))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='RandomForest n_estimators x max_depth sweep')
+    parser.add_argument('--data', default='car_fuel_efficiency.csv')
+    parser.add_argument('--method', choices=['prefix', 'warm_start'], default='prefix')
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--check', action='store_true', help='refit some grid points from scratch and compare')
+    args = parser.parse_args()
+
+    X_train, y_train, X_val, y_val, _ = load_data(args.data)
+
+    start = time.perf_counter()
+    df_scores = forest_sweep(X_train, y_train, X_val, y_val, method=args.method, processes=args.processes)
+    elapsed = time.perf_counter() - start
+
+    print(df_scores.pivot(index='n_estimators', columns='max_depth', values='rmse').round(3))
+    print(f'\n{len(df_scores)} grid points, {len(DEPTHS) * max(N_ESTIMATORS)} trees '
+          f'(homework loop: {len(DEPTHS) * sum(N_ESTIMATORS)}), {elapsed:.1f} s')
+
+    if args.check:
+        for n, depth in [(10, 10), (60, 20), (200, 25)]:
+            start = time.perf_counter()
+            rmse = refit_rmse(X_train, y_train, X_val, y_val, n, depth)
+            swept = df_scores.query('n_estimators == @n and max_depth == @depth').rmse.iloc[0]
+            print(f'n_estimators={n:<3} max_depth={depth}: refit {rmse:.6f} '
+                  f'({time.perf_counter() - start:.1f} s), sweep {swept:.6f}, diff {abs(rmse - swept):.1e}')
@@ -0,0 +1,57 @@
+import os
+
+import numpy as np
+import pytest
+import xgboost as xgb
+from sklearn.ensemble import RandomForestRegressor
+
+from forest_sweep import load_data
+from tree_inference import check_parity, flatten_booster, flatten_forest
+
+ATOL = 1e-4
+
+
+@pytest.fixture(scope='module')
+def data():
+    return load_data(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'car_fuel_efficiency.csv'))
+
+@pytest.fixture(scope='module')
+def forest(data):
+    X_train, y_train, *_ = data
+    return RandomForestRegressor(n_estimators=10, max_depth=20, random_state=1, n_jobs=-1).fit(X_train, y_train)
+
+@pytest.fixture(scope='module')
+def booster(data):
+    X_train, y_train, _, _, feature_names = data
+    params = {'eta': 0.1, 'max_depth': 6, 'min_child_weight': 1, 'objective': 'reg:squarederror', 'seed': 1}
+    return xgb.train(params, xgb.DMatrix(X_train, label=y_train, feature_names=feature_names), num_boost_round=200)
+
+def booster_predict(booster, X):
+    return booster.predict(xgb.DMatrix(X, feature_names=booster.feature_names))
+
+def with_missing(X):
+    X = np.array(X, dtype=np.float64)
+    X[::3, 0] = np.nan
+    X[1::5, -1] = np.nan
+    return X
+
+
+def test_forest_matches_sklearn(forest, data):
+    X_val = data[2]
+    flat = flatten_forest(forest)
+    np.testing.assert_allclose(flat.predict(X_val), forest.predict(X_val), rtol=0, atol=ATOL)
+    for i in range(0, len(X_val), 97):
+        np.testing.assert_allclose(flat.predict(X_val[i]), forest.predict(X_val[i:i + 1]), rtol=0, atol=ATOL)
+
+def test_booster_matches_xgboost(booster, data):
+    X_val = data[2]
+    flat = flatten_booster(booster)
+    for X in (X_val, with_missing(X_val), X_val[:1]):
+        np.testing.assert_allclose(flat.predict(X), booster_predict(booster, X), rtol=0, atol=ATOL)
+
+def test_check_parity_raises_on_mismatch(booster, data):
+    X_val = data[2]
+    flat = flatten_booster(booster)
+    assert check_parity(lambda X: booster_predict(booster, X), flat, X_val) <= ATOL
+    with pytest.raises(ValueError):
+        check_parity(lambda X: booster_predict(booster, X) + 1.0, flat, X_val)
@@ -0,0 +1,177 @@
+"""NumPy inference for the homework's RandomForestRegressor and XGBoost models.
+
+`rf.predict` on one row goes through sklearn's input validation and joblib dispatch for every tree;
+`booster.predict` needs a DMatrix. `flatten_forest` / `flatten_booster` turn a trained model into
+contiguous node arrays (split feature, threshold, children, leaf value), and `FlatForest.predict` walks
+every row down every tree at once with vectorized NumPy indexing:
+
+    sklearn   float32 features, x <= threshold goes left, prediction = mean of the trees
+    xgboost   float32 features, x < threshold goes left (missing: default direction),
+              prediction = sum of the trees + base_score
+
+    python tree_inference.py    # parity against rf.predict / booster.predict + single-row and batch latency
+    pytest test_tree_inference.py
+
+The booster flattening and the traversal itself (`tree_leaves`) are imported from
+midterm-project/compiled_model.py, the one implementation both folders use; it lives there because the
+midterm service's Docker image is built from that directory. Only the sklearn flattening is defined here.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import xgboost as xgb
+from sklearn.ensemble import RandomForestRegressor
+
+from forest_sweep import load_data
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'midterm-project'))
+from compiled_model import flatten_booster as booster_arrays, tree_leaves  # noqa: E402
+
+# (row, tree) pairs traversed together; keeps the working arrays small enough to stay in cache
+BLOCK_SIZE = 16384
+
+
+class FlatForest:
+    """
+    A tree ensemble as concatenated node arrays. Leaves point to themselves, so `depth` steps take every
+    row to its leaf in every tree without per-tree branching.
+    """
+
+    def __init__(self, split_feature, threshold, left, right, default_left, value, roots, depth,
+                 less_equal, average, base_score=0.0):
+        self.split_feature = split_feature
+        self.threshold = threshold
+        self.default_left = default_left
+        self.value = value
+        self.roots = roots
+        self.depth = depth
+        self.less_equal = less_equal  # sklearn: x <= t goes left; xgboost: x < t goes left
+        self.average = average        # sklearn forests average the trees, boosters sum them
+        self.base_score = base_score
+
+        # Interleaved (left, right) pairs: the next node is children[2 * node + go_right]
+        self._children = np.stack([left, right], axis=1).ravel()
+
+    def predict(self, X):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        block_rows = max(1, BLOCK_SIZE // len(self.roots))
+        return np.concatenate([
+            self._predict_block(X[start:start + block_rows])
+            for start in range(0, max(len(X), 1), block_rows)
+        ])
+
+    def _predict_block(self, X):
+        leaves = tree_leaves(X, self.split_feature, self.threshold, self._children, self.default_left,
+                             self.value, self.roots, self.depth, less_equal=self.less_equal)
+        if self.average:
+            return leaves.mean(axis=1, dtype=np.float64)
+        return leaves.sum(axis=1, dtype=np.float64) + self.base_score
+
+
+def _concat(trees, depth, less_equal, average, base_score=0.0):
+    # trees: per-tree (split_feature, threshold, left, right, default_left, value) with local node ids
+    arrays = [[] for _ in range(6)]
+    roots = []
+    offset = 0
+    for tree in trees:
+        split_feature, threshold, left, right, default_left, value = tree
+        for out, values in zip(arrays, (split_feature, threshold, left + offset, right + offset,
+                                        default_left, value)):
+            out.append(values)
+        roots.append(offset)
+        offset += len(left)
+
+    return FlatForest(*[np.concatenate(a) for a in arrays], roots=np.asarray(roots, dtype=np.int64),
+                      depth=depth, less_equal=less_equal, average=average, base_score=base_score)
+
+
+def flatten_forest(forest):
+    """
+    FlatForest of a fitted RandomForestRegressor (or a single DecisionTreeRegressor).
+    """
+    estimators = getattr(forest, 'estimators_', [forest])
+    trees = []
+    depth = 0
+    for estimator in estimators:
+        tree = estimator.tree_
+        is_leaf = tree.children_left == -1
+        nodes = np.arange(tree.node_count, dtype=np.int64)
+        # sklearn >= 1.3 trees can be fitted with NaNs; older ones never see them
+        missing_left = getattr(tree, 'missing_go_to_left', np.ones(tree.node_count, dtype=np.uint8))
+
+        trees.append((
+            np.where(is_leaf, 0, tree.feature).astype(np.int64),
+            tree.threshold.astype(np.float64),  # sklearn compares float32 X against float64 thresholds
+            np.where(is_leaf, nodes, tree.children_left),
+            np.where(is_leaf, nodes, tree.children_right),
+            missing_left.astype(bool),
+            tree.value[:, 0, 0].astype(np.float64),
+        ))
+        depth = max(depth, tree.max_depth)
+
+    return _concat(trees, depth, less_equal=True, average=True)
+
+
+def flatten_booster(booster):
+    """
+    FlatForest of an xgboost Booster (numeric splits only), from compiled_model.flatten_booster's arrays.
+    """
+    arrays = booster_arrays(booster)
+    return FlatForest(arrays['split_feature'], arrays['threshold'], arrays['left'], arrays['right'],
+                      arrays['default_left'], arrays['value'], arrays['roots'], arrays['depth'],
+                      less_equal=False, average=False, base_score=arrays['base_score'])
+
+
+def check_parity(predict, flat, X, atol=1e-4):
+    """
+    Raises if the flattened model disagrees with the original `predict` on X; returns max |diff|.
+    """
+    max_diff = float(np.max(np.abs(predict(X) - flat.predict(X))))
+    if max_diff > atol:
+        raise ValueError(f'Flattened model differs from the original: max |diff| = {max_diff:.2e} > {atol:.0e}')
+    return max_diff
+
+
+def latency_ms(predict, X, repeats):
+    predict(X)  # warm-up
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict(X)
+        timings.append((time.perf_counter() - start) * 1000)
+    return np.percentile(timings, 50)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Parity and latency of the flattened forest / booster')
+    parser.add_argument('--data', default='car_fuel_efficiency.csv')
+    parser.add_argument('--repeats', type=int, default=50)
+    args = parser.parse_args()
+
+    X_train, y_train, X_val, y_val, feature_names = load_data(args.data)
+
+    # Final models of the homework
+    rf = RandomForestRegressor(n_estimators=10, max_depth=20, random_state=1, n_jobs=-1)
+    rf.fit(X_train, y_train)
+    xgb_params = {'eta': 0.1, 'max_depth': 6, 'min_child_weight': 1, 'objective': 'reg:squarederror',
+                  'seed': 1, 'verbosity': 1}
+    booster = xgb.train(xgb_params, xgb.DMatrix(X_train, label=y_train, feature_names=feature_names),
+                        num_boost_round=200)
+
+    def booster_predict(X):
+        return booster.predict(xgb.DMatrix(X, feature_names=feature_names))
+
+    print(f'{"model":<22} {"max |diff|":>10} {"1 row orig ms":>14} {"1 row flat ms":>14} '
+          f'{"batch orig ms":>14} {"batch flat ms":>14}')
+    for name, predict, flat in [('random forest (10)', rf.predict, flatten_forest(rf)),
+                                ('xgboost (200 rounds)', booster_predict, flatten_booster(booster))]:
+        max_diff = check_parity(predict, flat, X_val)
+        timings = [latency_ms(fn, X, args.repeats) for X in (X_val[:1], X_val) for fn in (predict, flat.predict)]
+        print(f'{name:<22} {max_diff:10.1e} ' + ' '.join(f'{t:14.3f}' for t in timings))
+    print(f'batch = {len(X_val)} validation rows')
@@ -0,0 +1,152 @@
+"""XGBoost experiments with structured per-round metrics, replacing %%capture + parse_xgb_output.
+
+`xgb.train(..., evals_result=...)` records every round's train/val metric as a list, so nothing is
+parsed from stdout, training can stay silent, and several configurations can train at once. Configs run
+concurrently in threads (XGBoost releases the GIL while training); the CPU budget is split between them
+via `nthread`, so running 4 configs at once on 8 cores gives each 2 threads instead of 4 x 8 competing.
+
+    python xgb_experiments.py                              # the homework's eta sweep
+    python xgb_experiments.py --max-depth 3 6 10 --early-stopping 10
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import product
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from forest_sweep import load_data
+
+XGB_PARAMS = {
+    'eta': 0.3,
+    'max_depth': 6,
+    'min_child_weight': 1,
+
+    'objective': 'reg:squarederror',
+    'eval_metric': 'rmse',
+
+    'seed': 1,
+    'verbosity': 1,
+}
+
+
+class RoundTimer(xgb.callback.TrainingCallback):
+    """
+    Wall time of every boosting round (seconds since the start of training), next to evals_result.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.times = []
+
+    def before_training(self, model):
+        self._start = time.perf_counter()
+        return model
+
+    def after_iteration(self, model, epoch, evals_log):
+        self.times.append(time.perf_counter() - self._start)
+        return False
+
+
+def train_config(params, X_train, y_train, X_val, y_val, feature_names=None, num_boost_round=200,
+                 early_stopping_rounds=None, nthread=None):
+    """
+    Train one configuration; returns the booster and its per-round metrics as arrays.
+    """
+    # A DMatrix per config: cheap at this size and no state shared between concurrent trainings
+    dtrain = xgb.DMatrix(X_train, label=y_train, feature_names=feature_names)
+    dval = xgb.DMatrix(X_val, label=y_val, feature_names=feature_names)
+
+    params = {**params, 'nthread': nthread or os.cpu_count()}
+    evals_result = {}
+    timer = RoundTimer()
+
+    model = xgb.train(params,
+                      dtrain,
+                      num_boost_round=num_boost_round,
+                      evals=[(dtrain, 'train'), (dval, 'val')],
+                      evals_result=evals_result,
+                      early_stopping_rounds=early_stopping_rounds,
+                      callbacks=[timer],
+                      verbose_eval=False)
+
+    metric = params['eval_metric']
+    history = {
+        'num_iter': np.arange(len(timer.times)),
+        'train': np.asarray(evals_result['train'][metric]),
+        'val': np.asarray(evals_result['val'][metric]),
+        'seconds': np.asarray(timer.times),
+    }
+    # Without early stopping the best round is simply the last one
+    best_iteration = getattr(model, 'best_iteration', len(timer.times) - 1)
+    return model, history, best_iteration
+
+
+def scores_frame(history, metric='rmse'):
+    """
+    Per-round DataFrame like parse_xgb_output's: num_iter, train_<metric>, val_<metric>.
+    """
+    return pd.DataFrame({
+        'num_iter': history['num_iter'],
+        f'train_{metric}': history['train'],
+        f'val_{metric}': history['val'],
+    })
+
+
+def run_experiments(configs, X_train, y_train, X_val, y_val, feature_names=None, base_params=XGB_PARAMS,
+                    num_boost_round=200, early_stopping_rounds=None, concurrency=None, n_threads=None):
+    """
+    Train every config (a dict of params overriding `base_params`) and return one long DataFrame:
+    the config's params, num_iter, train_<metric>, val_<metric>, seconds and best_iteration.
+
+    `concurrency` configs train at the same time, each with n_threads // concurrency threads.
+    """
+    n_threads = n_threads or os.cpu_count()
+    concurrency = concurrency or min(len(configs), n_threads)
+    nthread = max(1, n_threads // concurrency)
+    metric = base_params['eval_metric']
+
+    def run(config):
+        _, history, best_iteration = train_config({**base_params, **config}, X_train, y_train, X_val, y_val,
+                                                  feature_names, num_boost_round, early_stopping_rounds, nthread)
+        df = scores_frame(history, metric)
+        df['seconds'] = history['seconds']
+        df['best_iteration'] = best_iteration
+        return df.assign(**config)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(run, configs))
+
+    df_results = pd.concat(results, ignore_index=True)
+    columns = list(configs[0]) + [c for c in df_results.columns if c not in configs[0]]
+    return df_results[columns]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Concurrent XGBoost eta / max_depth experiments')
+    parser.add_argument('--data', default='car_fuel_efficiency.csv')
+    parser.add_argument('--eta', type=float, nargs='+', default=[0.3, 0.1])
+    parser.add_argument('--max-depth', type=int, nargs='+', default=[6])
+    parser.add_argument('--num-boost-round', type=int, default=200)
+    parser.add_argument('--early-stopping', type=int, default=None, help='early_stopping_rounds on val')
+    parser.add_argument('--concurrency', type=int, default=None)
+    args = parser.parse_args()
+
+    X_train, y_train, X_val, y_val, feature_names = load_data(args.data)
+    configs = [{'eta': eta, 'max_depth': depth} for eta, depth in product(args.eta, args.max_depth)]
+
+    start = time.perf_counter()
+    df_results = run_experiments(configs, X_train, y_train, X_val, y_val, feature_names,
+                                 num_boost_round=args.num_boost_round,
+                                 early_stopping_rounds=args.early_stopping,
+                                 concurrency=args.concurrency)
+    elapsed = time.perf_counter() - start
+
+    # Best validation round of every config
+    best = df_results.loc[df_results.groupby(list(configs[0])).val_rmse.idxmin()]
+    print(best[list(configs[0]) + ['num_iter', 'train_rmse', 'val_rmse', 'best_iteration']].to_string(index=False))
+    print(f'\n{len(configs)} configs, {len(df_results)} rounds in {elapsed:.1f} s')
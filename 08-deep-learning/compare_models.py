@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""Side-by-side report of the hairCNN variants: accuracy, parameters, ONNX size and CPU latency
+(PyTorch eager and ONNX Runtime, which serves the model in 09-serverless / 10-kubernetes).
+
+    python compare_models.py --data /content/data --epochs 10
+
+Accuracy comes from training every variant with the same data, seed and optimizer
+(SGD lr=0.002, momentum=0.8) and evaluating on the test set; --epochs 0 skips training.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import torch
+import torch.nn as nn
+
+from data_pipeline import (CachedImageDataset, build_image_cache, cached_eval_transforms, cached_train_transforms,
+                           make_loader)
+from export_onnx import export_onnx
+from hair_model import VARIANTS, count_parameters, hairCNN
+
+SEED = 42
+INPUT_SHAPE = (3, 200, 200)
+
+
+def train_and_evaluate(model, train_loader, test_loader, epochs):
+    optimizer = torch.optim.SGD(model.parameters(), lr=0.002, momentum=0.8)
+    criterion = nn.BCEWithLogitsLoss()
+
+    for _ in range(epochs):
+        model.train()
+        for images, labels in train_loader:
+            optimizer.zero_grad()
+            loss = criterion(model(images), labels.float().unsqueeze(1))
+            loss.backward()
+            optimizer.step()
+
+    model.eval()
+    correct = total = 0
+    with torch.no_grad():
+        for images, labels in test_loader:
+            predicted = (model(images) > 0).long().squeeze(1)
+            correct += (predicted == labels).sum().item()
+            total += labels.size(0)
+    return correct / total
+
+
+def onnx_report(model, threads=1, batch_size=1, repeats=50):
+    """
+    Exports the model once and returns its ONNX size and ONNX Runtime latency per image (the serving runtime).
+    """
+    import onnxruntime as ort
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = export_onnx(model, os.path.join(tmp, 'model.onnx'))
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        session = ort.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+
+        x = np.random.default_rng(SEED).standard_normal((batch_size, *INPUT_SHAPE), dtype=np.float32)
+        for _ in range(5):
+            session.run(None, {'input': x})
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            session.run(None, {'input': x})
+            timings.append((time.perf_counter() - start) * 1000)
+        return os.path.getsize(path) / 1024 ** 2, float(np.median(timings)) / batch_size
+
+
+def torch_latency_ms(model, batch_size=1, repeats=50):
+    model.eval()
+    x = torch.randn(batch_size, *INPUT_SHAPE)
+    timings = []
+    with torch.inference_mode():
+        for _ in range(5):
+            model(x)
+        for _ in range(repeats):
+            start = time.perf_counter()
+            model(x)
+            timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings)) / batch_size
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare hairCNN variants')
+    parser.add_argument('--data', default='/content/data', help='folder with train/ and test/ ImageFolders')
+    parser.add_argument('--epochs', type=int, default=10)
+    parser.add_argument('--batch-size', type=int, default=20)
+    parser.add_argument('--threads', type=int, default=1, help='torch CPU threads for the latency measurement')
+    args = parser.parse_args()
+
+    if args.epochs > 0:
+        build_image_cache(os.path.join(args.data, 'train'), os.path.join(args.data, 'train_cache'))
+        build_image_cache(os.path.join(args.data, 'test'), os.path.join(args.data, 'test_cache'))
+        train_dataset = CachedImageDataset(os.path.join(args.data, 'train_cache'), transform=cached_train_transforms)
+        test_dataset = CachedImageDataset(os.path.join(args.data, 'test_cache'), transform=cached_eval_transforms)
+
+    rows = []
+    for variant in VARIANTS:
+        torch.manual_seed(SEED)
+        model = hairCNN(num_classes=2, variant=variant)
+
+        accuracy = None
+        if args.epochs > 0:
+            train_loader = make_loader(train_dataset, batch_size=args.batch_size, shuffle=True)
+            test_loader = make_loader(test_dataset, batch_size=args.batch_size, shuffle=False)
+            accuracy = train_and_evaluate(model, train_loader, test_loader, args.epochs)
+
+        previous_threads = torch.get_num_threads()
+        torch.set_num_threads(args.threads)
+        try:
+            onnx_mb, ort_ms = onnx_report(model, threads=args.threads)
+            rows.append({
+                'variant': variant,
+                'test_acc': accuracy,
+                'params': count_parameters(model),
+                'onnx_mb': round(onnx_mb, 2),
+                'torch_ms_b1': round(torch_latency_ms(model, batch_size=1), 3),
+                'torch_ms_per_image_b32': round(torch_latency_ms(model, batch_size=32, repeats=10), 3),
+                'ort_ms_b1': round(ort_ms, 3),
+            })
+        finally:
+            torch.set_num_threads(previous_threads)
+
+    df_report = pd.DataFrame(rows).set_index('variant')
+    print(df_report.to_string())
+    if {'homework', 'gap'} <= set(df_report.index):
+        speedup = df_report.loc['homework'] / df_report.loc['gap']
+        print(f"gap vs homework speedup (batch 1): torch {speedup['torch_ms_b1']:.1f}x, "
+              f"ONNX Runtime {speedup['ort_ms_b1']:.1f}x")
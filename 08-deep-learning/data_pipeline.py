@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""Training data pipeline for the hair CNN (lesson 08).
+
+* make_loader(): DataLoader with worker processes, pinned memory and persistent workers.
+* build_image_cache(): decodes and resizes the dataset ONCE into a uint8 memory-mapped .npy file.
+* CachedImageDataset: reads images from that cache, so later epochs only pay for the random augmentations.
+* train/eval transforms: augmentations run on uint8 images BEFORE conversion to float and Normalize;
+  the eval path is deterministic (no augmentation).
+
+Run directly to compare images/sec of the options and the per-image cost of each transform pipeline:
+
+    python data_pipeline.py --data /content/data/train
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import torch
+import torchvision
+import torchvision.transforms.v2 as transforms
+from PIL import Image
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '02-regression'))
+from splits import SplitManager  # noqa: E402
+
+IMAGE_SIZE = (200, 200)
+IMAGENET_MEAN = [0.485, 0.456, 0.406]
+IMAGENET_STD = [0.229, 0.224, 0.225]
+
+
+def default_num_workers():
+    # Leave one core for the training loop itself
+    return max(1, min(8, (os.cpu_count() or 1) - 1))
+
+
+def make_loader(dataset, batch_size, shuffle, num_workers=None, pin_memory=None, persistent_workers=None,
+                prefetch_factor=2):
+    """
+    DataLoader with parallel decoding/augmentation in worker processes.
+
+    * num_workers: worker processes (default: cores - 1, max 8). 0 loads on the main thread.
+    * pin_memory: page-locked batches for faster host -> GPU copies (default: only with CUDA).
+    * persistent_workers: keep workers alive between epochs instead of re-forking them every epoch.
+    """
+    if num_workers is None:
+        num_workers = default_num_workers()
+    if pin_memory is None:
+        pin_memory = torch.cuda.is_available()
+    if persistent_workers is None:
+        persistent_workers = num_workers > 0
+
+    kwargs = {}
+    if num_workers > 0:
+        kwargs['prefetch_factor'] = prefetch_factor
+        kwargs['persistent_workers'] = persistent_workers
+
+    return torch.utils.data.DataLoader(
+        dataset,
+        batch_size=batch_size,
+        shuffle=shuffle,
+        num_workers=num_workers,
+        pin_memory=pin_memory,
+        **kwargs
+    )
+
+
+def build_image_cache(root, cache_path, size=IMAGE_SIZE, overwrite=False):
+    """
+    Decodes every image of an ImageFolder once, resizes it and stores it as uint8 (N, H, W, 3).
+
+    Images, labels and class names are written next to each other:
+    <cache_path>.npy, <cache_path>.labels.npy and <cache_path>.json.
+    Sample order is the same as torchvision.datasets.ImageFolder(root), so split_train_validation
+    with the same seed picks the same images. An existing cache for the same folder,
+    size and number of images is reused unless overwrite=True.
+    """
+    folder = torchvision.datasets.ImageFolder(root=root)
+    images_file, labels_file, meta_file = _cache_files(cache_path)
+
+    if not overwrite and os.path.exists(meta_file):
+        with open(meta_file) as f_in:
+            meta = json.load(f_in)
+        if meta == _cache_meta(root, folder, size):
+            return CachedImageDataset(cache_path)
+
+    # Same resize as transforms.Resize(size) on a PIL image (bilinear with antialiasing)
+    images = np.lib.format.open_memmap(images_file, mode='w+', dtype=np.uint8,
+                                       shape=(len(folder.samples), size[0], size[1], 3))
+    for i, (path, _) in enumerate(folder.samples):
+        with Image.open(path) as img:
+            images[i] = np.asarray(img.convert('RGB').resize((size[1], size[0]), Image.BILINEAR))
+    images.flush()
+    del images
+
+    np.save(labels_file, np.asarray(folder.targets, dtype=np.int64))
+    with open(meta_file, 'w') as f_out:
+        json.dump(_cache_meta(root, folder, size), f_out)
+
+    return CachedImageDataset(cache_path)
+
+
+def _cache_files(cache_path):
+    return f'{cache_path}.npy', f'{cache_path}.labels.npy', f'{cache_path}.json'
+
+
+def _cache_meta(root, folder, size):
+    return {'root': os.path.abspath(root), 'classes': folder.classes, 'size': list(size), 'count': len(folder.samples)}
+
+
+class CachedImageDataset(torch.utils.data.Dataset):
+    """
+    Dataset over a cache written by build_image_cache().
+
+    __getitem__ returns (uint8 tensor of shape (3, H, W), label) passed through `transform`,
+    so the transform must work on tensors (e.g. ConvertImageDtype instead of ToTensor).
+    The memory map is opened lazily in each worker, so it is never pickled/copied to workers.
+    """
+
+    def __init__(self, cache_path, transform=None):
+        self.cache_path = cache_path
+        self.transform = transform
+
+        images_file, labels_file, meta_file = _cache_files(cache_path)
+        self.targets = np.load(labels_file)
+        with open(meta_file) as f_in:
+            self.classes = json.load(f_in)['classes']
+        self._images = None
+
+    def __len__(self):
+        return len(self.targets)
+
+    def __getitem__(self, idx):
+        if self._images is None:
+            self._images = np.load(_cache_files(self.cache_path)[0], mmap_mode='r')
+
+        image = torch.from_numpy(np.array(self._images[idx])).permute(2, 0, 1)
+        if self.transform is not None:
+            image = self.transform(image)
+        return image, int(self.targets[idx])
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_images'] = None
+        return state
+
+
+# --- Transforms ---
+# The geometric augmentations run on uint8 images (PIL or uint8 tensors), which is cheaper than on
+# float tensors, and only afterwards the image is scaled to [0, 1] and normalized.
+
+augmentations = [
+    transforms.RandomRotation(50),
+    transforms.RandomResizedCrop(200, scale=(0.9, 1.0), ratio=(0.9, 1.1)),
+    transforms.RandomHorizontalFlip(),
+]
+
+to_normalized_tensor = [
+    transforms.ToImage(),                           # PIL -> uint8 tensor (C, H, W); tensors pass through
+    transforms.ToDtype(torch.float32, scale=True),  # uint8 [0, 255] -> float [0, 1], like ToTensor
+    transforms.Normalize(mean=IMAGENET_MEAN, std=IMAGENET_STD),
+]
+
+# ImageFolder (PIL images): resize, augment, normalize
+train_transforms = transforms.Compose([transforms.Resize(IMAGE_SIZE), *augmentations, *to_normalized_tensor])
+eval_transforms = transforms.Compose([transforms.Resize(IMAGE_SIZE), *to_normalized_tensor])
+
+# CachedImageDataset (uint8 tensors, already resized)
+cached_train_transforms = transforms.Compose([*augmentations, *to_normalized_tensor])
+cached_eval_transforms = transforms.Compose(to_normalized_tensor)
+
+# The original lesson-08 order (normalize first, then augment the float tensor), kept for comparison
+legacy_train_transforms = transforms.Compose([*to_normalized_tensor, *augmentations])
+
+
+def split_train_validation(train_dataset, eval_dataset, train_fraction=0.8, seed=42, splits=None):
+    """
+    Train / validation split of two views of the same images: the training subset uses the augmenting
+    dataset, the validation subset the deterministic one (same indices in both).
+
+    The indices are the 'shuffle' scheme of 02-regression/splits.py, keyed by the labels of the images
+    and cached by `splits` (a SplitManager, cache in ./.splits by default), so every run and
+    notebook session trains and validates on the same images.
+    """
+    splits = splits if splits is not None else SplitManager()
+    split = splits.split(np.asarray(train_dataset.targets), 'shuffle', seed=seed,
+                         val=round(1 - train_fraction, 10), test=0.0)
+    return (torch.utils.data.Subset(train_dataset, split['train'].tolist()),
+            torch.utils.data.Subset(eval_dataset, split['val'].tolist()))
+
+
+def transform_cost_ms(transform, images, repeats=3):
+    """
+    Average milliseconds per image for a transform pipeline (single-threaded).
+    """
+    transform(images[0])  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for image in images:
+            transform(image)
+    return (time.perf_counter() - start) * 1000 / (repeats * len(images))
+
+
+def images_per_second(loader, epochs=2):
+    """
+    Iterates the loader for a few epochs and returns images/sec for each epoch.
+    The first epoch includes worker start-up; later epochs show the steady state.
+    """
+    results = []
+    for _ in range(epochs):
+        start = time.perf_counter()
+        n_images = 0
+        for images, _ in loader:
+            n_images += images.size(0)
+        results.append(n_images / (time.perf_counter() - start))
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare images/sec of the lesson-08 data loading options')
+    parser.add_argument('--data', default='/content/data/train')
+    parser.add_argument('--cache', default='/content/data/train_cache')
+    parser.add_argument('--batch-size', type=int, default=20)
+    parser.add_argument('--epochs', type=int, default=2)
+    parser.add_argument('--workers', type=int, default=default_num_workers())
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    cached_dataset = build_image_cache(args.data, args.cache, overwrite=True)
+    print(f'Cache built in {time.perf_counter() - start:.1f}s ({len(cached_dataset)} images)')
+
+    sample = [cached_dataset[i][0] for i in range(min(100, len(cached_dataset)))]
+    for name, transform in [('legacy: normalize, then augment float', legacy_train_transforms),
+                            ('train: augment uint8, then normalize', cached_train_transforms),
+                            ('eval: normalize only', cached_eval_transforms)]:
+        print(f'{name:<55} {transform_cost_ms(transform, sample):6.3f} ms/image')
+
+    cached_dataset.transform = cached_train_transforms
+    folder_dataset = torchvision.datasets.ImageFolder(root=args.data, transform=train_transforms)
+
+    options = [
+        ('ImageFolder, num_workers=0 (lesson default)', folder_dataset, dict(num_workers=0)),
+        (f'ImageFolder, num_workers={args.workers}', folder_dataset,
+         dict(num_workers=args.workers, persistent_workers=False)),
+        (f'ImageFolder, num_workers={args.workers}, persistent', folder_dataset,
+         dict(num_workers=args.workers, persistent_workers=True)),
+        ('cache, num_workers=0', cached_dataset, dict(num_workers=0)),
+        (f'cache, num_workers={args.workers}, persistent', cached_dataset,
+         dict(num_workers=args.workers, persistent_workers=True)),
+    ]
+
+    for name, dataset, kwargs in options:
+        loader = make_loader(dataset, batch_size=args.batch_size, shuffle=True, **kwargs)
+        rates = images_per_second(loader, epochs=args.epochs)
+        print(f'{name:<55} ' + ', '.join(f'epoch {i + 1}: {rate:7.1f} img/s' for i, rate in enumerate(rates)))
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""Export a trained hairCNN checkpoint to ONNX and verify it (produces e.g. hair_classifier_v1.onnx for lesson 09).
+
+    python export_onnx.py checkpoint_test.pt --output hair_classifier_v1.onnx --data /content/data/test
+
+1. Export with a dynamic batch axis, a fixed opset and the 'input' / 'output' names used in lesson 09.
+   All weights go into the single .onnx file (no separate .onnx.data file to forget).
+2. onnx.checker (full check, including shape inference).
+3. ONNX Runtime graph optimization, saved as <output>.opt.onnx (extended level: portable across CPUs).
+4. Parity: ONNX Runtime vs PyTorch outputs on a sample batch (raises if they differ).
+5. ORT CPU latency at batch sizes 1/8/32, written with the other results to <output>.json.
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import torch
+
+from hair_model import VARIANTS, hairCNN
+
+INPUT_SHAPE = (3, 200, 200)
+OPSET = 20
+BATCH_SIZES = (1, 8, 32)
+
+
+def load_checkpoint(path, variant='homework'):
+    """
+    Builds hairCNN from a plain state_dict (torch.save(model.state_dict())) or a trainer.py checkpoint.
+    """
+    state = torch.load(path, map_location='cpu')
+    if 'model' in state and isinstance(state['model'], dict):
+        state = state['model']
+    # torch.compile'd models prefix their parameter names
+    state = {k.removeprefix('_orig_mod.'): v for k, v in state.items()}
+
+    model = hairCNN(num_classes=2, variant=variant)
+    model.load_state_dict(state)
+    return model.eval()
+
+
+def export_onnx(model, output_file, opset=OPSET):
+    model.eval()
+    example = torch.zeros(1, *INPUT_SHAPE)
+    torch.onnx.export(
+        model,
+        (example,),
+        output_file,
+        input_names=['input'],
+        output_names=['output'],
+        opset_version=opset,
+        dynamic_shapes={'x': {0: torch.export.Dim('batch')}},
+        external_data=False,
+        verbose=False,
+    )
+    return output_file
+
+
+def check_onnx(output_file):
+    import onnx
+
+    onnx.checker.check_model(output_file, full_check=True)
+    model = onnx.load(output_file)
+    batch_dim = model.graph.input[0].type.tensor_type.shape.dim[0]
+    if not batch_dim.dim_param:
+        raise ValueError(f'{output_file}: batch axis is not dynamic')
+    return {'opset': model.opset_import[0].version, 'batch_dim': batch_dim.dim_param}
+
+
+def optimize_onnx(output_file, optimized_file, threads=1):
+    """
+    Lets ONNX Runtime fold constants / fuse Conv+ReLU etc. and saves the optimized graph.
+    Returns a session on the optimized model.
+    """
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+    options.optimized_model_filepath = optimized_file
+    ort.InferenceSession(output_file, options, providers=['CPUExecutionProvider'])
+
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = threads
+    options.inter_op_num_threads = 1
+    return ort.InferenceSession(optimized_file, options, providers=['CPUExecutionProvider'])
+
+
+def sample_batch(data=None, batch_size=16, seed=42):
+    if data is None:
+        return torch.randn(batch_size, *INPUT_SHAPE, generator=torch.Generator().manual_seed(seed))
+
+    import torchvision
+    from data_pipeline import eval_transforms
+
+    dataset = torchvision.datasets.ImageFolder(root=data, transform=eval_transforms)
+    indices = torch.randperm(len(dataset), generator=torch.Generator().manual_seed(seed))[:batch_size]
+    return torch.stack([dataset[int(i)][0] for i in indices])
+
+
+def check_parity(model, session, x, atol=1e-4):
+    """
+    Raises if ONNX Runtime and PyTorch disagree on the logits of the batch.
+    """
+    with torch.no_grad():
+        expected = model(x).numpy()
+    actual = session.run(['output'], {'input': x.numpy()})[0]
+    max_diff = float(np.max(np.abs(expected - actual)))
+    if max_diff > atol:
+        raise ValueError(f'ONNX model differs from PyTorch: max |diff| = {max_diff:.2e} > {atol:.0e}')
+    if not np.array_equal(expected > 0, actual > 0):
+        raise ValueError('ONNX model predicts a different class than PyTorch')
+    return max_diff
+
+
+def ort_latency_ms(session, batch_size, repeats=50):
+    x = np.random.default_rng(0).standard_normal((batch_size, *INPUT_SHAPE)).astype(np.float32)
+    for _ in range(5):
+        session.run(['output'], {'input': x})
+
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        session.run(['output'], {'input': x})
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        'p50_ms': round(float(np.percentile(timings, 50)), 3),
+        'p95_ms': round(float(np.percentile(timings, 95)), 3),
+        'per_image_ms': round(float(np.percentile(timings, 50)) / batch_size, 3),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Export a hairCNN checkpoint to ONNX and verify it')
+    parser.add_argument('checkpoint')
+    parser.add_argument('--variant', default='homework', choices=VARIANTS)
+    parser.add_argument('--output', default='hair_classifier_v1.onnx')
+    parser.add_argument('--opset', type=int, default=OPSET)
+    parser.add_argument('--data', default=None, help='ImageFolder for the parity batch (default: random inputs)')
+    parser.add_argument('--threads', type=int, default=1, help='ORT intra-op threads for the latency measurement')
+    args = parser.parse_args()
+
+    model = load_checkpoint(args.checkpoint, args.variant)
+
+    export_onnx(model, args.output, args.opset)
+    report = {'model': args.output, 'variant': args.variant, 'size_mb': round(os.path.getsize(args.output) / 1024 ** 2, 2)}
+    report.update(check_onnx(args.output))
+
+    optimized_file = args.output.removesuffix('.onnx') + '.opt.onnx'
+    session = optimize_onnx(args.output, optimized_file, args.threads)
+    report['optimized_model'] = optimized_file
+
+    report['parity_max_abs_diff'] = check_parity(model, session, sample_batch(args.data))
+    report['threads'] = args.threads
+    report['latency'] = {str(batch_size): ort_latency_ms(session, batch_size) for batch_size in BATCH_SIZES}
+
+    with open(args.output.removesuffix('.onnx') + '.json', 'w') as f_out:
+        json.dump(report, f_out, indent=2)
+    print(json.dumps(report, indent=2))
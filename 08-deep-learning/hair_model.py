@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""hairCNN model for the straight/curly hair classifier (lesson 08).
+
+Two architecture variants:
+
+* 'homework': the structure required by the homework
+  Conv2d(3 -> 32, 3x3) -> ReLU -> MaxPool(2) -> Flatten -> Linear(313632 -> 64) -> ReLU -> Linear(64 -> 1)
+  The flattened 32 x 99 x 99 feature map makes fc1 ~20M parameters (~80 MB), nearly the whole model.
+
+* 'gap': a compact variant for serving
+  3 x [Conv2d(3x3) -> ReLU -> MaxPool(2)] with a strided first conv -> global average pooling -> Linear -> Linear
+  Global average pooling turns the last feature map into one value per channel, so the classifier
+  only sees `channels[-1]` inputs instead of 313632.
+"""
+
+import torch
+import torch.nn as nn
+
+VARIANTS = ('homework', 'gap')
+
+
+# Create CNN
+class hairCNN(nn.Module):
+    # Determine what layers and their order in CNN object
+    def __init__(self, num_classes=2, variant='homework', channels=(16, 32, 64), hidden=64):
+        super(hairCNN, self).__init__()
+        if variant not in VARIANTS:
+            raise ValueError(f"Unknown variant {variant!r}, expected one of {VARIANTS}")
+
+        self.num_classes = num_classes
+        self.variant = variant
+        self.relu = nn.ReLU()
+
+        # Resize (pooling)
+        self.pool = nn.MaxPool2d(kernel_size=2, stride=2)
+
+        if variant == 'homework':
+            # FEATURE EXTRACTION
+            # Input layer
+            self.conv1 = nn.Conv2d(in_channels=3, out_channels=32, kernel_size=3)
+
+            # CLASSIFICATION
+            # Hidden layer
+            self.fc1 = nn.Linear(in_features=313632, out_features=hidden)
+        else:
+            # FEATURE EXTRACTION
+            # The strided first conv halves the 200x200 input right away (otherwise the most expensive layer)
+            in_channels = [3, *channels[:-1]]
+            self.convs = nn.ModuleList([
+                nn.Conv2d(in_channels=c_in, out_channels=c_out, kernel_size=3, stride=2 if i == 0 else 1, padding=1)
+                for i, (c_in, c_out) in enumerate(zip(in_channels, channels))
+            ])
+            self.gap = nn.AdaptiveAvgPool2d(1)
+
+            # CLASSIFICATION
+            # Hidden layer
+            self.fc1 = nn.Linear(in_features=channels[-1], out_features=hidden)
+
+        # Output Linear Layer
+        self.fc2 = nn.Linear(in_features=hidden, out_features=1)
+
+        # 5. Output Activation
+        # "Use the appropriate activation for the binary classification case"
+        # We use nn.BCEWithLogitsLoss(), so the model returns logits and there is no self.sigmoid here
+
+    # Progresses data across layers
+    def forward(self, x):
+        # --- Feature Extraction ---
+        if self.variant == 'homework':
+            x = self.conv1(x)
+            x = self.relu(x)
+            x = self.pool(x)
+        else:
+            for conv in self.convs:
+                x = self.pool(self.relu(conv(x)))
+            x = self.gap(x)
+
+        # --- Flattening ---
+        # "Turn the multi-dimensional result into vectors"
+        x = x.view(x.size(0), -1)
+
+        # --- Classification ---
+        x = self.fc1(x)
+        x = self.relu(x)  # ReLU for the hidden layer
+
+        x = self.fc2(x)
+        return x
+
+
+def count_parameters(model):
+    return sum(p.numel() for p in model.parameters())
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""Training loop for the hair CNN (lesson 08).
+
+* Trainer.fit(): train/evaluate loop shared by both training runs of the lesson.
+  Loss and accuracy are accumulated as tensors on the device and read back ONCE per epoch
+  (no `.item()` per batch, which forces a GPU -> CPU sync every step).
+* amp=True: bfloat16 autocast (works on CPU and recent GPUs, no GradScaler needed).
+* compile=True: opt-in torch.compile of the model.
+* Callbacks: ProgressPrinter, HistoryFile (per-epoch JSON log), ModelCheckpoint (resume with fit(resume_from=...)).
+
+Every epoch also logs throughput (train images/sec), time spent waiting for the DataLoader vs
+computing, and peak memory (CUDA allocator peak on GPU, process max RSS on CPU).
+"""
+
+import json
+import os
+import time
+
+import torch
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# --- Callbacks ---
+
+class Callback:
+    """
+    Base class; override any of the hooks. `logs` is the dict of metrics of the finished epoch.
+    """
+
+    def on_fit_begin(self, trainer):
+        pass
+
+    def on_epoch_end(self, trainer, epoch, logs):
+        pass
+
+    def on_fit_end(self, trainer):
+        pass
+
+
+class ProgressPrinter(Callback):
+    """
+    One line per epoch in the format the lesson used before.
+    """
+
+    def on_epoch_end(self, trainer, epoch, logs):
+        eval_name = trainer.eval_name.capitalize()
+        print(f"Epoch {epoch + 1}/{trainer.epochs}, "
+              f"Loss: {logs['loss']:.4f}, Acc: {logs['acc']:.4f}, "
+              f"{eval_name} Loss: {logs[f'{trainer.eval_name}_loss']:.4f}, "
+              f"{eval_name} Acc: {logs[f'{trainer.eval_name}_acc']:.4f}, "
+              f"Time: {logs['epoch_time']:.1f}s "
+              f"({logs['images_per_s']:.0f} img/s, data wait {logs['data_wait_s']:.1f}s, "
+              f"peak mem {logs['peak_memory_mb']:.0f} MB)")
+
+
+class HistoryFile(Callback):
+    """
+    Rewrites `path` after every epoch with the list of per-epoch logs (JSON), so it can be read during training.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def on_epoch_end(self, trainer, epoch, logs):
+        records = [dict(zip(trainer.history, values)) for values in zip(*trainer.history.values())]
+        with open(self.path, 'w') as f_out:
+            json.dump(records, f_out, indent=2)
+
+
+class ModelCheckpoint(Callback):
+    """
+    Saves model, optimizer, epoch and history every `every` epochs (and after the last one).
+    """
+
+    def __init__(self, path, every=1):
+        self.path = path
+        self.every = every
+
+    def on_epoch_end(self, trainer, epoch, logs):
+        if (epoch + 1) % self.every == 0 or epoch + 1 == trainer.epochs:
+            trainer.save_checkpoint(self.path, epoch + 1)
+
+
+# --- Trainer ---
+
+def peak_memory_mb(device):
+    if device.type == 'cuda':
+        return torch.cuda.max_memory_allocated(device) / 1024 ** 2
+    if resource is not None:
+        # ru_maxrss is in KB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return float('nan')
+
+
+class Trainer:
+    """
+    Binary classifier training with BCEWithLogitsLoss-style criteria (model returns one logit per image).
+
+    Args:
+        model, optimizer, criterion: as in the lesson.
+        device: torch.device the model lives on; batches are moved there.
+        callbacks (list): Callback objects, called in order at the end of every epoch.
+        amp (bool): bfloat16 autocast for forward passes.
+        compile (bool): wrap the model with torch.compile (first epoch includes compilation time).
+    """
+
+    def __init__(self, model, optimizer, criterion, device, callbacks=None, amp=False, compile=False):
+        self.model = model
+        self.optimizer = optimizer
+        self.criterion = criterion
+        self.device = torch.device(device)
+        self.callbacks = list(callbacks or [])
+        self.amp = amp
+        self.compiled_model = torch.compile(model) if compile else model
+
+        self.history = {}
+        self.epochs = 0
+        self.eval_name = 'val'
+
+    def _autocast(self):
+        return torch.autocast(device_type=self.device.type, dtype=torch.bfloat16, enabled=self.amp)
+
+    def _step_metrics(self, outputs, labels, loss, totals):
+        # Everything stays on the device; `totals` is [loss * n, correct]
+        totals[0] += loss.detach().float() * labels.size(0)
+        totals[1] += ((outputs.detach() > 0).float() == labels).sum()
+
+    def train_epoch(self, loader):
+        self.model.train()
+        totals = torch.zeros(2, device=self.device)
+        n_images = 0
+        data_wait = 0.0
+
+        start = time.perf_counter()
+        fetch_start = start
+        for images, labels in loader:
+            data_wait += time.perf_counter() - fetch_start
+
+            images = images.to(self.device, non_blocking=True)
+            labels = labels.to(self.device, non_blocking=True).float().unsqueeze(1)
+
+            self.optimizer.zero_grad()
+            with self._autocast():
+                outputs = self.compiled_model(images)
+                loss = self.criterion(outputs.float(), labels)
+            loss.backward()
+            self.optimizer.step()
+
+            self._step_metrics(outputs, labels, loss, totals)
+            n_images += labels.size(0)
+            fetch_start = time.perf_counter()
+
+        loss_sum, correct = totals.tolist()  # the only sync of the epoch
+        elapsed = time.perf_counter() - start
+        return {
+            'loss': loss_sum / n_images,
+            'acc': correct / n_images,
+            'images_per_s': n_images / elapsed,
+            'data_wait_s': data_wait,
+            'compute_s': elapsed - data_wait,
+        }
+
+    def evaluate(self, loader):
+        self.model.eval()
+        totals = torch.zeros(2, device=self.device)
+        n_images = 0
+        with torch.no_grad(), self._autocast():
+            for images, labels in loader:
+                images = images.to(self.device, non_blocking=True)
+                labels = labels.to(self.device, non_blocking=True).float().unsqueeze(1)
+
+                outputs = self.compiled_model(images)
+                loss = self.criterion(outputs.float(), labels)
+
+                self._step_metrics(outputs, labels, loss, totals)
+                n_images += labels.size(0)
+
+        loss_sum, correct = totals.tolist()
+        return {'loss': loss_sum / n_images, 'acc': correct / n_images}
+
+    def fit(self, train_loader, eval_loader, epochs, eval_name='val', resume_from=None):
+        """
+        Trains for `epochs` epochs, evaluating on `eval_loader` after each one.
+
+        Returns:
+            dict: History with one list per metric ('loss', 'acc', '<eval_name>_loss', '<eval_name>_acc',
+                'epoch_time', 'images_per_s', 'data_wait_s', 'compute_s', 'peak_memory_mb').
+        """
+        self.epochs = epochs
+        self.eval_name = eval_name
+        self.history = {}
+        start_epoch = 0
+        if resume_from is not None and os.path.exists(resume_from):
+            start_epoch = self.load_checkpoint(resume_from)
+
+        for callback in self.callbacks:
+            callback.on_fit_begin(self)
+
+        for epoch in range(start_epoch, epochs):
+            if self.device.type == 'cuda':
+                torch.cuda.reset_peak_memory_stats(self.device)
+            epoch_start = time.perf_counter()
+
+            logs = self.train_epoch(train_loader)
+            eval_logs = self.evaluate(eval_loader)
+            logs[f'{eval_name}_loss'] = eval_logs['loss']
+            logs[f'{eval_name}_acc'] = eval_logs['acc']
+            logs['epoch_time'] = time.perf_counter() - epoch_start
+            logs['peak_memory_mb'] = peak_memory_mb(self.device)
+
+            for key, value in logs.items():
+                self.history.setdefault(key, []).append(value)
+            for callback in self.callbacks:
+                callback.on_epoch_end(self, epoch, logs)
+
+        for callback in self.callbacks:
+            callback.on_fit_end(self)
+        return self.history
+
+    def save_checkpoint(self, path, epoch):
+        torch.save({
+            'epoch': epoch,
+            'model': self.model.state_dict(),
+            'optimizer': self.optimizer.state_dict(),
+            'history': self.history,
+        }, path)
+
+    def load_checkpoint(self, path):
+        """
+        Restores model, optimizer and history; returns the number of finished epochs.
+        """
+        checkpoint = torch.load(path, map_location=self.device)
+        self.model.load_state_dict(checkpoint['model'])
+        self.optimizer.load_state_dict(checkpoint['optimizer'])
+        self.history = checkpoint['history']
+        return checkpoint['epoch']
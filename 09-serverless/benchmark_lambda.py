@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""Cold-init vs warm-invoke time of the hair classifier Lambda (lesson-09.py).
+
+Against the Lambda runtime interface emulator (RIE) bundled in the AWS base image:
+
+    docker build -t hair-lambda .
+    python benchmark_lambda.py --image hair-lambda
+
+Each cold run starts a fresh container and times the first invocation (container start + init phase
++ invoke); the following invocations of the same container are warm. Without Docker, --local measures
+the same split in-process: import time of the handler module (init) vs repeated handler calls.
+"""
+
+import argparse
+import base64
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import time
+from urllib import request
+
+import numpy as np
+
+RIE_PATH = '/2015-03-31/functions/function/invocations'
+SAMPLE_IMAGE = 'yf_dokzqy3vcritme8ggnzqlvwa.jpeg'
+
+
+def payload(batch_size):
+    with open(SAMPLE_IMAGE, 'rb') as f_in:
+        image = base64.b64encode(f_in.read()).decode('ascii')
+    if batch_size == 1:
+        return {'image': image}
+    return {'images': [image] * batch_size}
+
+
+def invoke(url, event, timeout=60):
+    data = json.dumps(event).encode('utf-8')
+    req = request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+    with request.urlopen(req, timeout=timeout) as resp:
+        return json.loads(resp.read())
+
+
+def summary(timings):
+    return f'p50 {np.percentile(timings, 50):8.1f} ms, p95 {np.percentile(timings, 95):8.1f} ms'
+
+
+def bench_rie(image, port, cold_runs, warm_invokes, batch_sizes):
+    url = f'http://localhost:{port}{RIE_PATH}'
+    cold, init, warm = [], [], {batch_size: [] for batch_size in batch_sizes}
+
+    for _ in range(cold_runs):
+        start = time.perf_counter()
+        container = subprocess.run(['docker', 'run', '--rm', '-d', '-p', f'{port}:8080', image],
+                                   check=True, capture_output=True, text=True).stdout.strip()
+        try:
+            # The RIE accepts connections only once it is up; retry until the first invocation succeeds
+            while True:
+                try:
+                    result = invoke(url, payload(1))
+                    break
+                except OSError:
+                    time.sleep(0.05)
+            cold.append((time.perf_counter() - start) * 1000)
+            init.append(result.get('init_ms', float('nan')))
+
+            for batch_size in batch_sizes:
+                event = payload(batch_size)
+                for _ in range(warm_invokes):
+                    start = time.perf_counter()
+                    invoke(url, event)
+                    warm[batch_size].append((time.perf_counter() - start) * 1000)
+        finally:
+            subprocess.run(['docker', 'stop', container], capture_output=True)
+
+    print(f'cold: container start -> first response       {summary(cold)}')
+    print(f'      of which init phase (session load)       {summary(init)}')
+    for batch_size, timings in warm.items():
+        print(f'warm: invoke, batch {batch_size:<3}                     {summary(timings)}')
+
+
+def load_handler():
+    spec = importlib.util.spec_from_file_location('lambda_function', 'lesson-09.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def bench_local(cold_runs, warm_invokes, batch_sizes):
+    # Cold: a fresh interpreter per run, so imports and the session load are really paid again
+    code = ('import time; start = time.perf_counter(); import benchmark_lambda as b; m = b.load_handler(); '
+            'init = (time.perf_counter() - start) * 1000; start = time.perf_counter(); '
+            'm.lambda_handler(b.payload(1), None); print(init, (time.perf_counter() - start) * 1000)')
+    init, first = [], []
+    for _ in range(cold_runs):
+        out = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout
+        init_ms, first_ms = map(float, out.split())
+        init.append(init_ms)
+        first.append(first_ms)
+
+    module = load_handler()
+    print(f'cold: imports + init phase                     {summary(init)}')
+    print(f'cold: first invoke                             {summary(first)}')
+    for batch_size in batch_sizes:
+        event = payload(batch_size)
+        module.lambda_handler(event, None)
+        timings = []
+        for _ in range(warm_invokes):
+            start = time.perf_counter()
+            module.lambda_handler(event, None)
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f'warm: invoke, batch {batch_size:<3}                     {summary(timings)}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Cold vs warm latency of the hair classifier Lambda')
+    parser.add_argument('--image', default='hair-lambda', help='Docker image built from this folder')
+    parser.add_argument('--port', type=int, default=9000)
+    parser.add_argument('--local', action='store_true', help='measure in-process instead of the RIE container')
+    parser.add_argument('--cold-runs', type=int, default=5)
+    parser.add_argument('--warm-invokes', type=int, default=50)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 8])
+    args = parser.parse_args()
+
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    if args.local:
+        bench_local(args.cold_runs, args.warm_invokes, args.batch_sizes)
+    else:
+        bench_rie(args.image, args.port, args.cold_runs, args.warm_invokes, args.batch_sizes)
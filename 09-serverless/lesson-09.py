@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""AWS Lambda handler for the hair classifier (hair_classifier_v1.onnx).
+
+Everything expensive happens once per container, at import time (the Lambda "init" phase):
+the ONNX Runtime session, its input/output names and the normalization constants.
+An invocation only downloads/decodes the images, preprocesses them with Pillow + NumPy and runs one batch.
+
+Payloads (direct invoke or an API Gateway proxy event with the same JSON in "body"):
+    {"url": "https://..."}                    single image
+    {"image": "<base64 jpeg/png>"}            single image
+    {"urls": [...]} / {"images": [...]}       batch, one session.run for all images
+
+Response for a single image:
+    {"prediction": <logit>, "probability": <P(straight)>, "label": "straight", "cold_start": true}
+For a batch: {"predictions": [...], "cold_start": ...}
+
+The Docker image copies this file to lambda_function.py (handler: lambda_function.lambda_handler).
+"""
+
+import base64
+import json
+import os
+import time
+from io import BytesIO
+from urllib import request
+
+import numpy as np
+import onnxruntime as ort
+from PIL import Image
+
+_init_start = time.perf_counter()
+
+MODEL_PATH = os.getenv('MODEL_PATH', 'hair_classifier_v1.onnx')
+TARGET_SIZE = (200, 200)
+CLASSES = ['curly', 'straight']  # ImageFolder order used in training; the logit is for 'straight'
+
+# (x / 255 - mean) / std  ==  x * scale - offset, precomputed in float32 (no float64 temporaries)
+MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+SCALE = (1.0 / (255.0 * STD)).astype(np.float32)
+OFFSET = (MEAN / STD).astype(np.float32)
+
+session = ort.InferenceSession(MODEL_PATH, providers=['CPUExecutionProvider'])
+input_name = session.get_inputs()[0].name
+output_name = session.get_outputs()[0].name
+
+INIT_MS = (time.perf_counter() - _init_start) * 1000
+_cold_start = True
+
+
+def load_image(url=None, image_b64=None):
+    if url is not None:
+        with request.urlopen(url) as resp:
+            buffer = resp.read()
+    else:
+        buffer = base64.b64decode(image_b64)
+    return Image.open(BytesIO(buffer))
+
+
+def preprocess(img):
+    # Same steps as the training transforms: RGB, bilinear resize to 200x200, ImageNet normalization
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    img = img.resize(TARGET_SIZE, Image.BILINEAR)
+
+    x = np.asarray(img, dtype=np.float32)
+    x = x * SCALE - OFFSET
+    return x.transpose(2, 0, 1)
+
+
+def predict(images):
+    X = np.stack([preprocess(img) for img in images])
+    logits = session.run([output_name], {input_name: X})[0][:, 0]
+    probabilities = 1.0 / (1.0 + np.exp(-logits))
+
+    return [
+        {
+            'prediction': float(logit),
+            'probability': float(probability),
+            'label': CLASSES[int(probability > 0.5)],
+        }
+        for logit, probability in zip(logits, probabilities)
+    ]
+
+
+def parse_event(event):
+    # API Gateway / function URL proxy events carry the JSON payload as a string in "body"
+    if isinstance(event, dict) and 'body' in event:
+        body = event['body']
+        if event.get('isBase64Encoded'):
+            body = base64.b64decode(body)
+        event = json.loads(body)
+    return event
+
+
+def lambda_handler(event, context):
+    global _cold_start
+    cold_start, _cold_start = _cold_start, False
+
+    event = parse_event(event)
+
+    if 'url' in event or 'image' in event:
+        result = predict([load_image(event.get('url'), event.get('image'))])[0]
+    else:
+        images = [load_image(url=url) for url in event.get('urls', [])]
+        images += [load_image(image_b64=image) for image in event.get('images', [])]
+        if not images:
+            raise ValueError("Expected 'url', 'image', 'urls' or 'images' in the event")
+        result = {'predictions': predict(images)}
+
+    result['cold_start'] = cold_start
+    if cold_start:
+        result['init_ms'] = INIT_MS
+    return result
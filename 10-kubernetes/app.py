@@ -1,46 +1,19 @@
-import numpy as np
-import onnxruntime as ort
-from keras_image_helper import create_preprocessor
-from fastapi import FastAPI
+import os
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel, HttpUrl
 import uvicorn
 
+from registry import ModelRegistry
+
 app = FastAPI(title="clothing-classifier")
 
-def preprocess_pytorch_style(X):
-    X = X / 255.0
-    
-    mean = np.array([0.485, 0.456, 0.406]).reshape(1, 3, 1, 1)
-    std = np.array([0.229, 0.224, 0.225]).reshape(1, 3, 1, 1)
-    
-    X = X.transpose(0, 3, 1, 2)
-    X = (X - mean) / std
-    
-    return X.astype(np.float32)
-
-preprocessor = create_preprocessor(
-    preprocess_pytorch_style,
-    target_size=(224, 224)
-)
-
-session = ort.InferenceSession(
-    "clothing-model.onnx", providers=["CPUExecutionProvider"]
-)
-input_name = session.get_inputs()[0].name
-output_name = session.get_outputs()[0].name
-
-classes = [
-    "dress",
-    "hat",
-    "longsleeve",
-    "outwear",
-    "pants",
-    "shirt",
-    "shoes",
-    "shorts",
-    "skirt",
-    "t-shirt",
-]
+# Models, their preprocessing and the memory budget are described in models.json (see registry.py)
+registry = ModelRegistry(os.getenv("MODELS_MANIFEST", "models.json"))
+registry.preload()
+# Replaced model files are picked up without a restart (MODEL_RELOAD_INTERVAL seconds, 0 = off)
+registry.start_watcher()
 
 
 class PredictRequest(BaseModel):
@@ -51,18 +24,17 @@ class PredictResponse(BaseModel):
     predictions: dict[str, float]
     top_class: str
     top_probability: float
+    model_version: str
 
 
-def predict(url: str):
-    X = preprocessor.from_url(url)
-    result = session.run([output_name], {input_name: X})
-    float_predictions = result[0][0].tolist()
-    predictions_dict = dict(zip(classes, float_predictions))
+def predict(url: str, model_name: str = None):
+    with registry.use(model_name or registry.default_model) as model:
+        predictions_dict = model.predict_url(url)
     
     top_class = max(predictions_dict, key=predictions_dict.get)
     top_probability = predictions_dict[top_class]
     
-    return predictions_dict, top_class, top_probability
+    return predictions_dict, top_class, top_probability, model.version
 
 
 @app.get("/")
@@ -77,12 +49,40 @@ def health():
 
 @app.post("/predict", response_model=PredictResponse)
 def predict_endpoint(request: PredictRequest):
-    predictions, top_class, top_prob = predict(str(request.url))
+    predictions, top_class, top_prob, version = predict(str(request.url))
     
     return PredictResponse(
         predictions=predictions,
         top_class=top_class,
-        top_probability=top_prob
+        top_probability=top_prob,
+        model_version=version
+    )
+
+
+@app.get("/models")
+def list_models():
+    return registry.status()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return registry.metrics()
+
+
+@app.post("/models/{name}/predict", response_model=PredictResponse)
+def model_predict_endpoint(name: str, request: PredictRequest):
+    if name not in registry:
+        raise HTTPException(status_code=404, detail=f"Unknown model '{name}'")
+    try:
+        predictions, top_class, top_prob, version = predict(str(request.url), name)
+    except FileNotFoundError:
+        raise HTTPException(status_code=503, detail=f"Model file for '{name}' is not available")
+
+    return PredictResponse(
+        predictions=predictions,
+        top_class=top_class,
+        top_probability=top_prob,
+        model_version=version
     )
 
 
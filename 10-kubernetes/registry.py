@@ -0,0 +1,402 @@
+import hashlib
+import json
+import mmap
+import os
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from contextlib import contextmanager
+from io import BytesIO
+from typing import Literal
+from urllib import request
+
+import numpy as np
+import onnxruntime as ort
+from PIL import Image
+from pydantic import BaseModel
+
+
+RESAMPLE = {
+    "nearest": Image.NEAREST,
+    "bilinear": Image.BILINEAR,
+    "bicubic": Image.BICUBIC,
+}
+
+
+class ModelSpec(BaseModel):
+    """One entry of models.json: the ONNX file and how to prepare its input / read its output."""
+
+    path: str
+    target_size: tuple[int, int]
+    resample: Literal["nearest", "bilinear", "bicubic"] = "nearest"
+    mean: tuple[float, float, float] = (0.485, 0.456, 0.406)
+    std: tuple[float, float, float] = (0.229, 0.224, 0.225)
+    classes: list[str]
+    # raw: one score per class as returned by the model
+    # softmax: one logit per class -> probabilities
+    # sigmoid: a single logit for classes[1] (binary classifier trained with BCEWithLogitsLoss)
+    output: Literal["raw", "softmax", "sigmoid"] = "raw"
+    preload: bool = False
+
+
+class Manifest(BaseModel):
+    default_model: str
+    memory_budget_mb: float = 256
+    intra_op_threads: int = 1
+    inter_op_threads: int = 1
+    models: dict[str, ModelSpec]
+
+
+# Seconds between checks of the loaded model files (0 disables hot reload)
+RELOAD_INTERVAL = float(os.getenv("MODEL_RELOAD_INTERVAL", "10"))
+# How long a replaced session may keep serving in-flight requests
+DRAIN_TIMEOUT = 30.0
+
+_thread_pool_configured = False
+
+
+def configure_thread_pool(intra_op_threads, inter_op_threads):
+    """
+    Creates ONE ONNX Runtime thread pool in the process-wide environment (OrtEnv), shared by all
+    sessions instead of one pool per model, through onnxruntime.set_global_thread_pool_sizes.
+    Must run before the first InferenceSession. Returns False where that function isn't exported
+    or the environment already exists; sessions then get their own pools of the same size.
+    """
+    global _thread_pool_configured
+    if _thread_pool_configured:
+        return True
+
+    set_sizes = getattr(ort, "set_global_thread_pool_sizes", None)
+    if set_sizes is None:
+        return False
+    try:
+        set_sizes(intra_op_threads, inter_op_threads)
+    except Exception:
+        traceback.print_exc()
+        return False
+
+    _thread_pool_configured = True
+    return True
+
+
+def file_version(path):
+    """Short content hash of the model file, identical on every pod serving the same artifact."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f_in:
+        for block in iter(lambda: f_in.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+def _read_varint(buf, pos):
+    result = shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+def _length_fields(buf, start, end):
+    """Yields (field number, start, end) of the length-delimited fields of one protobuf message."""
+    pos = start
+    while pos < end:
+        tag, pos = _read_varint(buf, pos)
+        field, wire_type = tag >> 3, tag & 7
+        if wire_type == 0:
+            _, pos = _read_varint(buf, pos)
+        elif wire_type == 1:
+            pos += 8
+        elif wire_type == 5:
+            pos += 4
+        elif wire_type == 2:
+            length, pos = _read_varint(buf, pos)
+            yield field, pos, pos + length
+            pos += length
+        else:
+            raise ValueError(f"unsupported protobuf wire type {wire_type}")
+
+
+def external_data_files(path):
+    """
+    Files holding the weights of an ONNX model saved with external data (e.g. model.onnx.data).
+
+    Walks ModelProto.graph (7) -> GraphProto.initializer (5) -> TensorProto.external_data (13)
+    and collects the "location" entries, without the onnx package. Tensor payloads are skipped, not read.
+    """
+    locations = set()
+    with open(path, "rb") as f_in, mmap.mmap(f_in.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        for field, start, end in _length_fields(buf, 0, len(buf)):
+            if field != 7:
+                continue
+            for g_field, g_start, g_end in _length_fields(buf, start, end):
+                if g_field != 5:
+                    continue
+                for t_field, t_start, t_end in _length_fields(buf, g_start, g_end):
+                    if t_field != 13:
+                        continue
+                    entry = {k: bytes(buf[s:e]).decode() for k, s, e in _length_fields(buf, t_start, t_end)}
+                    if entry.get(1) == "location":
+                        locations.add(entry.get(2, ""))
+    base = os.path.dirname(os.path.abspath(path))
+    return sorted(os.path.join(base, location) for location in locations)
+
+
+def model_size_mb(path):
+    """On-disk size of an ONNX model including its external data files."""
+    return sum(os.path.getsize(p) for p in [path, *external_data_files(path)]) / 1024 ** 2
+
+
+def file_stat(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def download_image(url):
+    with request.urlopen(url) as resp:
+        buffer = resp.read()
+    return Image.open(BytesIO(buffer))
+
+
+def prepare_image(img, spec: ModelSpec):
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    img = img.resize(tuple(spec.target_size), RESAMPLE[spec.resample])
+
+    x = np.asarray(img, dtype=np.float32) / 255.0
+    x = (x - np.asarray(spec.mean, dtype=np.float32)) / np.asarray(spec.std, dtype=np.float32)
+    return x.transpose(2, 0, 1)
+
+
+class LoadedModel:
+    def __init__(self, name, spec: ModelSpec, session_options):
+        self.name = name
+        self.spec = spec
+        if not os.path.exists(spec.path):
+            raise FileNotFoundError(spec.path)
+        self.stat = file_stat(spec.path)
+        self.version = file_version(spec.path)
+        self.session = ort.InferenceSession(
+            spec.path, session_options, providers=["CPUExecutionProvider"]
+        )
+        self.input_name = self.session.get_inputs()[0].name
+        self.output_name = self.session.get_outputs()[0].name
+        # The weights dominate a session's memory, so their size on disk is its cost in the budget;
+        # models exported with external data keep them in a .onnx.data file next to a tiny .onnx
+        self.size_mb = model_size_mb(spec.path)
+        self.loaded_at = time.time()
+
+        self.in_flight = 0
+        self._idle = threading.Condition()
+
+    def warmup(self):
+        # First run allocates buffers and picks kernels; do it before the session gets traffic
+        width, height = self.spec.target_size  # PIL order
+        X = np.zeros((1, 3, height, width), dtype=np.float32)
+        self.session.run([self.output_name], {self.input_name: X})
+
+    def enter(self):
+        with self._idle:
+            self.in_flight += 1
+
+    def exit(self):
+        with self._idle:
+            self.in_flight -= 1
+            if self.in_flight == 0:
+                self._idle.notify_all()
+
+    def drain(self, timeout=DRAIN_TIMEOUT):
+        with self._idle:
+            return self._idle.wait_for(lambda: self.in_flight == 0, timeout=timeout)
+
+    def drain_in_background(self, timeout=DRAIN_TIMEOUT):
+        """Waits for the in-flight requests on a separate thread, so the caller can go on with other reloads."""
+
+        def wait():
+            if not self.drain(timeout):
+                print(f"Model {self.name} {self.version} still had {self.in_flight} requests after {timeout:.0f}s")
+
+        thread = threading.Thread(target=wait, name=f"drain-{self.name}", daemon=True)
+        thread.start()
+        return thread
+
+    def predict(self, images):
+        X = np.stack([prepare_image(img, self.spec) for img in images])
+        scores = self.session.run([self.output_name], {self.input_name: X})[0]
+
+        if self.spec.output == "sigmoid":
+            positive = 1.0 / (1.0 + np.exp(-scores[:, 0]))
+            scores = np.stack([1.0 - positive, positive], axis=1)
+        elif self.spec.output == "softmax":
+            scores = np.exp(scores - scores.max(axis=1, keepdims=True))
+            scores = scores / scores.sum(axis=1, keepdims=True)
+
+        return [dict(zip(self.spec.classes, row.tolist())) for row in scores]
+
+    def predict_url(self, url):
+        return self.predict([download_image(url)])[0]
+
+
+class ModelRegistry:
+    """
+    Models from a manifest, loaded on first use and evicted least-recently-used first
+    when the loaded models exceed the memory budget.
+
+    With the watcher running (start_watcher), a loaded model whose file changes is reloaded in
+    the background, warmed up and swapped in; requests already running on the old session finish
+    on it. Copy new files in under a temporary name and rename them, so a half-written file is
+    never loaded (a failed load keeps the current session).
+    """
+
+    def __init__(self, manifest_path, memory_budget_mb=None):
+        with open(manifest_path) as f_in:
+            self.manifest = Manifest(**json.load(f_in))
+
+        # Relative model paths are relative to the manifest
+        base_dir = os.path.dirname(os.path.abspath(manifest_path))
+        for spec in self.manifest.models.values():
+            spec.path = os.path.join(base_dir, spec.path)
+
+        self.memory_budget_mb = memory_budget_mb or self.manifest.memory_budget_mb
+        self.default_model = self.manifest.default_model
+
+        self.session_options = ort.SessionOptions()
+        self.session_options.intra_op_num_threads = self.manifest.intra_op_threads
+        self.session_options.inter_op_num_threads = self.manifest.inter_op_threads
+        # Sessions run on the shared pool when it could be created, otherwise on their own pools of the sizes above
+        if configure_thread_pool(self.manifest.intra_op_threads, self.manifest.inter_op_threads):
+            self.session_options.use_per_session_threads = False
+
+        self._loaded = OrderedDict()  # name -> LoadedModel, least recently used first
+        self._lock = threading.Lock()
+        self._load_locks = {name: threading.Lock() for name in self.manifest.models}
+        self.reloads = {name: 0 for name in self.manifest.models}
+        self.reload_failures = {name: 0 for name in self.manifest.models}
+        self._watcher = None
+
+    def __contains__(self, name):
+        return name in self.manifest.models
+
+    def preload(self):
+        for name, spec in self.manifest.models.items():
+            if spec.preload:
+                self.get(name)
+
+    def get(self, name) -> LoadedModel:
+        with self._lock:
+            if name in self._loaded:
+                self._loaded.move_to_end(name)
+                return self._loaded[name]
+
+        # Only one thread loads a given model; others wait for it instead of loading it twice
+        with self._load_locks[name]:
+            with self._lock:
+                if name in self._loaded:
+                    self._loaded.move_to_end(name)
+                    return self._loaded[name]
+
+            model = LoadedModel(name, self.manifest.models[name], self.session_options)
+            model.warmup()
+
+            with self._lock:
+                self._evict(model.size_mb)
+                self._loaded[name] = model
+            return model
+
+    @contextmanager
+    def use(self, name):
+        """
+        Yields the current LoadedModel for `name` and marks it busy until the block ends.
+        """
+        model = self.get(name)
+        model.enter()
+        try:
+            yield model
+        finally:
+            model.exit()
+
+    def reload_if_changed(self):
+        with self._lock:
+            loaded = list(self._loaded.values())
+
+        for old in loaded:
+            try:
+                if file_stat(old.spec.path) == old.stat:
+                    continue
+                with self._load_locks[old.name]:
+                    new = LoadedModel(old.name, old.spec, self.session_options)
+                    new.warmup()
+            except Exception:
+                # Keep serving the current session; the next change of the file triggers a new attempt
+                old.stat = file_stat(old.spec.path) if os.path.exists(old.spec.path) else None
+                self.reload_failures[old.name] += 1
+                traceback.print_exc()
+                continue
+
+            with self._lock:
+                # Skip if the old model was evicted in the meantime; the next get() loads the new file
+                if self._loaded.get(old.name) is not old:
+                    continue
+                self._loaded[old.name] = new
+                self._evict(0, keep=old.name)
+            self.reloads[old.name] += 1
+            print(f"Model {old.name} reloaded: {old.version} -> {new.version}")
+
+            old.drain_in_background()
+
+    def start_watcher(self, interval=RELOAD_INTERVAL):
+        if interval <= 0 or self._watcher is not None:
+            return
+
+        def watch():
+            while True:
+                time.sleep(interval)
+                self.reload_if_changed()
+
+        self._watcher = threading.Thread(target=watch, name="model-reload", daemon=True)
+        self._watcher.start()
+
+    def _evict(self, needed_mb, keep=None):
+        # Requests still holding an evicted model keep it alive until they finish
+        for name in list(self._loaded):
+            if self.loaded_mb() + needed_mb <= self.memory_budget_mb:
+                break
+            if name != keep:
+                del self._loaded[name]
+
+    def loaded_mb(self):
+        return sum(model.size_mb for model in self._loaded.values())
+
+    def status(self):
+        with self._lock:
+            loaded = dict(self._loaded)
+        return {
+            name: {
+                "loaded": name in loaded,
+                "size_mb": round(loaded[name].size_mb, 2) if name in loaded else None,
+                "version": loaded[name].version if name in loaded else None,
+                "classes": spec.classes,
+            }
+            for name, spec in self.manifest.models.items()
+        }
+
+    def metrics(self):
+        """
+        Prometheus text-format lines: active version, reload counters and in-flight requests per model.
+        """
+        with self._lock:
+            loaded = dict(self._loaded)
+
+        lines = []
+        for name in self.manifest.models:
+            if name in loaded:
+                model = loaded[name]
+                lines.append(f'model_info{{model="{name}",version="{model.version}"}} 1')
+                lines.append(f'model_loaded_timestamp_seconds{{model="{name}"}} {model.loaded_at:.0f}')
+                lines.append(f'model_in_flight_requests{{model="{name}"}} {model.in_flight}')
+            lines.append(f'model_reloads_total{{model="{name}"}} {self.reloads[name]}')
+            lines.append(f'model_reload_failures_total{{model="{name}"}} {self.reload_failures[name]}')
+        return "\n".join(lines) + "\n"
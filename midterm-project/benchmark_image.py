@@ -0,0 +1,70 @@
+import argparse
+import os
+import subprocess
+import time
+
+from urllib import request
+from urllib.error import URLError
+
+import numpy as np
+
+# --- Configuration & Constants ---
+
+# Build targets compared by default: the current image (default target) vs the inference-only one
+TARGETS = ['full', 'slim']
+
+# Per service: container port and a GET endpoint that answers once the model is loaded
+SERVICES = {
+    'midterm': {'context': os.path.dirname(os.path.abspath(__file__)), 'port': 9696, 'probe': '/metrics'},
+    'k8s': {'context': os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '10-kubernetes'),
+            'port': 8080, 'probe': '/health'},
+}
+
+
+# --- Helper Functions ---
+
+def build_image(context, target, tag):
+    subprocess.run(['docker', 'build', '--target', target, '-t', tag, context], check=True,
+                   stdout=subprocess.DEVNULL)
+
+def image_size_mb(tag):
+    size = subprocess.run(['docker', 'image', 'inspect', '--format', '{{.Size}}', tag],
+                          check=True, capture_output=True, text=True).stdout
+    return int(size) / 1024 ** 2
+
+def startup_seconds(tag, port, probe, timeout=120):
+    """
+    Time from `docker run` until the service answers `probe` (imports, model load, uvicorn start).
+    """
+    start = time.perf_counter()
+    container = subprocess.run(['docker', 'run', '--rm', '-d', '-p', f'{port}:{port}', tag],
+                               check=True, capture_output=True, text=True).stdout.strip()
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with request.urlopen(f'http://localhost:{port}{probe}', timeout=1) as resp:
+                    if resp.status == 200:
+                        return time.perf_counter() - start
+            except (URLError, ConnectionError, OSError):
+                time.sleep(0.02)
+        raise TimeoutError(f'{tag} did not answer {probe} within {timeout}s')
+    finally:
+        subprocess.run(['docker', 'rm', '-f', container], capture_output=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Image size and startup time of the full vs slim service images')
+    parser.add_argument('--service', choices=list(SERVICES), default='midterm')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--no-build', action='store_true', help='reuse images built by a previous run')
+    args = parser.parse_args()
+
+    service = SERVICES[args.service]
+    print(f'{"image":<28} {"size MB":>9} {"startup p50 s":>14} {"startup max s":>14}')
+    for target in TARGETS:
+        tag = f'{args.service}-benchmark:{target}'
+        if not args.no_build:
+            build_image(service['context'], target, tag)
+
+        timings = [startup_seconds(tag, service['port'], service['probe']) for _ in range(args.runs)]
+        print(f'{tag:<28} {image_size_mb(tag):9.0f} {np.median(timings):14.2f} {max(timings):14.2f}')
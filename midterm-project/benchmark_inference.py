@@ -0,0 +1,45 @@
+import argparse
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+
+from compiled_model import MODEL_FILE, check_parity, compile_pipeline
+from transform import transform
+
+
+def latency_ms(predict, X, repeats):
+    predict(X)  # warm-up
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict(X)
+        timings.append((time.perf_counter() - start) * 1000)
+    return np.percentile(timings, 50), np.percentile(timings, 95)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare XGBRegressor pipeline and compiled predictor latency')
+    parser.add_argument('--data', default='mazowieckie-spring25.csv')
+    parser.add_argument('--repeats', type=int, default=200)
+    args = parser.parse_args()
+
+    with open(MODEL_FILE, 'rb') as f_in:
+        model_pipeline = pickle.load(f_in)
+    compiled = compile_pipeline(model_pipeline)
+
+    df = transform(pd.read_csv(args.data)).drop(columns=['price', 'price_log'])
+    X = df.reindex(columns=model_pipeline.feature_names_in_, fill_value=0)
+    X_batch = X.sample(1000, replace=len(X) < 1000, random_state=1).reset_index(drop=True)
+
+    max_diff = check_parity(model_pipeline, compiled, X_batch)
+
+    results = []
+    for name, predict in [('pipeline', model_pipeline.predict), ('compiled', compiled.predict)]:
+        for label, batch in [('1 row', X_batch.head(1)), ('1k rows', X_batch)]:
+            p50, p95 = latency_ms(predict, batch, args.repeats)
+            results.append({'model': name, 'batch': label, 'p50_ms': round(p50, 3), 'p95_ms': round(p95, 3)})
+
+    print(pd.DataFrame(results).to_string(index=False))
+    print(f'max |diff| (log price) on 1k rows: {max_diff:.2e}')
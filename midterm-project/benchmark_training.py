@@ -0,0 +1,93 @@
+import argparse
+import multiprocessing as mp
+import os
+import resource
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from sklearn.model_selection import train_test_split
+from external_memory import CHUNK_ROWS
+from run_report import RunReport
+from train import TRAINERS, load_data, train_model_external
+from transform import transform
+
+
+def rmse(y, y_pred):
+    return float(np.sqrt(np.mean((y - y_pred) ** 2)))
+
+def peak_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def chunked_rmse(model, filename, chunk_rows):
+    # The test file is scored chunk by chunk, so evaluation does not raise the peak memory of any mode
+    squared_error, n = 0.0, 0
+    for chunk in pd.read_csv(filename, chunksize=chunk_rows):
+        df = transform(chunk)
+        if df.empty:
+            continue
+        X = df.drop(columns=['price', 'price_log']).reindex(columns=model.feature_names_in_, fill_value=0)
+        squared_error += float(np.sum((df['price_log'].to_numpy() - model.predict(X)) ** 2))
+        n += len(df)
+    return float(np.sqrt(squared_error / n))
+
+def run_mode(mode, train_file, test_file, chunk_rows, queue):
+    """
+    Trains one mode in a fresh process, so peak memory of one run does not leak into the next.
+    """
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    if mode == 'external':
+        report = RunReport()
+        model = train_model_external(train_file, chunk_rows=chunk_rows, report=report)
+        rows_train = report.info['train_shape'][0] + report.info['val_shape'][0]
+    else:
+        df_train = load_data(train_file)
+        model = TRAINERS[mode](df_train)
+        rows_train = len(df_train)
+        del df_train
+    wall_time = time.perf_counter() - start
+
+    queue.put({
+        'mode': f'external ({chunk_rows} rows/chunk)' if mode == 'external' else mode,
+        'rows_train': rows_train,
+        'wall_time_s': round(wall_time, 2),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'train_rss_delta_mb': round(peak_rss_mb() - rss_before, 1),
+        'rmse_log': round(chunked_rmse(model, test_file, chunk_rows or CHUNK_ROWS), 4),
+    })
+
+def benchmark(filename, modes, chunk_rows=(CHUNK_ROWS,)):
+    ctx = mp.get_context('spawn')
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Every mode trains on the same raw 80% and is scored on the same raw 20%
+        train_file, test_file = os.path.join(tmp_dir, 'train.csv'), os.path.join(tmp_dir, 'test.csv')
+        df_train, df_test = train_test_split(pd.read_csv(filename), test_size=0.2, random_state=1)
+        df_train.to_csv(train_file, index=False)
+        df_test.to_csv(test_file, index=False)
+        del df_train, df_test
+
+        runs = [(mode, rows) for mode in modes for rows in (chunk_rows if mode == 'external' else [None])]
+        for mode, rows in runs:
+            queue = ctx.Queue()
+            process = ctx.Process(target=run_mode, args=(mode, train_file, test_file, rows, queue))
+            process.start()
+            results.append(queue.get())
+            process.join()
+    return pd.DataFrame(results)
+
+
+if __name__ == '__main__':
+    modes = sorted(TRAINERS) + ['external']
+    parser = argparse.ArgumentParser(description='Compare wall time, peak memory and RMSE of the training modes')
+    parser.add_argument('--data', default='mazowieckie-spring25.csv')
+    parser.add_argument('--modes', nargs='+', choices=modes, default=modes)
+    parser.add_argument('--chunk-rows', nargs='+', type=int, default=[CHUNK_ROWS],
+                        help="one 'external' run per chunk size, e.g. --chunk-rows 10000 50000 200000")
+    args = parser.parse_args()
+
+    print(benchmark(args.data, args.modes, args.chunk_rows).to_string(index=False))
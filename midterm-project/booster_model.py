@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from transform import COLUMNS_TO_ONEHOT
+
+# --- Configuration & Constants ---
+
+# Columns XGBoost treats as native categoricals in the 'hist' training mode.
+# The one-hot groups produced by transform() are collapsed back into a single column each.
+CATEGORICAL_COLUMNS = ['location_district'] + COLUMNS_TO_ONEHOT
+
+
+# --- Helper Functions ---
+
+def find_onehot_groups(columns):
+    """
+    Maps every one-hot encoded column group (e.g. 'market') to its dummy columns (e.g. 'market_PRIMARY').
+    """
+    return {
+        group: [c for c in columns if c.startswith(f'{group}_')]
+        for group in COLUMNS_TO_ONEHOT
+    }
+
+def collapse_onehot(X: pd.DataFrame, onehot_groups: dict, categories: dict):
+    """
+    Turns the transform() output into a frame with pandas 'category' columns for XGBoost.
+
+    Args:
+        X (pd.DataFrame): Features as returned by transform() (one-hot groups included).
+        onehot_groups (dict): Group name -> dummy column names (see find_onehot_groups).
+        categories (dict): Column name -> list of known categories, fixed at training time
+            so that category codes are identical during training and inference.
+
+    Returns:
+        pd.DataFrame: Numeric columns unchanged, one categorical column per group.
+    """
+    dummy_columns = [c for cols in onehot_groups.values() for c in cols]
+    df = X.drop(columns=dummy_columns)
+
+    for group, cols in onehot_groups.items():
+        block = X[cols].to_numpy(dtype=np.float32)
+        labels = np.array([c[len(group) + 1:] for c in cols], dtype=object)
+
+        values = labels[block.argmax(axis=1)]
+        # Rows without any active dummy and the explicit '<group>_nan' dummy become missing values
+        values[(block.max(axis=1) <= 0) | (values == 'nan')] = None
+        df[group] = pd.Categorical(values, categories=categories[group])
+
+    df['location_district'] = pd.Categorical(X['location_district'], categories=categories['location_district'])
+    return df
+
+def fit_categories(X: pd.DataFrame, onehot_groups: dict):
+    """
+    Collects the known categories of every categorical column from the training set.
+    """
+    categories = {
+        group: [c[len(group) + 1:] for c in cols if c != f'{group}_nan']
+        for group, cols in onehot_groups.items()
+    }
+    categories['location_district'] = sorted(X['location_district'].dropna().unique())
+    return categories
+
+
+# --- Model ---
+
+class BoosterRegressor:
+    """
+    Predict-only wrapper around a native xgboost Booster.
+
+    Exposes the same `feature_names_in_` / `predict()` interface as the sklearn
+    `model_pipeline`, so predict.py can serve either artifact unchanged. An optional
+    fitted `spatial` step (see spatial.py) adds the neighbourhood features first.
+    """
+
+    def __init__(self, booster: xgb.Booster, feature_names, onehot_groups: dict, categories: dict, spatial=None):
+        self.booster = booster
+        self.feature_names_in_ = np.asarray(feature_names, dtype=object)
+        self.onehot_groups = onehot_groups
+        self.categories = categories
+        self.spatial = spatial
+
+    def transform(self, X: pd.DataFrame):
+        X = X.reindex(columns=self.feature_names_in_, fill_value=0)
+        if self.spatial is not None:
+            X = self.spatial.transform(X)
+        return collapse_onehot(X, self.onehot_groups, self.categories)
+
+    def predict(self, X: pd.DataFrame):
+        X_cat = self.transform(X)
+        return self.booster.inplace_predict(X_cat)
+
+class EncodedBoosterRegressor:
+    """
+    Predict-only wrapper for the booster trained by `train.py --mode external`.
+
+    `location_district` is target encoded with a lookup table (unknown / missing districts get the
+    global mean, as TargetEncoder does); all other features are the numeric transform() columns.
+    Same `feature_names_in_` / `predict()` interface as `model_pipeline`.
+    """
+
+    def __init__(self, booster: xgb.Booster, feature_names, district_values: dict, district_default: float):
+        self.booster = booster
+        self.feature_names_in_ = np.asarray(feature_names, dtype=object)
+        self.district_values = district_values
+        self.district_default = district_default
+
+    def encode_district(self, district):
+        encoded = pd.Series(district).map(self.district_values)
+        return encoded.fillna(self.district_default).to_numpy(dtype=np.float32)
+
+    def to_matrix(self, X: pd.DataFrame):
+        X = X.reindex(columns=self.feature_names_in_, fill_value=0)
+        district = self.encode_district(X['location_district'].to_numpy())
+        matrix = X.drop(columns=['location_district']).to_numpy(dtype=np.float32, na_value=np.nan)
+        position = list(self.feature_names_in_).index('location_district')
+        return np.insert(matrix, position, district, axis=1)
+
+    def predict(self, X: pd.DataFrame):
+        return self.booster.inplace_predict(self.to_matrix(X))
@@ -0,0 +1,305 @@
+import argparse
+import json
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from spatial import SpatialFeatures
+
+# --- Configuration & Constants ---
+
+MODEL_FILE = 'model_pipeline.bin'
+COMPILED_MODEL_FILE = 'model_compiled.npz'
+
+DISTRICT_COLUMN = 'location_district'
+
+# Rows traversed together; keeps the (rows x trees) working arrays small enough to stay in cache
+BLOCK_ROWS = 64
+
+
+# --- Tree Traversal ---
+
+def tree_leaves(matrix: np.ndarray, split_feature, threshold, children, default_left, value, roots, depth: int,
+                less_equal: bool = False):
+    """
+    Leaf value of every tree for every row of a float32 matrix, as a (rows x trees) array.
+
+    The trees are concatenated node arrays; `children` holds interleaved (left, right) pairs, so the next
+    node is children[2 * node + go_right]. Leaves point to themselves, so a fixed number of steps (the
+    maximum tree depth) walks every row down every tree without any per-tree branching.
+    Missing values take the node's default direction.
+
+    Args:
+        less_equal (bool): False for xgboost (x < threshold goes left), True for sklearn (x <= threshold).
+    """
+    flat = matrix.ravel()
+    offsets = np.arange(len(matrix))[:, None] * matrix.shape[1]
+    has_missing = bool(np.isnan(flat).any())
+    node = np.tile(roots, (len(matrix), 1))
+
+    for _ in range(depth):
+        x = flat.take(offsets + split_feature.take(node))
+        t = threshold.take(node)
+        go_right = x > t if less_equal else ~(x < t)
+        if has_missing:
+            missing = np.isnan(x)
+            go_right[missing] = ~default_left.take(node[missing])
+        node = children.take(2 * node + go_right)
+
+    return value.take(node)
+
+
+# --- Compiled Model ---
+
+class CompiledModel:
+    """
+    Standalone predictor for the SpatialFeatures + TargetEncoder + XGBRegressor pipeline.
+
+    The boosted trees are flattened into contiguous node arrays and all trees are
+    evaluated at once with vectorized NumPy traversal; the target encoder becomes a
+    sorted lookup table and the spatial index is stored as its raw coordinates and
+    rebuilt on load. The artifact is a plain .npz file (no pickle, no xgboost or
+    category-encoders needed at serve time). Pipelines with the spatial step still need
+    scikit-learn: the BallTree is rebuilt from the stored coordinates (spatial.py).
+    """
+
+    def __init__(self, arrays: dict):
+        self.arrays = arrays
+        self.feature_names_in_ = arrays['feature_names_in']
+        self.feature_names = arrays['feature_names']
+        self.district_categories = arrays['district_categories']
+        self.district_values = arrays['district_values']
+        self.district_unknown = float(arrays['district_unknown'])
+        self.district_missing = float(arrays['district_missing'])
+
+        self.split_feature = arrays['split_feature']
+        self.threshold = arrays['threshold']
+        self.left = arrays['left']
+        self.right = arrays['right']
+        self.default_left = arrays['default_left']
+        self.value = arrays['value']
+        self.roots = arrays['roots']
+        self.depth = int(arrays['depth'])
+        self.base_score = float(arrays['base_score'])
+
+        self.spatial = None
+        if 'spatial_coords' in arrays:
+            self.spatial = SpatialFeatures.from_index(
+                arrays['spatial_coords'], arrays['spatial_price_per_m2'],
+                k=int(arrays['spatial_k']), radius_km=float(arrays['spatial_radius_km'])
+            )
+
+        self._district_position = int(np.flatnonzero(self.feature_names == DISTRICT_COLUMN)[0])
+        self._numeric_columns = [c for c in self.feature_names if c != DISTRICT_COLUMN]
+        # Interleaved (left, right) pairs: the next node is children[2 * node + go_right]
+        self._children = np.stack([self.left, self.right], axis=1).ravel()
+
+    @classmethod
+    def load(cls, path: str = COMPILED_MODEL_FILE):
+        with np.load(path, allow_pickle=False) as data:
+            return cls({key: data[key] for key in data.files})
+
+    def save(self, path: str = COMPILED_MODEL_FILE):
+        # Write under a temporary name and rename, so the hot reload never sees a half-written file
+        tmp_path = os.path.join(os.path.dirname(os.path.abspath(path)), f'.{os.path.basename(path)}.tmp')
+        with open(tmp_path, 'wb') as f_out:
+            np.savez(f_out, **self.arrays)
+        os.replace(tmp_path, path)
+
+    def encode_district(self, district):
+        district = np.asarray(district, dtype=object)
+        missing = pd.isna(district)
+        encoded = np.full(len(district), self.district_unknown, dtype=np.float32)
+        encoded[missing] = self.district_missing
+
+        names = district[~missing].astype(str)
+        pos = np.searchsorted(self.district_categories, names)
+        pos = np.minimum(pos, len(self.district_categories) - 1)
+        found = self.district_categories[pos] == names
+        encoded[np.flatnonzero(~missing)[found]] = self.district_values[pos[found]]
+        return encoded
+
+    def to_matrix(self, X: pd.DataFrame):
+        """
+        Builds the float32 feature matrix in the booster's column order.
+        """
+        X = X.reindex(columns=self.feature_names, fill_value=0)
+        matrix = np.empty((len(X), len(self.feature_names)), dtype=np.float32)
+        numeric_mask = np.ones(len(self.feature_names), dtype=bool)
+        numeric_mask[self._district_position] = False
+        matrix[:, numeric_mask] = X[self._numeric_columns].to_numpy(dtype=np.float32, na_value=np.nan)
+        matrix[:, self._district_position] = self.encode_district(X[DISTRICT_COLUMN])
+        return matrix
+
+    def predict_matrix(self, matrix: np.ndarray):
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        return np.concatenate([
+            self._predict_block(matrix[start:start + BLOCK_ROWS])
+            for start in range(0, max(len(matrix), 1), BLOCK_ROWS)
+        ])
+
+    def _predict_block(self, matrix: np.ndarray):
+        leaves = tree_leaves(matrix, self.split_feature, self.threshold, self._children, self.default_left,
+                             self.value, self.roots, self.depth)
+        return leaves.sum(axis=1, dtype=np.float64) + self.base_score
+
+    def predict(self, X: pd.DataFrame):
+        if self.spatial is not None:
+            X = self.spatial.transform(X)
+        return self.predict_matrix(self.to_matrix(X))
+
+
+# --- Compilation ---
+
+def flatten_booster(booster):
+    """
+    Converts an xgboost Booster into contiguous node arrays (all trees concatenated).
+
+    Also used by 06-trees/tree_inference.py, which imports it from here (the Docker image is built from
+    this directory, so the code lives on this side).
+    """
+    model = json.loads(booster.save_raw('json'))['learner']
+    trees = model['gradient_booster']['model']['trees']
+
+    split_feature, threshold, left, right, default_left, value, roots = [], [], [], [], [], [], []
+    depth = 0
+    offset = 0
+    for tree in trees:
+        if any(tree['split_type']):
+            raise ValueError('Categorical splits are not supported (e.g. --mode hist models), use --mode pipeline')
+
+        tree_left = np.asarray(tree['left_children'], dtype=np.int32)
+        tree_right = np.asarray(tree['right_children'], dtype=np.int32)
+        is_leaf = tree_left == -1
+        nodes = np.arange(len(tree_left), dtype=np.int32)
+
+        split_feature.append(np.where(is_leaf, 0, tree['split_indices']).astype(np.int32))
+        threshold.append(np.asarray(tree['split_conditions'], dtype=np.float32))
+        left.append(np.where(is_leaf, nodes, tree_left) + offset)
+        right.append(np.where(is_leaf, nodes, tree_right) + offset)
+        default_left.append(np.asarray(tree['default_left'], dtype=bool))
+        value.append(np.where(is_leaf, tree['split_conditions'], 0).astype(np.float32))
+        roots.append(offset)
+
+        node_depth = np.zeros(len(tree_left), dtype=np.int32)
+        for node in nodes:
+            if not is_leaf[node]:
+                node_depth[tree_left[node]] = node_depth[tree_right[node]] = node_depth[node] + 1
+        depth = max(depth, int(node_depth.max()))
+        offset += len(tree_left)
+
+    base_score = float(model['learner_model_param']['base_score'].strip('[]'))
+
+    return {
+        'feature_names': np.asarray(booster.feature_names, dtype=str),
+        'split_feature': np.concatenate(split_feature),
+        'threshold': np.concatenate(threshold),
+        'left': np.concatenate(left),
+        'right': np.concatenate(right),
+        'default_left': np.concatenate(default_left),
+        'value': np.concatenate(value),
+        'roots': np.asarray(roots, dtype=np.int32),
+        'depth': depth,
+        'base_score': base_score,
+    }
+
+def flatten_target_encoder(encoder):
+    """
+    Reads the district -> value table out of a fitted TargetEncoder by encoding every known category.
+    """
+    categories = [c for c in encoder.ordinal_encoder.mapping[0]['mapping'].index if not pd.isna(c)]
+    categories = np.sort(np.asarray(categories, dtype=str))
+
+    probe = pd.DataFrame(0, index=range(len(categories) + 2), columns=encoder.feature_names_in_)
+    probe[DISTRICT_COLUMN] = list(categories) + [None, '__unknown_district__']
+    encoded = encoder.transform(probe)[DISTRICT_COLUMN].to_numpy(dtype=np.float32)
+
+    return {
+        'district_categories': categories,
+        'district_values': encoded[:-2],
+        'district_missing': float(encoded[-2]),
+        'district_unknown': float(encoded[-1]),
+    }
+
+def flatten_spatial(spatial):
+    return {
+        'spatial_coords': spatial.coords_,
+        'spatial_price_per_m2': spatial.price_per_m2_,
+        'spatial_k': spatial.k,
+        'spatial_radius_km': spatial.radius_km,
+    }
+
+def compile_pipeline(model_pipeline):
+    steps = model_pipeline.named_steps
+
+    arrays = {'feature_names_in': np.asarray(model_pipeline.feature_names_in_, dtype=str)}
+    if 'spatial' in steps:
+        arrays.update(flatten_spatial(steps['spatial']))
+    arrays.update(flatten_target_encoder(steps['encoder']))
+    arrays.update(flatten_booster(steps['regressor'].get_booster()))
+    return CompiledModel(arrays)
+
+def check_parity(model_pipeline, compiled, X: pd.DataFrame, atol: float = 1e-4):
+    """
+    Raises if the compiled model disagrees with the original pipeline (log-price scale).
+    """
+    X = X.reindex(columns=model_pipeline.feature_names_in_, fill_value=0)
+    expected = model_pipeline.predict(X)
+    actual = compiled.predict(X)
+    max_diff = float(np.max(np.abs(expected - actual)))
+    if max_diff > atol:
+        raise ValueError(f'Compiled model differs from the pipeline: max |diff| = {max_diff:.2e} > {atol:.0e}')
+    return max_diff
+
+def is_compilable(model_pipeline):
+    # Only the SpatialFeatures + TargetEncoder + XGBRegressor pipeline of `train.py --mode pipeline`
+    steps = getattr(model_pipeline, 'named_steps', {})
+    return 'encoder' in steps and 'regressor' in steps
+
+def export_compiled_model(model_pipeline, X: pd.DataFrame = None, path: str = COMPILED_MODEL_FILE):
+    """
+    Replaces `path` with the compiled form of a freshly trained model, or deletes it when the model
+    can't be compiled, so predict.py never serves a compiled model left over from an older training run.
+
+    Args:
+        model_pipeline: The model just saved to model_pipeline.bin.
+        X (pd.DataFrame): Optional listings for the parity check (nothing is saved if it fails).
+        path (str): Compiled artifact to replace.
+
+    Returns:
+        CompiledModel | None: The compiled model, None when the stale file was removed instead.
+    """
+    if not is_compilable(model_pipeline):
+        if os.path.exists(path):
+            os.remove(path)
+        return None
+
+    compiled = compile_pipeline(model_pipeline)
+    if X is not None:
+        check_parity(model_pipeline, compiled, X)
+
+    compiled.save(path)
+    return compiled
+
+
+if __name__ == '__main__':
+    from transform import transform
+
+    parser = argparse.ArgumentParser(description='Compile model_pipeline.bin into a standalone NumPy predictor')
+    parser.add_argument('--data', default='mazowieckie-spring25.csv', help='listings used for the parity check')
+    parser.add_argument('--rows', type=int, default=2000)
+    args = parser.parse_args()
+
+    with open(MODEL_FILE, 'rb') as f_in:
+        model_pipeline = pickle.load(f_in)
+
+    # Same path as train.py: parity check, atomic write, and no compiled file for other training modes
+    df = transform(pd.read_csv(args.data)).head(args.rows)
+    compiled = export_compiled_model(model_pipeline, df.drop(columns=['price', 'price_log']))
+    if compiled is None:
+        print(f'{MODEL_FILE} was not trained with --mode pipeline and can\'t be compiled; '
+              f'{COMPILED_MODEL_FILE} removed if present, predict.py serves {MODEL_FILE}')
+    else:
+        print(f'Saved {COMPILED_MODEL_FILE} ({len(compiled.roots)} trees, parity checked on {len(df)} rows)')
@@ -0,0 +1,183 @@
+import argparse
+import json
+import pickle
+import time
+import urllib.request
+
+import numpy as np
+import pandas as pd
+
+from sklearn.neighbors import KDTree
+
+# --- Configuration & Constants ---
+
+COMPS_INDEX_FILE = 'comps_index.bin'
+
+EARTH_RADIUS_KM = 6371.0
+
+# Listings this far apart count as much as one standard deviation of a weighted feature below
+LOCATION_SCALE_KM = 1.0
+
+# Engineered features from transform() used for similarity, with their weights
+COMPS_FEATURES = {
+    'area': 1.0,
+    'roomsNum': 0.5,
+    'buildYear': 0.5,
+    'floor_numeric': 0.25,
+    'constructionStatus_numeric': 0.25,
+    'market_PRIMARY': 0.5,
+}
+
+# Columns returned for each comparable listing
+COMPS_COLUMNS = [
+    'location_latitude', 'location_longitude', 'location_district',
+    'area', 'roomsNum', 'buildYear', 'floor_numeric', 'price'
+]
+REQUIRED_COLUMNS = ['location_latitude', 'location_longitude', 'area', 'price']
+
+
+# --- Comps Index ---
+
+class CompsIndex:
+    """
+    Nearest comparable training listings by location and engineered features.
+
+    Each listing becomes a vector of its position on the unit sphere (scaled to km) and
+    its standardized, weighted features from transform(). The vectors live in a KDTree
+    that is built once at training time and pickled, so a lookup is a single tree query.
+    """
+
+    def __init__(self, df: pd.DataFrame, leaf_size: int = 40):
+        # A comparable needs a location, an area and a price (the /comps response requires all of them)
+        required = df[REQUIRED_COLUMNS].apply(pd.to_numeric, errors='coerce')
+        df = df[np.isfinite(required).all(axis=1) & (required['area'] > 0)]
+
+        features = df[list(COMPS_FEATURES)].apply(pd.to_numeric, errors='coerce').astype(np.float64)
+        self.medians = features.median().to_dict()
+        features = features.fillna(self.medians)
+        self.means = features.mean().to_dict()
+        # Constant columns (std 0) would divide by zero
+        self.stds = features.std().replace(0, 1).fillna(1).to_dict()
+
+        listings = df[COMPS_COLUMNS].reset_index(drop=True)
+        self.listings = {col: listings[col].to_numpy() for col in COMPS_COLUMNS}
+        self.listings['price_per_m2'] = (listings['price'] / listings['area']).to_numpy()
+
+        self.tree = KDTree(self.vectors(df), leaf_size=leaf_size)
+
+    def vectors(self, df: pd.DataFrame):
+        lat = np.radians(df['location_latitude'].to_numpy(dtype=np.float64))
+        lon = np.radians(df['location_longitude'].to_numpy(dtype=np.float64))
+
+        # Chord length on the sphere is monotonic in the great-circle distance, so Euclidean
+        # neighbours in these coordinates are also the geographically nearest ones.
+        scale = EARTH_RADIUS_KM / LOCATION_SCALE_KM
+        columns = [
+            np.nan_to_num(scale * np.cos(lat) * np.cos(lon)),
+            np.nan_to_num(scale * np.cos(lat) * np.sin(lon)),
+            np.nan_to_num(scale * np.sin(lat)),
+        ]
+        for feature, weight in COMPS_FEATURES.items():
+            values = pd.to_numeric(df[feature], errors='coerce').to_numpy(dtype=np.float64)
+            values = np.where(np.isnan(values), self.medians[feature], values)
+            columns.append(weight * (values - self.means[feature]) / self.stds[feature])
+
+        return np.column_stack(columns)
+
+    def query(self, df: pd.DataFrame, k: int = 5):
+        """
+        Returns the k most similar training listings for every row of df (transform() output).
+
+        Returns:
+            list: One list of dicts per row, nearest first, with a 'distance' key (similarity units).
+        """
+        k = min(k, self.tree.data.shape[0])
+        distances, indices = self.tree.query(self.vectors(df), k=k)
+
+        results = []
+        for row_distances, row_indices in zip(distances, indices):
+            comps = []
+            for distance, idx in zip(row_distances, row_indices):
+                comp = {col: _to_python(values[idx]) for col, values in self.listings.items()}
+                comp['distance'] = float(distance)
+                comps.append(comp)
+            results.append(comps)
+        return results
+
+
+def _to_python(value):
+    if pd.isna(value):
+        return None
+    return value.item() if isinstance(value, np.generic) else value
+
+def build_comps_index(df_final_cleaned):
+    return CompsIndex(df_final_cleaned)
+
+def save_comps_index(comps_index, output_file=COMPS_INDEX_FILE):
+    with open(output_file, 'wb') as f_out:
+        pickle.dump(comps_index, f_out)
+
+def load_comps_index(input_file=COMPS_INDEX_FILE):
+    with open(input_file, 'rb') as f_in:
+        return pickle.load(f_in)
+
+
+def endpoint_latency_ms(url: str, records: list):
+    """
+    Wall time of full HTTP round trips (validation, transform, model, lookup, JSON) against a running service.
+    """
+    timings = []
+    for record in records:
+        request = urllib.request.Request(url, data=json.dumps(record).encode(),
+                                         headers={'Content-Type': 'application/json'})
+        start = time.perf_counter()
+        with urllib.request.urlopen(request) as response:
+            response.read()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+if __name__ == '__main__':
+    from transform import transform
+
+    parser = argparse.ArgumentParser(description='Measure /comps lookup latency on the local listings')
+    parser.add_argument('--data', default='mazowieckie-spring25.csv')
+    parser.add_argument('--listings', type=int, default=100_000,
+                        help='index size; the dataset is resampled with ~100 m location jitter to reach it')
+    parser.add_argument('--queries', type=int, default=1000)
+    parser.add_argument('--endpoint', default=None,
+                        help='time whole requests against a running service instead, e.g. http://localhost:9696/comps')
+    args = parser.parse_args()
+
+    raw = pd.read_csv(args.data)
+
+    if args.endpoint:
+        # Raw listings as a client sends them: Warsaw only, no price
+        raw = raw[raw['city'] == 'warszawa'].drop(columns=['price'])
+        records = json.loads(raw.sample(args.queries, replace=len(raw) < args.queries, random_state=2)
+                             .to_json(orient='records'))
+        endpoint_latency_ms(args.endpoint, records[:10])  # warm-up
+        timings = endpoint_latency_ms(args.endpoint, records)
+        print(f'{args.endpoint} end to end: p50 {np.percentile(timings, 50):.2f} ms, '
+              f'p95 {np.percentile(timings, 95):.2f} ms, p99 {np.percentile(timings, 99):.2f} ms')
+    else:
+        # Lookup only, on an index of --listings listings
+        df = transform(raw)
+        rng = np.random.default_rng(1)
+        df_index = df.sample(args.listings, replace=len(df) < args.listings, random_state=1).reset_index(drop=True)
+        for col in ['location_latitude', 'location_longitude']:
+            df_index[col] = df_index[col] + rng.normal(0, 0.001, len(df_index))
+
+        start = time.perf_counter()
+        comps_index = build_comps_index(df_index)
+        print(f'Index of {len(df_index)} listings built in {time.perf_counter() - start:.2f} s')
+
+        queries = df.sample(args.queries, replace=len(df) < args.queries, random_state=2).reset_index(drop=True)
+        timings = []
+        for i in range(len(queries)):
+            row = queries.iloc[[i]]
+            start = time.perf_counter()
+            comps_index.query(row, k=5)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        print(f'Single-listing lookup: p50 {np.percentile(timings, 50):.3f} ms, p95 {np.percentile(timings, 95):.3f} ms')
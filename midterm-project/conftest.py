@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from transform import transform
+
+DISTRICTS = ['Mokotów', 'Wola', 'Białołęka', 'Praga-Południe', 'Ursynów', 'Bemowo', 'Śródmieście', 'Targówek', None]
+FEATURES = ['taras', 'ogródek', 'winda', 'balkon', 'klimatyzacja', 'piwnica', 'internet', 'domofon / wideofon']
+
+
+def make_listings(n: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Synthetic raw listings in the layout of mazowieckie-spring25.csv (the real file is not in the repo).
+    """
+    rng = np.random.default_rng(seed)
+    lat = 52.2286 + rng.normal(0, 0.05, n)
+    lon = 21.0031 + rng.normal(0, 0.08, n)
+    area = rng.uniform(20, 150, n)
+    distance = np.hypot(lat - 52.2286, (lon - 21.0031) * 0.6)
+    price = area * (18000 - 60000 * distance) * rng.lognormal(0, 0.15, n)
+
+    return pd.DataFrame({
+        'id': np.arange(n),
+        'city': rng.choice(['warszawa', 'warszawa', 'warszawa', 'piaseczno'], n),
+        'area': area,
+        'buildYear': np.where(rng.random(n) < 0.1, np.nan, rng.integers(1900, 2025, n)),
+        'buildingFloorsNumber': rng.integers(1, 20, n).astype(float),
+        'floorNumber': rng.choice(['cellar', 'ground_floor', 'floor_1', 'floor_2', 'floor_5', 'floor_higher_10', None], n),
+        'roomsNum': rng.choice(['1', '2', '3', '4', 'more'], n),
+        'location_latitude': lat,
+        'location_longitude': lon,
+        'market': rng.choice(['PRIMARY', 'SECONDARY'], n),
+        'buildingMaterial': rng.choice(['brick', 'concrete_plate', 'reinforced_concrete', None], n),
+        'constructionStatus': rng.choice(['to_renovation', 'to_completion', 'ready_to_use', None], n),
+        'ownership': rng.choice(['full_ownership', 'share', None], n),
+        'userType': rng.choice(['agency', 'developer', 'private'], n),
+        'location_district': rng.choice(DISTRICTS, n),
+        'features': [str(list(rng.choice(FEATURES, rng.integers(0, 4), replace=False))) if rng.random() > 0.1 else None
+                     for _ in range(n)],
+        'price': np.where(rng.random(n) < 0.02, np.nan, price),
+    })
+
+
+@pytest.fixture(scope='session')
+def raw_listings():
+    return make_listings(3000)
+
+@pytest.fixture(scope='session')
+def listings(raw_listings):
+    return transform(raw_listings)
@@ -0,0 +1,127 @@
+import os
+
+import category_encoders as ce
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from transform import transform
+
+# --- Configuration & Constants ---
+
+# Raw CSV rows read, transformed and written to disk at a time; bounds the memory of the shard pass
+CHUNK_ROWS = 100_000
+
+DISTRICT_COLUMN = 'location_district'
+
+# Read from category_encoders.TargetEncoder's defaults (min_samples_leaf=20, smoothing=10 since 2.x),
+# which train_model() uses, so both modes encode districts alike
+MIN_SAMPLES_LEAF = ce.TargetEncoder().min_samples_leaf
+SMOOTHING = float(ce.TargetEncoder().smoothing)
+
+
+# --- Streaming Target Encoder ---
+
+class StreamingTargetEncoder:
+    """
+    Target encoding of `location_district` from running per-district sums and counts.
+
+    `update()` sees the data chunk by chunk; `values()` then gives the same smoothed means as a
+    default TargetEncoder (MIN_SAMPLES_LEAF, SMOOTHING) fitted on all rows at once.
+    """
+
+    def __init__(self):
+        self.sums = pd.Series(dtype=np.float64)
+        self.counts = pd.Series(dtype=np.float64)
+        self.total = 0.0
+        self.n = 0
+
+    def update(self, district, y):
+        y = pd.Series(np.asarray(y, dtype=np.float64))
+        district = pd.Series(np.asarray(district, dtype=object))
+        grouped = y.groupby(district, dropna=True)
+        self.sums = self.sums.add(grouped.sum(), fill_value=0)
+        self.counts = self.counts.add(grouped.count(), fill_value=0)
+        self.total += float(y.sum())
+        self.n += len(y)
+
+    def prior(self):
+        return self.total / self.n
+
+    def values(self):
+        smoove = 1 / (1 + np.exp(-(self.counts - MIN_SAMPLES_LEAF) / SMOOTHING))
+        encoded = self.prior() * (1 - smoove) + (self.sums / self.counts) * smoove
+        return {str(k): float(v) for k, v in encoded.items()}
+
+
+# --- Shards ---
+
+def write_shards(filename, shard_dir, chunk_rows=CHUNK_ROWS, val_size=0.1, seed=1):
+    """
+    Streams the CSV through transform() and writes every chunk as a train and a val .npz shard.
+
+    Returns the train / val shard paths, the feature names (fixed by the first chunk) and the fitted
+    StreamingTargetEncoder. Only one chunk is in memory at a time.
+
+    Note: transform() imputes missing values with medians of the data it is given, i.e. per chunk here.
+    """
+    rng = np.random.default_rng(seed)
+    encoder = StreamingTargetEncoder()
+    feature_names = None
+    shards = {'train': [], 'val': []}
+
+    for i, chunk in enumerate(pd.read_csv(filename, chunksize=chunk_rows)):
+        df = transform(chunk)
+        if df.empty:
+            continue
+        y = df['price_log'].to_numpy(dtype=np.float32)
+        X = df.drop(columns=['price', 'price_log'])
+        if feature_names is None:
+            feature_names = list(X.columns)
+        X = X.reindex(columns=feature_names, fill_value=0)
+
+        is_val = rng.random(len(X)) < val_size
+        district = X[DISTRICT_COLUMN].to_numpy(dtype=object)
+        # Encoding statistics come from the training rows only
+        encoder.update(district[~is_val], y[~is_val])
+
+        # The district column stays NaN in the matrix; the iterator fills in the final encoding
+        matrix = X.drop(columns=[DISTRICT_COLUMN]).to_numpy(dtype=np.float32, na_value=np.nan)
+        matrix = np.insert(matrix, feature_names.index(DISTRICT_COLUMN), np.nan, axis=1)
+        district = pd.Series(district).fillna('').to_numpy(dtype=str)
+
+        for name, rows in [('train', ~is_val), ('val', is_val)]:
+            if not rows.any():
+                continue
+            path = os.path.join(shard_dir, f'{name}-{i:05d}.npz')
+            np.savez(path, X=matrix[rows], y=y[rows], district=district[rows])
+            shards[name].append(path)
+
+    return shards['train'], shards['val'], feature_names, encoder
+
+
+class ShardIterator(xgb.DataIter):
+    """
+    Feeds the .npz shards to XGBoost one at a time, target encoding the district on the fly.
+    """
+
+    def __init__(self, paths, district_position, district_values, district_default, cache_prefix):
+        self.paths = paths
+        self.district_position = district_position
+        self.district_values = district_values
+        self.district_default = district_default
+        self._it = 0
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data):
+        if self._it == len(self.paths):
+            return False
+        with np.load(self.paths[self._it], allow_pickle=False) as shard:
+            X, y, district = shard['X'], shard['y'], shard['district']
+        X[:, self.district_position] = pd.Series(district).map(self.district_values).fillna(self.district_default)
+        input_data(data=X, label=y)
+        self._it += 1
+        return True
+
+    def reset(self):
+        self._it = 0
@@ -0,0 +1,156 @@
+import argparse
+import multiprocessing as mp
+import pickle
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+from threadpoolctl import threadpool_limits
+
+from booster_model import find_onehot_groups
+
+# --- Configuration & Constants ---
+
+MODEL_FILE = 'model_pipeline.bin'
+
+N_REPEATS = 5
+CONFIDENCE = 0.95
+
+# Set in every worker process by _init_worker: the model and its own working copy of the data
+_worker = {}
+
+
+# --- Helper Functions ---
+
+def rmse(y, y_pred):
+    return float(np.sqrt(np.mean((y - y_pred) ** 2)))
+
+def single_threaded(model):
+    """
+    Sets every `n_jobs` parameter of an estimator or pipeline (e.g. RandomForestRegressor(n_jobs=-1),
+    XGBRegressor(n_jobs=8)) to 1, so a model inside a pool worker doesn't start its own pool over all cores.
+    """
+    if hasattr(model, 'get_params'):
+        n_jobs = {key: 1 for key in model.get_params() if key == 'n_jobs' or key.endswith('__n_jobs')}
+        if n_jobs:
+            model.set_params(**n_jobs)
+    return model
+
+def _init_worker(model, X, y, scoring):
+    # The pool already uses every core: keep the model's own pools (joblib, XGBoost's nthread) and
+    # OpenMP/BLAS single-threaded per worker. The worker's model is a copy, the caller's keeps its n_jobs.
+    threadpool_limits(1)
+    model = single_threaded(model)
+    # One copy of X per worker; every task permutes its columns in place and puts them back afterwards
+    _worker.update(model=model, X=X.copy(), y=y, scoring=scoring)
+
+def _column(X, column):
+    return X[column].to_numpy(copy=True) if isinstance(X, pd.DataFrame) else X[:, column].copy()
+
+def _set_column(X, column, values):
+    if isinstance(X, pd.DataFrame):
+        X[column] = values
+    else:
+        X[:, column] = values
+
+def _permuted_score(columns, seed):
+    """
+    Score with `columns` shuffled together (one row permutation shared by the whole group).
+    """
+    model, X, y, scoring = _worker['model'], _worker['X'], _worker['y'], _worker['scoring']
+    original = [_column(X, column) for column in columns]
+    perm = np.random.default_rng(seed).permutation(len(y))
+    try:
+        for column, values in zip(columns, original):
+            _set_column(X, column, values[perm])
+        return scoring(y, model.predict(X))
+    finally:
+        for column, values in zip(columns, original):
+            _set_column(X, column, values)
+
+
+# --- Permutation Importance ---
+
+def permutation_importance(model, X, y, groups=None, scoring=rmse, n_repeats=N_REPEATS, processes=None,
+                           random_state=1, confidence=CONFIDENCE):
+    """
+    Permutation importance of every feature (or feature group) for any fitted model with .predict.
+    Also used for the homework models by 06-trees/forest_importance.py.
+
+    Args:
+        model: Fitted estimator or pipeline, e.g. model_pipeline.
+        X (pd.DataFrame | np.ndarray): Evaluation features, in the columns the model expects.
+        y (array-like): Evaluation target.
+        groups (dict): Optional name -> list of columns permuted together (e.g. one-hot groups);
+            the remaining columns are permuted one by one.
+        scoring (callable): Loss (y, y_pred) -> float, lower is better. Defaults to RMSE.
+        n_repeats (int): Permutations per feature; also the sample size of the confidence interval.
+        processes (int): Size of the process pool running the (feature, repeat) tasks.
+        confidence (float): Level of the Student's t confidence interval of the mean importance.
+
+    Returns:
+        pd.DataFrame: feature, importance (mean loss increase), std, ci_low, ci_high, sorted by importance.
+    """
+    y = np.asarray(y)
+    columns = list(X.columns) if isinstance(X, pd.DataFrame) else list(range(X.shape[1]))
+    groups = dict(groups or {})
+    grouped = {column for group in groups.values() for column in group}
+    features = {**groups, **{column: [column] for column in columns if column not in grouped}}
+
+    baseline = scoring(y, model.predict(X))
+
+    # Independent seeds per (feature, repeat): results don't depend on the number of processes
+    seeds = np.random.SeedSequence(random_state).spawn(len(features) * n_repeats)
+    tasks = [(cols, seeds[i * n_repeats + r]) for i, cols in enumerate(features.values()) for r in range(n_repeats)]
+
+    with mp.Pool(processes, initializer=_init_worker, initargs=(model, X, y, scoring)) as pool:
+        scores = np.array(pool.starmap(_permuted_score, tasks)).reshape(len(features), n_repeats) - baseline
+
+    mean = scores.mean(axis=1)
+    std = scores.std(axis=1, ddof=1) if n_repeats > 1 else np.zeros(len(features))
+    half_width = stats.t.ppf((1 + confidence) / 2, max(n_repeats - 1, 1)) * std / np.sqrt(n_repeats)
+
+    df_importance = pd.DataFrame({
+        'feature': list(features),
+        'importance': mean,
+        'std': std,
+        'ci_low': mean - half_width,
+        'ci_high': mean + half_width,
+    })
+    df_importance.attrs['baseline'] = baseline
+    return df_importance.sort_values('importance', ascending=False, ignore_index=True)
+
+
+if __name__ == '__main__':
+    from sklearn.model_selection import train_test_split
+    from train import TRAINERS, load_data
+
+    parser = argparse.ArgumentParser(description='Permutation feature importance of the price model')
+    parser.add_argument('--data', default='mazowieckie-spring25.csv')
+    parser.add_argument('--training-data', action='store_true',
+                        help=f'score {MODEL_FILE} on all listings, i.e. mostly its own training data; overfitted '
+                             f'features then look important (default: train a fresh pipeline on 80%% of the data '
+                             f'and score the other 20%%)')
+    parser.add_argument('--repeats', type=int, default=N_REPEATS)
+    parser.add_argument('--processes', type=int, default=None)
+    args = parser.parse_args()
+
+    df = load_data(args.data)
+    if args.training_data:
+        with open(MODEL_FILE, 'rb') as f_in:
+            model_pipeline = pickle.load(f_in)
+    else:
+        df_train, df = train_test_split(df, test_size=0.2, random_state=1)
+        model_pipeline = TRAINERS['pipeline'](df_train)
+
+    X = df.drop(columns=['price', 'price_log']).reindex(columns=model_pipeline.feature_names_in_, fill_value=0)
+    X = X.reset_index(drop=True)
+
+    # One-hot dummies and the two coordinates only make sense permuted together
+    groups = {group: cols for group, cols in find_onehot_groups(X.columns).items() if cols}
+    groups['location'] = ['location_latitude', 'location_longitude']
+
+    df_importance = permutation_importance(model_pipeline, X, df['price_log'], groups=groups,
+                                           n_repeats=args.repeats, processes=args.processes)
+    print(f'Baseline RMSE (log price): {df_importance.attrs["baseline"]:.4f} on {len(X)} listings')
+    print(df_importance.round(4).to_string(index=False))
@@ -0,0 +1,185 @@
+import hashlib
+import os
+import threading
+import time
+import traceback
+
+from contextlib import contextmanager
+
+# --- Configuration & Constants ---
+
+# Seconds between checks of the model files (0 disables hot reload)
+RELOAD_INTERVAL = float(os.getenv('MODEL_RELOAD_INTERVAL', '10'))
+
+# How long a replaced model may keep serving in-flight requests before it is dropped anyway
+DRAIN_TIMEOUT = 30.0
+
+
+# --- Helper Functions ---
+
+def file_version(path: str) -> str:
+    """
+    Short content hash of a model file, identical on every pod serving the same artifact.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f_in:
+        for block in iter(lambda: f_in.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+def file_stats(paths):
+    return tuple(
+        (os.stat(path).st_mtime_ns, os.stat(path).st_size) if os.path.exists(path) else None
+        for path in paths
+    )
+
+
+# --- Hot Model ---
+
+class LoadedModel:
+    """
+    One loaded artifact plus the number of requests currently using it.
+    """
+
+    def __init__(self, model, version: str):
+        self.model = model
+        self.version = version
+        self.loaded_at = time.time()
+        self.in_flight = 0
+        self._idle = threading.Condition()
+
+    def enter(self):
+        with self._idle:
+            self.in_flight += 1
+
+    def exit(self):
+        with self._idle:
+            self.in_flight -= 1
+            if self.in_flight == 0:
+                self._idle.notify_all()
+
+    def drain(self, timeout: float = DRAIN_TIMEOUT):
+        with self._idle:
+            return self._idle.wait_for(lambda: self.in_flight == 0, timeout=timeout)
+
+    def drain_in_background(self, timeout: float = DRAIN_TIMEOUT, on_drained=None):
+        """
+        Waits for the in-flight requests on a separate thread, so the watcher isn't blocked for up to `timeout`,
+        then calls `on_drained(model)` if given.
+        """
+        def wait():
+            if not self.drain(timeout):
+                print(f'Model {self.version} still had {self.in_flight} requests after {timeout:.0f}s')
+            if on_drained is not None:
+                on_drained(self.model)
+
+        thread = threading.Thread(target=wait, name=f'drain-{self.version}', daemon=True)
+        thread.start()
+        return thread
+
+
+class HotModel:
+    """
+    Serves a model that is replaced without restarting the service.
+
+    A background thread polls the files in `paths` (mtime and size). When one changes, the new
+    model is loaded and warmed up in that thread, then swapped in with a single assignment;
+    requests already running finish on the old model, which a separate thread drops once they are done.
+    Write new artifacts to a temporary name and rename them into place, so a half-written file
+    is never picked up (a failed load keeps the current model and is retried on the next change).
+
+    Args:
+        load (callable): Returns (model, version).
+        paths (list): Files whose change triggers a reload.
+        warmup (callable): Called with a freshly loaded model before it receives traffic.
+        close (callable): Called with a replaced model once its requests are done, and by close();
+            for models holding processes or threads.
+    """
+
+    def __init__(self, load, paths, warmup=None, interval: float = RELOAD_INTERVAL, close=None):
+        self.load = load
+        self.paths = list(paths)
+        self.warmup = warmup
+        self.close_model = close
+        self.interval = interval
+
+        self.reloads = 0
+        self.reload_failures = 0
+
+        self._stats = file_stats(self.paths)
+        self._current = self._load()
+        self._thread = None
+
+    def _load(self):
+        model, version = self.load()
+        if self.warmup is not None:
+            self.warmup(model)
+        return LoadedModel(model, version)
+
+    @property
+    def current(self) -> LoadedModel:
+        return self._current
+
+    @contextmanager
+    def use(self):
+        """
+        Yields the active LoadedModel and keeps it alive until the block ends.
+        """
+        loaded = self._current
+        loaded.enter()
+        try:
+            yield loaded
+        finally:
+            loaded.exit()
+
+    def reload_if_changed(self):
+        stats = file_stats(self.paths)
+        if stats == self._stats:
+            return False
+        self._stats = stats
+
+        try:
+            new = self._load()
+        except Exception:
+            self.reload_failures += 1
+            traceback.print_exc()
+            return False
+
+        old, self._current = self._current, new
+        self.reloads += 1
+        print(f'Model reloaded: {old.version} -> {new.version}')
+
+        old.drain_in_background(on_drained=self.close_model)
+        return True
+
+    def start(self):
+        if self.interval <= 0 or self._thread is not None:
+            return
+
+        def watch():
+            while True:
+                time.sleep(self.interval)
+                self.reload_if_changed()
+
+        self._thread = threading.Thread(target=watch, name='model-reload', daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """
+        Releases the active model (on shutdown) through the `close` callback.
+        """
+        if self.close_model is not None:
+            self.close_model(self._current.model)
+
+    def metrics(self, name: str) -> str:
+        """
+        Prometheus text-format lines describing the active model.
+        """
+        current = self._current
+        return (
+            f'model_info{{model="{name}",version="{current.version}"}} 1\n'
+            f'model_loaded_timestamp_seconds{{model="{name}"}} {current.loaded_at:.0f}\n'
+            f'model_reloads_total{{model="{name}"}} {self.reloads}\n'
+            f'model_reload_failures_total{{model="{name}"}} {self.reload_failures}\n'
+            f'model_in_flight_requests{{model="{name}"}} {current.in_flight}\n'
+        )
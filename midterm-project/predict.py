@@ -1,13 +1,22 @@
+import os
 import pickle
+import time
+
+from contextlib import asynccontextmanager
 
 import pandas as pd
 import numpy as np
 import uvicorn
 
 from typing import Optional, Union, List, Dict, Any
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel, Field
 from transform import transform
+from compiled_model import COMPILED_MODEL_FILE, CompiledModel
+from comps import COMPS_INDEX_FILE, load_comps_index
+from model_reload import HotModel, file_version
+from shadow import create_shadow_scorer
 
 # request
 class Property(BaseModel):
@@ -48,21 +57,76 @@ class Property(BaseModel):
 # response
 class PredictResponce(BaseModel):
     predicted_price_pln: float
+    model_version: str
+
+class Comparable(BaseModel):
+    location_latitude: float
+    location_longitude: float
+    location_district: Optional[str] = None
+    area: float
+    roomsNum: Optional[float] = None
+    buildYear: Optional[float] = None
+    floor_numeric: Optional[float] = None
+    price: float
+    price_per_m2: float
+    distance: float  # similarity distance (location in km + weighted feature differences)
+
+class CompsResponse(BaseModel):
+    predicted_price_pln: float
+    model_version: str
+    comps: List[Comparable]
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+  yield
+  # Stop the shadow worker process together with the service
+  if shadow is not None:
+    shadow.close()
 
 # API created in FastAPI and exposed on port 9696
-app = FastAPI(title='price-prediction')
+app = FastAPI(title='price-prediction', lifespan=lifespan)
 
-with open('model_pipeline.bin', 'rb') as f_in:
-    model_pipeline = pickle.load(f_in)
+MODEL_FILE = 'model_pipeline.bin'
 
+def compiled_model_is_current():
+  # A compiled model older than model_pipeline.bin belongs to a previous training run
+  if not os.path.exists(COMPILED_MODEL_FILE):
+    return False
+  return not os.path.exists(MODEL_FILE) or os.path.getmtime(COMPILED_MODEL_FILE) >= os.path.getmtime(MODEL_FILE)
 
-@app.post("/predict")
-def predict(property_json: Property) -> PredictResponce:
+def load_model():
+  # Prefer the compiled predictor (python compiled_model.py) when it was exported from the current pipeline
+  if compiled_model_is_current():
+    return CompiledModel.load(COMPILED_MODEL_FILE), file_version(COMPILED_MODEL_FILE)
+
+  with open(MODEL_FILE, 'rb') as f_in:
+    return pickle.load(f_in), file_version(MODEL_FILE)
+
+def warmup_model(model):
+  # One prediction so the first real request doesn't pay for lazy initialisation
+  model.predict(pd.DataFrame(0.0, index=[0], columns=model.feature_names_in_))
+
+# Replacing model_compiled.npz / model_pipeline.bin swaps the model in the background (see model_reload.py)
+model = HotModel(load_model, [COMPILED_MODEL_FILE, MODEL_FILE], warmup=warmup_model)
+model.start()
+
+# Optional candidate model scored on a sample of live traffic in the background (SHADOW_MODEL, see shadow.py);
+# replacing the file swaps the candidate like the primary model
+shadow = create_shadow_scorer()
+if shadow is not None:
+  shadow.start()
+
+# Prebuilt comparable-listings index (written by train.py), loaded once at startup
+comps_index = load_comps_index(COMPS_INDEX_FILE) if os.path.exists(COMPS_INDEX_FILE) else None
+
+
+def prepare_property(property_json: Property) -> pd.DataFrame:
   data_dict = property_json.model_dump()
 
   property = pd.DataFrame([data_dict])
-  property_cleaned = transform(property).drop(columns=['price', 'price_log'], errors='ignore').reset_index(drop=True)
+  return transform(property).drop(columns=['price', 'price_log'], errors='ignore').reset_index(drop=True)
 
+def predict_price(property_cleaned: pd.DataFrame, model_pipeline) -> float:
   # Get the features the model is actually looking for
   model_features = model_pipeline.feature_names_in_
 
@@ -70,12 +134,57 @@ def predict(property_json: Property) -> PredictResponce:
   X_test = property_cleaned.reindex(columns=model_features, fill_value=0)
 
   log_prediction = model_pipeline.predict(X_test)[0]
-  prediction = np.expm1(log_prediction)
+  return float(np.expm1(log_prediction))
+
+def score_property(property_cleaned: pd.DataFrame):
+  with model.use() as active:
+    start = time.perf_counter()
+    prediction = predict_price(property_cleaned, active.model)
+    latency_ms = (time.perf_counter() - start) * 1000
+
+  # Hand the request to the shadow model only after the primary prediction is done
+  if shadow is not None:
+    with shadow.use() as candidate:
+      candidate.model.submit(property_cleaned, prediction, latency_ms)
+  return prediction, active.version
+
+
+@app.post("/predict")
+def predict(property_json: Property) -> PredictResponce:
+  prediction, version = score_property(prepare_property(property_json))
 
   print(f"Predicted Fair Value: {prediction:,.0f} PLN")
   return PredictResponce(
-      predicted_price_pln = prediction
+      predicted_price_pln = prediction,
+      model_version = version
   )
 
+@app.post("/comps")
+def comps(property_json: Property, k: int = Query(5, ge=1, le=50)) -> CompsResponse:
+  if comps_index is None:
+    raise HTTPException(status_code=503, detail=f"{COMPS_INDEX_FILE} not found, run train.py first")
+
+  property_cleaned = prepare_property(property_json)
+  prediction, version = score_property(property_cleaned)
+  comparables = comps_index.query(property_cleaned, k=k)[0]
+
+  return CompsResponse(
+      predicted_price_pln = prediction,
+      model_version = version,
+      comps = [Comparable(**comp) for comp in comparables]
+  )
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+  if shadow is None:
+    return model.metrics('price')
+  return model.metrics('price') + shadow.current.model.metrics('price')
+
+@app.get("/shadow")
+def shadow_stats():
+  if shadow is None:
+    raise HTTPException(status_code=404, detail="Shadow scoring is off, set SHADOW_MODEL to enable it")
+  return shadow.current.model.stats()
+
 if __name__ == '__main__':
     uvicorn.run(app, host="0.0.0.0", port=9696)
\ No newline at end of file
@@ -0,0 +1,325 @@
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+# --- Configuration & Constants ---
+
+CHUNK_ROWS = 100_000
+
+QUANTILES = [0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99]
+
+# t-digest compression: more centroids = more accurate quantiles (error mostly < 1/COMPRESSION of the range
+# around the median, far smaller in the tails)
+COMPRESSION = 200
+# HyperLogLog registers = 2**HLL_PRECISION; relative error of the distinct count ~ 1.04 / sqrt(registers)
+HLL_PRECISION = 14
+# Counters kept by Misra-Gries; counts are underestimated by at most rows / (HEAVY_HITTERS + 1)
+HEAVY_HITTERS = 64
+TOP_K = 10
+
+
+# --- Streaming Sketches ---
+
+class Moments:
+    """
+    Count, mean, variance (Welford / Chan merge of per-chunk moments), min and max.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values: np.ndarray):
+        n = len(values)
+        if n == 0:
+            return
+        mean = float(values.mean())
+        m2 = float(((values - mean) ** 2).sum())
+
+        total = self.n + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta ** 2 * self.n * n / total
+        self.n = total
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    def std(self):
+        return float(np.sqrt(self.m2 / (self.n - 1))) if self.n > 1 else None
+
+
+class TDigest:
+    """
+    Merging t-digest: centroids (mean, weight) kept small where quantiles are extreme.
+
+    Each chunk is sorted together with the existing centroids and compressed in one vectorized step:
+    a centroid's bucket is floor(k(q)) of the k1 scale function at its cumulative weight q, and every
+    bucket is collapsed into a single weighted centroid.
+    """
+
+    def __init__(self, compression: int = COMPRESSION):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = np.inf
+        self.max = -np.inf
+
+    def _scale(self, q):
+        return self.compression / (2 * np.pi) * np.arcsin(2 * np.clip(q, 0, 1) - 1)
+
+    def update(self, values: np.ndarray):
+        if len(values) == 0:
+            return
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+        means = np.concatenate([self.means, values])
+        weights = np.concatenate([self.weights, np.ones(len(values))])
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+
+        cumulative = np.cumsum(weights)
+        q_start = (cumulative - weights) / cumulative[-1]
+        buckets = np.floor(self._scale(q_start) - self._scale(0.0)).astype(np.int64)
+
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+
+    def quantile(self, q: float):
+        if len(self.means) == 0:
+            return None
+        # Centroid means sit at the middle of their weight; interpolate between them and the exact min/max
+        cumulative = np.cumsum(self.weights)
+        midpoints = (cumulative - self.weights / 2) / cumulative[-1]
+        positions = np.r_[0.0, midpoints, 1.0]
+        values = np.r_[self.min, self.means, self.max]
+        return float(np.interp(q, positions, values))
+
+
+class HyperLogLog:
+    """
+    Approximate distinct count from 2**precision one-byte registers, fed with pandas' vectorized hashes.
+    """
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(2 ** precision, dtype=np.uint8)
+
+    def update(self, values: pd.Series):
+        if len(values) == 0:
+            return
+        hashes = pd.util.hash_array(values.to_numpy())
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.intp)
+        rest = hashes & np.uint64((1 << (64 - self.precision)) - 1)
+
+        # Rank = position of the first 1 bit in the remaining bits; they fit exactly in a float64 mantissa
+        bit_length = np.frexp(rest.astype(np.float64))[1]
+        rank = (64 - self.precision - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(2.0 ** -self.registers.astype(np.float64))
+
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is far more accurate for small cardinalities
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+
+class MisraGries:
+    """
+    Top-k heavy hitters: at most `capacity` counters, merged chunk by chunk from value_counts().
+    """
+
+    def __init__(self, capacity: int = HEAVY_HITTERS):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype=np.int64)
+
+    def update(self, values: pd.Series):
+        counts = self.counts.add(values.value_counts(), fill_value=0)
+        if len(counts) > self.capacity:
+            # Subtract the (capacity + 1)-th largest count from all counters and drop the ones that hit 0
+            cutoff = np.partition(counts.to_numpy(), -(self.capacity + 1))[-(self.capacity + 1)]
+            counts = counts[counts > cutoff] - cutoff
+        self.counts = counts.astype(np.int64)
+
+    def top(self, k: int = TOP_K):
+        return self.counts.sort_values(ascending=False, kind='stable').head(k)
+
+
+# --- Helper Functions ---
+
+def _to_json_value(value):
+    if isinstance(value, (np.integer, np.floating)):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
+
+def parse_group_max(specs):
+    """
+    ['origin:fuel_efficiency_mpg', ...] -> [('origin', 'fuel_efficiency_mpg'), ...]
+    """
+    return [tuple(spec.split(':', 1)) for spec in specs or []]
+
+
+class ColumnProfile:
+    def __init__(self, numeric: bool, top_k: int = TOP_K):
+        self.numeric = numeric
+        self.top_k = top_k
+        self.rows = 0
+        self.nulls = 0
+        self.invalid = 0  # values that did not parse as numbers in a numeric column
+        self.distinct = HyperLogLog()
+        self.heavy_hitters = MisraGries()
+        if numeric:
+            self.moments = Moments()
+            self.digest = TDigest()
+
+    def update(self, series: pd.Series):
+        self.rows += len(series)
+        present = series.dropna()
+        self.nulls += len(series) - len(present)
+
+        if self.numeric:
+            numbers = pd.to_numeric(present, errors='coerce')
+            self.invalid += int(numbers.isna().sum())
+            values = numbers.dropna().to_numpy(dtype=np.float64)
+            self.moments.update(values)
+            self.digest.update(values)
+            # Chunks of one column can parse as int64 or float64 (e.g. only some contain NaN); hash_array
+            # hashes 5 and 5.0 differently, so every chunk is counted as float64
+            present = pd.Series(values)
+
+        self.distinct.update(present)
+        self.heavy_hitters.update(present)
+
+    def to_dict(self):
+        top = self.heavy_hitters.top(self.top_k)
+        profile = {
+            'type': 'numeric' if self.numeric else 'categorical',
+            'rows': self.rows,
+            'nulls': self.nulls,
+            'has_nulls': self.nulls > 0,
+            'distinct_approx': self.distinct.count(),
+            'mode': _to_json_value(top.index[0]) if len(top) else None,
+            'top_values': [{'value': _to_json_value(v), 'count_min': int(c)} for v, c in top.items()],
+        }
+        if self.numeric:
+            profile.update({
+                'invalid': self.invalid,
+                'mean': _to_json_value(self.moments.mean) if self.moments.n else None,
+                'std': self.moments.std(),
+                'min': _to_json_value(self.moments.min),
+                'max': _to_json_value(self.moments.max),
+                'quantiles_approx': {str(q): self.digest.quantile(q) for q in QUANTILES},
+            })
+        return profile
+
+
+# --- Profiling ---
+
+def profile_csv(path: str, chunksize: int = CHUNK_ROWS, usecols=None, group_max=None, top_k: int = TOP_K):
+    """
+    Profiles a CSV in one pass over fixed-size chunks; memory does not grow with the file size.
+
+    Args:
+        path (str): CSV file.
+        chunksize (int): Rows read per chunk.
+        usecols (list): Optional subset of columns.
+        group_max (list): Optional (group column, value column) pairs; the maximum of the value
+            column per group, e.g. ('origin', 'fuel_efficiency_mpg').
+        top_k (int): Heavy hitters reported per column.
+
+    Returns:
+        dict: JSON-serializable profile.
+    """
+    start = time.perf_counter()
+    columns = None
+    group_max = list(group_max or [])
+    maxima = {pair: pd.Series(dtype=np.float64) for pair in group_max}
+    rows = chunks = 0
+
+    for chunk in pd.read_csv(path, chunksize=chunksize, usecols=usecols, low_memory=False):
+        if columns is None:
+            # Column kinds are fixed by the first chunk; later non-numeric values count as 'invalid'
+            columns = {
+                name: ColumnProfile(pd.api.types.is_numeric_dtype(chunk[name]), top_k)
+                for name in chunk.columns
+            }
+        for name, column in columns.items():
+            column.update(chunk[name])
+
+        for (group, value), current in maxima.items():
+            chunk_max = pd.to_numeric(chunk[value], errors='coerce').groupby(chunk[group]).max()
+            maxima[(group, value)] = current.combine(chunk_max, max, fill_value=-np.inf)
+
+        rows += len(chunk)
+        chunks += 1
+
+    profile = {
+        'file': path,
+        'rows': rows,
+        'chunks': chunks,
+        'seconds': round(time.perf_counter() - start, 3),
+        'columns_with_nulls': sum(column.nulls > 0 for column in (columns or {}).values()),
+        'columns': {name: column.to_dict() for name, column in (columns or {}).items()},
+    }
+    if group_max:
+        profile['group_max'] = {
+            f'{value} by {group}': {str(k): _to_json_value(v) for k, v in maxima[(group, value)].items()}
+            for group, value in group_max
+        }
+    return profile
+
+def exact_profile(path: str, usecols=None):
+    """
+    The same statistics with full-frame pandas (reads the whole file), for checking the sketches.
+    """
+    df = pd.read_csv(path, usecols=usecols, low_memory=False)
+    return {
+        name: {
+            'nulls': int(df[name].isna().sum()),
+            'distinct': int(df[name].nunique()),
+            'mode': _to_json_value(df[name].mode().iloc[0]) if df[name].notna().any() else None,
+            'median': float(df[name].median()) if pd.api.types.is_numeric_dtype(df[name]) else None,
+        }
+        for name in df.columns
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Single-pass column profile of a (large) CSV file')
+    parser.add_argument('path', help='e.g. mazowieckie-spring25.csv or ../01-intro/car_fuel_efficiency.csv')
+    parser.add_argument('--output', default=None, help='JSON file (default: <csv name>.profile.json)')
+    parser.add_argument('--chunksize', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--group-max', nargs='*', default=[], metavar='GROUP:VALUE',
+                        help='max of VALUE per GROUP, e.g. origin:fuel_efficiency_mpg')
+    parser.add_argument('--check', action='store_true', help='compare with exact pandas statistics')
+    args = parser.parse_args()
+
+    profile = profile_csv(args.path, args.chunksize, group_max=parse_group_max(args.group_max))
+    output = args.output or args.path.rsplit('.', 1)[0] + '.profile.json'
+    with open(output, 'w') as f_out:
+        json.dump(profile, f_out, indent=2, ensure_ascii=False)
+    print(f'{profile["rows"]} rows, {len(profile["columns"])} columns in {profile["seconds"]} s -> {output}')
+
+    if args.check:
+        exact = exact_profile(args.path)
+        print(f'{"column":<28} {"nulls":>12} {"distinct (approx/exact)":>24} {"median (approx/exact)":>26}  mode ok')
+        for name, stats in profile['columns'].items():
+            median = stats.get('quantiles_approx', {}).get('0.5')
+            median_text = f'{median:.4g} / {exact[name]["median"]:.4g}' if median is not None else '-'
+            print(f'{name[:28]:<28} {stats["nulls"]:>5} / {exact[name]["nulls"]:<5} '
+                  f'{stats["distinct_approx"]:>11} / {exact[name]["distinct"]:<10} {median_text:>26}  '
+                  f'{stats["mode"] == exact[name]["mode"]}')
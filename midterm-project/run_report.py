@@ -0,0 +1,144 @@
+import json
+import os
+import platform
+import resource
+import sys
+import threading
+import time
+
+from contextlib import contextmanager
+from importlib import metadata
+
+# --- Configuration & Constants ---
+
+PACKAGES = ['numpy', 'pandas', 'scikit-learn', 'category-encoders', 'xgboost']
+
+# How often the background thread samples the current RSS while a stage is running
+RSS_SAMPLE_INTERVAL_S = 0.01
+
+
+# --- Helper Functions ---
+
+def current_rss_mb():
+    """
+    Current resident set size in MB (Linux only, None elsewhere).
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+    except OSError:
+        return None
+    return resident_pages * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+
+def max_rss_mb():
+    """
+    Process-wide peak RSS in MB (ru_maxrss is in kilobytes on Linux, bytes on macOS).
+    """
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / 1024 ** 2 if sys.platform == 'darwin' else max_rss / 1024
+
+def package_versions():
+    versions = {}
+    for package in PACKAGES:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return versions
+
+def thread_info():
+    info = {
+        'cpu_count': os.cpu_count(),
+        'affinity': len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else None,
+        'OMP_NUM_THREADS': os.environ.get('OMP_NUM_THREADS'),
+    }
+    try:
+        from threadpoolctl import threadpool_info
+        info['threadpools'] = [
+            {'user_api': pool['user_api'], 'internal_api': pool['internal_api'], 'num_threads': pool['num_threads']}
+            for pool in threadpool_info()
+        ]
+    except ImportError:
+        info['threadpools'] = None
+    return info
+
+
+class _RssSampler(threading.Thread):
+    """
+    Samples the current RSS in the background to get the peak of a single stage.
+    """
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.peak = current_rss_mb()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(RSS_SAMPLE_INTERVAL_S):
+            rss = current_rss_mb()
+            if rss is not None:
+                self.peak = max(self.peak, rss)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        rss = current_rss_mb()
+        if rss is not None:
+            self.peak = max(self.peak, rss)
+        return self.peak
+
+
+# --- Run Report ---
+
+class RunReport:
+    """
+    Collects wall time and memory per training stage plus run metadata, saved as JSON.
+    """
+
+    def __init__(self):
+        self.started_at = time.strftime('%Y-%m-%dT%H:%M:%S%z')
+        self.stages = {}
+        self.info = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        rss_start = current_rss_mb()
+        sampler = _RssSampler() if rss_start is not None else None
+        if sampler is not None:
+            sampler.start()
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall_time = time.perf_counter() - start
+            peak = sampler.stop() if sampler is not None else None
+            self.stages[name] = {
+                'wall_time_s': round(wall_time, 3),
+                'rss_start_mb': _round(rss_start),
+                'peak_rss_mb': _round(peak),
+                'process_max_rss_mb': _round(max_rss_mb()),
+            }
+            print(f'[{name}] {wall_time:.2f}s, peak RSS {_round(peak)} MB')
+
+    def add(self, **info):
+        self.info.update(info)
+
+    def to_dict(self):
+        return {
+            'started_at': self.started_at,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'packages': package_versions(),
+            'threads': thread_info(),
+            'stages': self.stages,
+            **self.info,
+        }
+
+    def save(self, path: str):
+        with open(path, 'w') as f_out:
+            json.dump(self.to_dict(), f_out, indent=2, default=float)
+
+
+def _round(value, digits=1):
+    return None if value is None else round(value, digits)
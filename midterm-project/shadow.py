@@ -0,0 +1,278 @@
+import importlib.util
+import os
+import pickle
+import random
+import subprocess
+import sys
+import threading
+import time
+import traceback
+
+from collections import deque
+
+import numpy as np
+
+from model_reload import HotModel, file_version
+
+# --- Configuration & Constants ---
+
+# Path of the candidate model (model_pipeline.bin-style pickle or model_compiled.npz); unset = no shadow scoring
+SHADOW_MODEL = os.getenv('SHADOW_MODEL')
+# Fraction of requests that are also scored by the shadow model
+SHADOW_SAMPLE_RATE = float(os.getenv('SHADOW_SAMPLE_RATE', '0.1'))
+# Shadow predictions allowed to wait or run at once; further samples are dropped, never queued
+SHADOW_MAX_PENDING = int(os.getenv('SHADOW_MAX_PENDING', '4'))
+
+# Number of recent comparisons the statistics are computed over
+STATS_WINDOW = 10_000
+
+
+# --- Helper Functions ---
+
+def load_shadow_model(path: str):
+    if path.endswith('.npz'):
+        from compiled_model import CompiledModel
+        return CompiledModel.load(path)
+    with open(path, 'rb') as f_in:
+        return pickle.load(f_in)
+
+def check_shadow_model(path: str):
+    """
+    Fails at startup for a candidate the serving image can't load, instead of on every sampled request.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    if not path.endswith('.npz') and importlib.util.find_spec('xgboost') is None:
+        raise RuntimeError(
+            f'SHADOW_MODEL={path} is a pickled pipeline and needs xgboost, which this image does not install; '
+            'export the candidate with compiled_model.py and shadow the .npz instead'
+        )
+
+def _percentiles(values):
+    if len(values) == 0:
+        return None
+    p50, p95, p99 = np.percentile(np.asarray(values), [50, 95, 99])
+    return {'p50': round(float(p50), 3), 'p95': round(float(p95), 3), 'p99': round(float(p99), 3)}
+
+
+# --- Shadow Worker Process ---
+
+def run_worker(path: str):
+    """
+    Body of the `python shadow.py --worker PATH` process: reads pickled feature frames from stdin and
+    writes back (shadow price, latency ms), or None when the prediction failed.
+    """
+    # Results get their own copy of stdout; stray prints of the model libraries go to stderr
+    results = os.fdopen(os.dup(sys.stdout.fileno()), 'wb')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    requests = sys.stdin.buffer
+
+    # Let the OS prefer the serving process whenever both want the CPU
+    try:
+        os.nice(19)
+    except OSError:
+        pass
+
+    model = load_shadow_model(path)
+    pickle.dump('ready', results)
+    results.flush()
+
+    while True:
+        try:
+            X = pickle.load(requests)
+        except EOFError:
+            return  # the serving process is gone
+        try:
+            start = time.perf_counter()
+            X_shadow = X.reindex(columns=model.feature_names_in_, fill_value=0)
+            result = (float(np.expm1(model.predict(X_shadow)[0])), (time.perf_counter() - start) * 1000)
+        except Exception:
+            traceback.print_exc()
+            result = None
+        pickle.dump(result, results)
+        results.flush()
+
+
+# --- Shadow Scorer ---
+
+class ShadowScorer:
+    """
+    Scores a sample of live requests with a candidate model, off the response path.
+
+    The candidate runs in its own low-priority worker process (`python shadow.py --worker`), so its
+    predictions never compete with the request threads for the GIL. The request thread only draws
+    the sample and queues the already transformed features; two threads of the serving process
+    pipe them to the worker and read back the results. At most `max_pending` shadow predictions
+    wait or run at once; when they are all taken the sample is dropped (and counted), so a slow
+    candidate model can never build up a backlog or hold up real callers. close() stops the worker
+    and both threads; samples submitted after it are ignored.
+    """
+
+    def __init__(self, path: str, version: str, sample_rate: float = SHADOW_SAMPLE_RATE,
+                 max_pending: int = SHADOW_MAX_PENDING):
+        check_shadow_model(path)
+        self.version = version
+        self.sample_rate = sample_rate
+
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._pending = deque()  # (features, primary price, primary latency) in the order they were sent
+        self._outbox = deque()
+        self._outbox_ready = threading.Condition()
+        self._closed = False
+
+        self.sampled = 0
+        self.dropped = 0
+        self.errors = 0
+        self.delta_pct = deque(maxlen=STATS_WINDOW)  # (shadow / primary - 1) * 100 per request
+        self.primary_latency_ms = deque(maxlen=STATS_WINDOW)
+        self.shadow_latency_ms = deque(maxlen=STATS_WINDOW)
+
+        self._process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), '--worker', path],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+        )
+        try:
+            ready = pickle.load(self._process.stdout)
+        except EOFError:
+            ready = None
+        if ready != 'ready':
+            self._process.kill()
+            raise RuntimeError(f'Shadow model {path} failed to load, see the worker traceback above')
+
+        self._threads = [
+            threading.Thread(target=self._send, name='shadow-send', daemon=True),
+            threading.Thread(target=self._receive, name='shadow-receive', daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, X, primary_price: float, primary_latency_ms: float):
+        """
+        Called on the request thread after the primary prediction; never blocks.
+        """
+        if self._closed or random.random() >= self.sample_rate:
+            return
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.dropped += 1
+            return
+
+        with self._lock:
+            self.sampled += 1
+        with self._outbox_ready:
+            self._outbox.append((X, primary_price, primary_latency_ms))
+            self._outbox_ready.notify()
+
+    def _send(self):
+        while True:
+            with self._outbox_ready:
+                self._outbox_ready.wait_for(lambda: self._outbox or self._closed)
+                if self._closed:
+                    return
+                item = self._outbox.popleft()
+            self._pending.append(item)
+            try:
+                pickle.dump(item[0], self._process.stdin)
+                self._process.stdin.flush()
+            except OSError:
+                return  # worker exited; _receive reports it
+
+    def _receive(self):
+        while True:
+            try:
+                result = pickle.load(self._process.stdout)
+            except EOFError:
+                if not self._closed:
+                    print(f'Shadow worker exited with code {self._process.wait()}, shadow scoring stopped')
+                return
+            try:
+                _, primary_price, primary_latency_ms = self._pending.popleft()
+                with self._lock:
+                    if result is None:
+                        self.errors += 1
+                    else:
+                        shadow_price, latency_ms = result
+                        self.delta_pct.append((shadow_price / primary_price - 1) * 100)
+                        self.primary_latency_ms.append(primary_latency_ms)
+                        self.shadow_latency_ms.append(latency_ms)
+            except Exception:
+                with self._lock:
+                    self.errors += 1
+                traceback.print_exc()
+            finally:
+                # A failed comparison must not leak its slot, or sampling stops once all are gone
+                self._slots.release()
+
+    def close(self, timeout: float = 5.0):
+        """
+        Stops the worker process (EOF on its stdin, killed if it doesn't exit within `timeout`) and joins both threads.
+        """
+        with self._outbox_ready:
+            if self._closed:
+                return
+            self._closed = True
+            self._outbox_ready.notify_all()
+        try:
+            self._process.stdin.close()
+        except OSError:
+            pass
+        try:
+            self._process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+            self._process.wait()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._process.stdout.close()
+
+    def stats(self):
+        with self._lock:
+            deltas = list(self.delta_pct)
+            primary = list(self.primary_latency_ms)
+            shadow = list(self.shadow_latency_ms)
+            counts = {'sampled': self.sampled, 'dropped': self.dropped, 'errors': self.errors}
+
+        abs_deltas = np.abs(deltas)
+        return {
+            'shadow_version': self.version,
+            'sample_rate': self.sample_rate,
+            **counts,
+            'compared': len(deltas),
+            'delta_pct_mean': round(float(np.mean(deltas)), 4) if deltas else None,
+            'abs_delta_pct': _percentiles(abs_deltas),
+            'primary_latency_ms': _percentiles(primary),
+            'shadow_latency_ms': _percentiles(shadow),
+        }
+
+    def metrics(self, name: str) -> str:
+        """
+        Prometheus text-format counters of the shadow scoring.
+        """
+        with self._lock:
+            return (
+                f'shadow_info{{model="{name}",version="{self.version}"}} 1\n'
+                f'shadow_sampled_total{{model="{name}"}} {self.sampled}\n'
+                f'shadow_dropped_total{{model="{name}"}} {self.dropped}\n'
+                f'shadow_errors_total{{model="{name}"}} {self.errors}\n'
+            )
+
+
+def create_shadow_scorer():
+    """
+    HotModel serving a ShadowScorer for SHADOW_MODEL, or None when shadow scoring is not configured.
+    Replacing the file starts a scorer for the new candidate; the old one is closed once its requests are done.
+    """
+    if not SHADOW_MODEL:
+        return None
+    def load():
+        version = file_version(SHADOW_MODEL)
+        return ShadowScorer(SHADOW_MODEL, version), version
+
+    return HotModel(load, [SHADOW_MODEL], close=ShadowScorer.close)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3 or sys.argv[1] != '--worker':
+        sys.exit('usage: python shadow.py --worker MODEL_PATH (started by ShadowScorer)')
+    run_worker(sys.argv[2])
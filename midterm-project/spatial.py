@@ -0,0 +1,146 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.neighbors import BallTree
+
+# --- Configuration & Constants ---
+
+EARTH_RADIUS_KM = 6371.0
+
+COORDINATE_COLUMNS = ['location_latitude', 'location_longitude']
+SPATIAL_FEATURES = ['knn_price_per_m2', 'listing_density']
+
+
+# --- Helper Functions ---
+
+def coordinates_radians(X: pd.DataFrame):
+    # Column-wise access is much cheaper than X[COORDINATE_COLUMNS] for single-row frames
+    return np.radians(np.column_stack([X[col].to_numpy(dtype=np.float64) for col in COORDINATE_COLUMNS]))
+
+
+# --- Spatial Features ---
+
+class SpatialFeatures(BaseEstimator, TransformerMixin):
+    """
+    Neighbourhood features from a BallTree (haversine metric) over the training listings.
+
+    Adds two columns to the transform() output:
+        * knn_price_per_m2: median price per m² of the k nearest training listings.
+        * listing_density: number of training listings within `radius_km`.
+
+    The tree is built once in fit() and pickled together with the model pipeline,
+    so inference only runs a batched tree query. During fit_transform() every listing
+    is excluded from its own neighbourhood, otherwise the feature would leak its own price.
+
+    Args:
+        k (int): Number of neighbours for the median price per m².
+        radius_km (float): Radius for the listing density.
+    """
+
+    def __init__(self, k: int = 10, radius_km: float = 1.0):
+        self.k = k
+        self.radius_km = radius_km
+
+    def fit(self, X: pd.DataFrame, y):
+        coords = coordinates_radians(X)
+        price_per_m2 = np.expm1(np.asarray(y, dtype=np.float64)) / X['area'].to_numpy(dtype=np.float64)
+
+        # Listings without coordinates or a usable price per m² can't be neighbours
+        valid = np.isfinite(coords).all(axis=1) & np.isfinite(price_per_m2)
+
+        self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        self.train_index_ = np.flatnonzero(valid)
+        self.coords_ = coords[valid]
+        self.price_per_m2_ = price_per_m2[valid].astype(np.float32)
+        self.tree_ = BallTree(self.coords_, metric='haversine')
+        return self
+
+    @classmethod
+    def from_index(cls, coords: np.ndarray, price_per_m2: np.ndarray, k: int = 10, radius_km: float = 1.0):
+        """
+        Rebuilds a fitted instance from stored coordinates (radians) and prices per m², e.g. from an .npz artifact.
+        """
+        spatial = cls(k=k, radius_km=radius_km)
+        spatial.coords_ = np.asarray(coords, dtype=np.float64)
+        spatial.price_per_m2_ = np.asarray(price_per_m2, dtype=np.float32)
+        spatial.train_index_ = np.arange(len(spatial.coords_))
+        spatial.tree_ = BallTree(spatial.coords_, metric='haversine')
+        return spatial
+
+    def transform(self, X: pd.DataFrame):
+        return self._add_features(X, exclude_self=False)
+
+    def fit_transform(self, X: pd.DataFrame, y=None, **fit_params):
+        return self.fit(X, y)._add_features(X, exclude_self=True)
+
+    def query(self, coords: np.ndarray, exclude_self: bool = False):
+        """
+        Batched neighbourhood lookup for coordinates in radians.
+
+        Args:
+            coords (np.ndarray): (n, 2) latitude/longitude in radians, all finite.
+            exclude_self (bool): True when `coords` are the training listings themselves, in the same order.
+
+        Returns:
+            tuple: (knn_price_per_m2, listing_density) arrays of length n.
+        """
+        k = min(self.k + exclude_self, len(self.coords_))
+        ind = self.tree_.query(coords, k=k, return_distance=False)
+        density = self.tree_.query_radius(coords, r=self.radius_km / EARTH_RADIUS_KM, count_only=True)
+
+        if exclude_self:
+            # Drop the listing itself (or, on exact duplicates, the farthest neighbour)
+            keep = ind != np.arange(len(coords))[:, None]
+            keep[keep.all(axis=1), -1] = False
+            ind = ind[keep].reshape(len(coords), k - 1)
+            density = density - 1
+
+        return np.median(self.price_per_m2_[ind], axis=1), density
+
+    def _add_features(self, X: pd.DataFrame, exclude_self: bool):
+        if exclude_self:
+            # Training rows map 1:1 onto the tree, so tree positions are the "self" index
+            valid = np.zeros(len(X), dtype=bool)
+            valid[self.train_index_] = True
+            coords = self.coords_
+        else:
+            coords = coordinates_radians(X)
+            valid = np.isfinite(coords).all(axis=1)
+            coords = coords[valid]
+
+        knn_price = np.full(len(X), np.nan)
+        density = np.full(len(X), np.nan)
+        if valid.any():
+            knn_price[valid], density[valid] = self.query(coords, exclude_self=exclude_self)
+
+        features = pd.DataFrame({SPATIAL_FEATURES[0]: knn_price, SPATIAL_FEATURES[1]: density}, index=X.index)
+        return pd.concat([X, features], axis=1)
+
+
+if __name__ == "__main__":
+    # Build the index on the local CSV and time batched inference queries
+    from transform import transform
+
+    print("Building spatial index on local CSV...")
+    df = transform(pd.read_csv('mazowieckie-spring25.csv'))
+    X, y = df.drop(columns=['price', 'price_log']), df['price_log']
+
+    start = time.perf_counter()
+    spatial = SpatialFeatures().fit(X, y)
+    print(f"Index built on {len(spatial.coords_)} listings in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    for batch_size in [1, 100, 1000]:
+        batch = X.sample(batch_size, replace=len(X) < batch_size, random_state=1)
+        coords = coordinates_radians(batch)
+        for name, run in [('query', lambda: spatial.query(coords)), ('transform', lambda: spatial.transform(batch))]:
+            run()
+            timings = []
+            for _ in range(20):
+                start = time.perf_counter()
+                run()
+                timings.append((time.perf_counter() - start) * 1000)
+            elapsed_ms = float(np.median(timings))
+            print(f"{name:>9} batch of {batch_size}: {elapsed_ms:.2f} ms ({elapsed_ms / batch_size:.4f} ms per listing)")
@@ -0,0 +1,50 @@
+from unittest import mock
+
+import numpy as np
+import pytest
+
+import train
+from compiled_model import CompiledModel, check_parity, compile_pipeline, export_compiled_model
+
+ATOL = 1e-4  # log price, same tolerance as the export check
+
+
+@pytest.fixture(scope='module')
+def model_pipeline(listings):
+    with mock.patch.dict(train.XGB_PARAMS, n_estimators=100):
+        return train.train_model(listings)
+
+@pytest.fixture(scope='module')
+def X(listings, model_pipeline):
+    X = listings.drop(columns=['price', 'price_log']).reindex(columns=model_pipeline.feature_names_in_, fill_value=0)
+    X = X.copy()
+    # Missing values take the trees' default direction, unseen districts the encoder's fallback
+    X.loc[::7, 'buildYear'] = np.nan
+    X.loc[::11, 'roomsNum'] = np.nan
+    X.loc[::5, 'location_district'] = None
+    X.loc[::13, 'location_district'] = 'Nowa Dzielnica'
+    return X
+
+
+def test_compiled_matches_pipeline(model_pipeline, X):
+    compiled = compile_pipeline(model_pipeline)
+    np.testing.assert_allclose(compiled.predict(X), model_pipeline.predict(X), rtol=0, atol=ATOL)
+
+def test_single_rows_match_pipeline(model_pipeline, X):
+    compiled = compile_pipeline(model_pipeline)
+    for i in range(0, 200, 17):
+        row = X.iloc[[i]]
+        np.testing.assert_allclose(compiled.predict(row), model_pipeline.predict(row), rtol=0, atol=ATOL)
+
+def test_saved_model_round_trip(model_pipeline, X, tmp_path):
+    path = tmp_path / 'model_compiled.npz'
+    compiled = export_compiled_model(model_pipeline, X, path=str(path))
+    loaded = CompiledModel.load(str(path))
+    np.testing.assert_array_equal(loaded.predict(X), compiled.predict(X))
+    assert check_parity(model_pipeline, loaded, X) <= ATOL
+
+def test_export_removes_stale_file_for_other_modes(tmp_path):
+    path = tmp_path / 'model_compiled.npz'
+    path.write_bytes(b'stale')
+    assert export_compiled_model(object(), path=str(path)) is None
+    assert not path.exists()
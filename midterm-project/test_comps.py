@@ -0,0 +1,20 @@
+import numpy as np
+
+from comps import build_comps_index
+
+
+def test_listings_without_location_area_or_price_are_not_comparables(listings):
+    df = listings.copy()
+    df.loc[0:9, 'price'] = np.nan
+    df.loc[10:19, 'area'] = np.nan
+    df.loc[20:29, 'location_latitude'] = np.nan
+    df.loc[30:39, 'area'] = 0
+
+    comps_index = build_comps_index(df)
+    comps = comps_index.query(df.head(50), k=20)
+
+    assert comps_index.tree.data.shape[0] == len(df) - 40
+    for row in comps:
+        for comp in row:
+            for key in ['location_latitude', 'location_longitude', 'area', 'price', 'price_per_m2']:
+                assert comp[key] is not None and np.isfinite(comp[key])
@@ -0,0 +1,35 @@
+import category_encoders as ce
+import numpy as np
+import pandas as pd
+
+from external_memory import DISTRICT_COLUMN, StreamingTargetEncoder
+
+
+def test_streaming_encoder_matches_target_encoder(listings):
+    X = listings[[DISTRICT_COLUMN]].copy()
+    y = listings['price_log']
+    # Districts around min_samples_leaf, where the smoothing parameter matters
+    X.iloc[:15, 0] = 'Wawer'
+    X.iloc[15:40, 0] = 'Wesoła'
+    X.iloc[40:45, 0] = 'Rembertów'
+
+    streaming = StreamingTargetEncoder()
+    for chunk in np.array_split(np.arange(len(X)), 7):
+        streaming.update(X[DISTRICT_COLUMN].to_numpy(dtype=object)[chunk], y.to_numpy()[chunk])
+
+    encoder = ce.TargetEncoder(cols=[DISTRICT_COLUMN], handle_unknown='value', handle_missing='value').fit(X, y)
+    districts = sorted(streaming.values())
+    expected = encoder.transform(pd.DataFrame({DISTRICT_COLUMN: districts}))[DISTRICT_COLUMN].to_numpy()
+
+    np.testing.assert_allclose([streaming.values()[d] for d in districts], expected, rtol=0, atol=1e-9)
+    assert abs(streaming.prior() - y.mean()) < 1e-9
+
+def test_small_districts_shrink_to_the_prior(listings):
+    # Below min_samples_leaf the default smoothing (10) keeps a district close to the overall mean
+    y = listings['price_log'].to_numpy()
+    streaming = StreamingTargetEncoder()
+    streaming.update(['Mokotów'] * 5 + ['Wola'] * (len(y) - 5), np.r_[y[:5] + 1.0, y[5:]])
+
+    encoded, prior = streaming.values()['Mokotów'], streaming.prior()
+    mean = (y[:5] + 1.0).mean()
+    assert abs(encoded - prior) < 0.25 * abs(mean - prior)
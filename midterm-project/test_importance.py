@@ -0,0 +1,22 @@
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+
+from importance import permutation_importance, single_threaded
+
+
+def test_model_in_workers_is_single_threaded():
+    forest = RandomForestRegressor(n_estimators=5, n_jobs=-1)
+    assert single_threaded(forest).n_jobs == 1
+
+def test_importance_ranks_signal_over_noise():
+    rng = np.random.default_rng(1)
+    X = pd.DataFrame({'signal': rng.normal(size=500), 'noise': rng.normal(size=500)})
+    y = 3 * X['signal'] + rng.normal(0, 0.1, 500)
+    forest = RandomForestRegressor(n_estimators=10, random_state=1, n_jobs=-1).fit(X, y)
+
+    df_importance = permutation_importance(forest, X, y, n_repeats=3, processes=2)
+    assert list(df_importance['feature']) == ['signal', 'noise']
+    assert df_importance['importance'].iloc[0] > 1.0
+    # The caller's model keeps its own setting
+    assert forest.n_jobs == -1
@@ -0,0 +1,49 @@
+import os
+import time
+
+from model_reload import HotModel
+
+
+def write(path, text):
+    with open(path, 'w') as f_out:
+        f_out.write(text)
+
+
+def test_reload_does_not_wait_for_in_flight_requests(tmp_path):
+    path = str(tmp_path / 'model.txt')
+    write(path, 'v1')
+    hot = HotModel(lambda: (open(path).read(), open(path).read()), [path], interval=0)
+
+    with hot.use() as old:
+        write(path, 'v2-longer')
+        os.utime(path, ns=(time.time_ns() + 10 ** 9,) * 2)
+
+        start = time.perf_counter()
+        assert hot.reload_if_changed()
+        # The old model still has a request; draining it must not hold up the watcher
+        assert time.perf_counter() - start < 1.0
+        assert hot.current.version == 'v2-longer'
+        assert old.in_flight == 1
+
+    assert old.drain(timeout=1.0)
+
+def test_replaced_model_is_closed_after_its_requests(tmp_path):
+    path = str(tmp_path / 'model.txt')
+    write(path, 'v1')
+    closed = []
+    hot = HotModel(lambda: (open(path).read(), open(path).read()), [path], interval=0, close=closed.append)
+
+    with hot.use():
+        write(path, 'v2-longer')
+        os.utime(path, ns=(time.time_ns() + 10 ** 9,) * 2)
+        assert hot.reload_if_changed()
+        time.sleep(0.05)
+        assert closed == []
+
+    deadline = time.monotonic() + 5
+    while closed != ['v1']:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+    hot.close()
+    assert closed == ['v1', 'v2-longer']
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+from profiling import ColumnProfile, profile_csv
+
+
+def test_int_and_float_chunks_count_values_once():
+    column = ColumnProfile(numeric=True)
+    values = np.r_[np.arange(1000), np.full(500, 7)]
+    column.update(pd.Series(values))                                   # int64 chunk
+    column.update(pd.Series(np.where(values % 10 == 0, np.nan, values)))  # float64 chunk (has NaN)
+
+    profile = column.to_dict()
+    assert profile['nulls'] == 100
+    assert abs(profile['distinct_approx'] - 1000) <= 50
+    # The heavy hitter's counts of both chunks end up on one counter
+    assert profile['mode'] == 7
+
+def test_csv_with_nans_in_one_chunk(tmp_path):
+    # 4 chunks of an integer column with 1000 distinct values; only the second chunk has NaNs,
+    # so pandas parses it as float64 and the others as int64
+    rng = np.random.default_rng(1)
+    ids = rng.integers(0, 1000, 400_000).astype(object)
+    ids[100_000:200_000:97] = None
+    path = tmp_path / 'ids.csv'
+    pd.DataFrame({'district_id': ids}).to_csv(path, index=False)
+
+    profile = profile_csv(str(path), chunksize=100_000)
+    column = profile['columns']['district_id']
+    assert profile['chunks'] == 4
+    assert column['type'] == 'numeric'
+    assert abs(column['distinct_approx'] - 1000) <= 50
@@ -0,0 +1,104 @@
+import os
+import pickle
+import time
+from unittest import mock
+
+import numpy as np
+import pytest
+
+import train
+from shadow import ShadowScorer
+
+
+@pytest.fixture(scope='module')
+def model_file(listings, tmp_path_factory):
+    with mock.patch.dict(train.XGB_PARAMS, n_estimators=20):
+        model_pipeline = train.train_model(listings)
+    path = tmp_path_factory.mktemp('shadow') / 'model_pipeline.bin'
+    with open(path, 'wb') as f_out:
+        pickle.dump(model_pipeline, f_out)
+    return str(path), model_pipeline
+
+@pytest.fixture
+def scorers():
+    # Every scorer a test starts is closed again, so no worker process outlives it
+    started = []
+
+    def start(*args, **kwargs):
+        started.append(ShadowScorer(*args, **kwargs))
+        return started[-1]
+
+    yield start
+    for shadow in started:
+        shadow.close()
+
+def wait_for(condition, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'shadow worker did not answer in time'
+        time.sleep(0.01)
+
+
+def test_shadow_scores_in_worker_process(model_file, listings, scorers):
+    path, model_pipeline = model_file
+    shadow = scorers(path, 'candidate', sample_rate=1.0, max_pending=100)
+    assert shadow._process.pid != os.getpid()
+
+    X = listings.drop(columns=['price', 'price_log'])
+    for i in range(10):
+        row = X.iloc[[i]]
+        price = float(np.expm1(model_pipeline.predict(row.reindex(columns=model_pipeline.feature_names_in_)))[0])
+        shadow.submit(row, price, 1.0)
+    wait_for(lambda: shadow.stats()['compared'] == 10)
+
+    stats = shadow.stats()
+    assert stats['errors'] == 0 and stats['dropped'] == 0
+    # Same model on both sides
+    assert abs(stats['delta_pct_mean']) < 1e-3
+
+def test_samples_beyond_max_pending_are_dropped(model_file, listings, scorers):
+    path, _ = model_file
+    shadow = scorers(path, 'candidate', sample_rate=1.0, max_pending=1)
+    row = listings.drop(columns=['price', 'price_log']).iloc[[0]]
+    for _ in range(50):
+        shadow.submit(row, 500_000.0, 1.0)
+
+    wait_for(lambda: shadow.stats()['compared'] == shadow.sampled)
+    assert shadow.dropped > 0
+    assert shadow.sampled + shadow.dropped == 50
+
+def test_failed_comparison_releases_its_slot(model_file, listings, scorers):
+    path, _ = model_file
+    shadow = scorers(path, 'candidate', sample_rate=1.0, max_pending=1)
+    row = listings.drop(columns=['price', 'price_log']).iloc[[0]]
+    # A primary price of 0 makes the comparison itself fail
+    shadow.submit(row, 0.0, 1.0)
+    wait_for(lambda: shadow.errors == 1)
+    wait_for(lambda: shadow._slots.acquire(blocking=False))
+    shadow._slots.release()
+
+    shadow.submit(row, 500_000.0, 1.0)
+    wait_for(lambda: shadow.stats()['compared'] == 1)
+
+def test_close_stops_worker_and_threads(model_file, listings):
+    path, _ = model_file
+    shadow = ShadowScorer(path, 'candidate', sample_rate=1.0)
+    shadow.close()
+    assert shadow._process.poll() is not None
+    assert not any(thread.is_alive() for thread in shadow._threads)
+    # Later samples are ignored, and closing twice is harmless
+    shadow.submit(listings.drop(columns=['price', 'price_log']).iloc[[0]], 500_000.0, 1.0)
+    assert shadow.sampled == 0
+    shadow.close()
+
+def test_pipeline_without_xgboost_is_rejected_at_startup(model_file):
+    path, _ = model_file
+    with mock.patch('importlib.util.find_spec', return_value=None):
+        with pytest.raises(RuntimeError, match='needs xgboost'):
+            ShadowScorer(path, 'candidate')
+
+def test_unloadable_model_fails_at_startup(tmp_path):
+    path = tmp_path / 'broken.bin'
+    path.write_bytes(b'not a pickle')
+    with pytest.raises(RuntimeError, match='failed to load'):
+        ShadowScorer(str(path), 'candidate')
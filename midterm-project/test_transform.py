@@ -0,0 +1,53 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_listings
+from transform import EXPECTED_COLUMNS, FEATURES_TO_ENGINEER, transform
+
+
+def records(n=400, seed=3):
+    # Raw listings as the API receives them: JSON values, no price
+    df = make_listings(n, seed).drop(columns=['price'])
+    df = df[df['city'] == 'warszawa']
+    return json.loads(df.to_json(orient='records'))
+
+
+def test_single_records_match_batch():
+    # The API transforms one listing at a time; without imputed values a row comes out as in the batch
+    imputed = ['buildYear', 'buildingFloorsNumber', 'floorNumber', 'location_district']
+    batch_records = [r for r in records() if all(r[col] is not None for col in imputed)]
+    batch = transform(pd.DataFrame(batch_records))
+    for i in range(0, len(batch_records), 7):
+        single = transform(pd.DataFrame([batch_records[i]]))
+        assert set(EXPECTED_COLUMNS) <= set(single.columns)
+        expected = batch.loc[[i], single.columns].reset_index(drop=True)
+        pd.testing.assert_frame_equal(single.reset_index(drop=True), expected, check_dtype=False)
+
+@pytest.mark.parametrize('change, column, value', [
+    ({'roomsNum': 'more'}, 'roomsNum', 11),
+    ({'roomsNum': 'abc'}, 'roomsNum', np.nan),
+    ({'floorNumber': 'floor_99'}, 'floor_numeric', np.nan),
+    ({'constructionStatus': 'unknown'}, 'constructionStatus_numeric', 0),
+    ({'ownership': None}, 'ownership_nan', True),
+    ({'features': "['taras', 'winda', 'taras']"}, 'taras', 1),
+    ({'features': 'not a list'}, 'taras', 0),
+    ({'features': '[]'}, 'winda', 0),
+])
+def test_single_record_edge_values(change, column, value):
+    df = transform(pd.DataFrame([{**records(1)[0], **change}]))
+    assert len(df) == 1
+    if isinstance(value, float) and np.isnan(value):
+        assert np.isnan(df.loc[0, column])
+    else:
+        assert df.loc[0, column] == value
+    assert df[FEATURES_TO_ENGINEER].dtypes.eq(np.int64).all()
+
+def test_input_frame_is_not_modified():
+    raw = make_listings(200, 3)
+    before = raw.copy()
+    df = transform(raw, drop_outliers=True)
+    pd.testing.assert_frame_equal(raw, before)
+    assert 'price_log' in df.columns and df.index.equals(pd.RangeIndex(len(df)))
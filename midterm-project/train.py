@@ -1,4 +1,8 @@
+import argparse
+import json
+import os
 import pickle
+import tempfile
 
 import pandas as pd
 import numpy as np
@@ -7,18 +11,88 @@ import xgboost as xgb
 
 from sklearn.pipeline import Pipeline
 from transform import transform
+from booster_model import (BoosterRegressor, EncodedBoosterRegressor, collapse_onehot, find_onehot_groups,
+                           fit_categories)
+from external_memory import CHUNK_ROWS, DISTRICT_COLUMN, ShardIterator, write_shards
+from run_report import RunReport
+from spatial import SpatialFeatures
+from comps import COMPS_INDEX_FILE, build_comps_index, save_comps_index
+from compiled_model import export_compiled_model
 
 
-def load_data(filename):
+MODEL_FILE = 'model_pipeline.bin'
+# The run report is written next to the model artifact
+REPORT_FILE = 'train_report.json'
+
+
+XGB_PARAMS = {
+    'learning_rate': 0.05,    # Lower learning rate (makes learning slower but more robust)
+    'max_depth': 5,           # Shallower trees
+    'min_child_weight': 5,    # Conservative: needs 5 samples to make a split
+    'subsample': 0.8,         # Randomness to prevent overfitting
+    'colsample_bytree': 0.8,  # Randomness to prevent overfitting
+    'n_estimators': 1000,     # num_boost_round
+    'objective': 'reg:squarederror',
+    'n_jobs': 8,              # nthread
+    'random_state': 1         # seed
+}
+
+# Native xgb.train parameters for the DMatrix-based modes ('hist', 'external')
+HIST_PARAMS = {
+    'tree_method': 'hist',
+    'eta': XGB_PARAMS['learning_rate'],
+    'max_depth': XGB_PARAMS['max_depth'],
+    'min_child_weight': XGB_PARAMS['min_child_weight'],
+    'subsample': XGB_PARAMS['subsample'],
+    'colsample_bytree': XGB_PARAMS['colsample_bytree'],
+    'objective': XGB_PARAMS['objective'],
+    'eval_metric': 'rmse',
+    'nthread': XGB_PARAMS['n_jobs'],
+    'seed': XGB_PARAMS['random_state'],
+}
+
+
+def booster_nthread(booster):
+    # Number of threads XGBoost actually used (after resolving n_jobs / nthread defaults)
+    config = json.loads(booster.save_config())
+    return int(config['learner']['generic_param']['nthread'])
+
+def load_data(filename, report=None):
+    report = report if report is not None else RunReport()
+
     # 1. Load the training dataset from .csv file
-    data = pd.read_csv(filename)
-    df_final_cleaned = transform(data)
+    with report.stage('load_data'):
+        data = pd.read_csv(filename)
+
+    with report.stage('transform'):
+        df_final_cleaned = transform(data)
+
+    report.add(dataset={
+        'file': filename,
+        'raw_shape': list(data.shape),
+        'transformed_shape': list(df_final_cleaned.shape),
+    })
     return df_final_cleaned
 
-def train_model(df_final_cleaned):
+def split_validation(X, y, val_size):
+    # Same random hold-out in every mode, so their validation curves are comparable
+    rng = np.random.default_rng(XGB_PARAMS['random_state'])
+    idx = rng.permutation(len(X))
+    n_val = int(len(idx) * val_size)
+    idx_val, idx_train = idx[:n_val], idx[n_val:]
+    X_train, y_train = X.iloc[idx_train].reset_index(drop=True), y.iloc[idx_train].reset_index(drop=True)
+    X_val, y_val = X.iloc[idx_val].reset_index(drop=True), y.iloc[idx_val].reset_index(drop=True)
+    return X_train, y_train, X_val, y_val
 
-    y_train = df_final_cleaned['price_log'].reset_index(drop=True)
-    X_train = df_final_cleaned.drop(columns=['price', 'price_log']).reset_index(drop=True)
+def train_model(df_final_cleaned, val_size=0.1, report=None):
+    report = report if report is not None else RunReport()
+
+    y = df_final_cleaned['price_log'].reset_index(drop=True)
+    X = df_final_cleaned.drop(columns=['price', 'price_log']).reset_index(drop=True)
+
+    # A validation split is held out before anything is fitted, so the per-round RMSE in the run
+    # report shows how the model converges on listings it hasn't seen
+    X_train, y_train, X_val, y_val = split_validation(X, y, val_size)
 
     # ### Method Note: Handling High-Cardinality Features (District)
     # 
@@ -33,36 +107,216 @@ def train_model(df_final_cleaned):
     # This handles cases where a district in the val/test set 
     # was not seen in the train set.
 
-    xgb_params = {
-        'learning_rate': 0.05,    # Lower learning rate (makes learning slower but more robust)
-        'max_depth': 5,           # Shallower trees
-        'min_child_weight': 5,    # Conservative: needs 5 samples to make a split
-        'subsample': 0.8,         # Randomness to prevent overfitting
-        'colsample_bytree': 0.8,  # Randomness to prevent overfitting
-        'n_estimators': 1000,     # num_boost_round
-        'objective': 'reg:squarederror',
-        'n_jobs': 8,              # nthread
-        'random_state': 1         # seed
-    }
+    # ### Method Note: Neighbourhood features (SpatialFeatures)
+    #
+    # `distance_from_center` only knows how far a flat is from one point. The spatial step indexes all
+    # training listings in a BallTree (haversine metric) and adds the median price per m² of the nearest
+    # listings and the number of listings within 1 km. The tree is pickled with the pipeline.
+
+    spatial = SpatialFeatures()
+    encoder = ce.TargetEncoder(cols=['location_district'], handle_unknown='value', handle_missing='value')
+    regressor = xgb.XGBRegressor(**XGB_PARAMS)
+
+    # The steps are fitted one by one (same as Pipeline.fit does) so each gets its own timing
+    with report.stage('spatial_fit'):
+        X_train_spatial = spatial.fit_transform(X_train, y_train)
+        X_val_spatial = spatial.transform(X_val)
+
+    with report.stage('encoder_fit'):
+        X_train_encoded = encoder.fit_transform(X_train_spatial, y_train)
+        X_val_encoded = encoder.transform(X_val_spatial)
+
+    # Only the validation rows are scored every round; the training RMSE is computed once at the end
+    with report.stage('xgboost_fit'):
+        regressor.fit(X_train_encoded, y_train, eval_set=[(X_val_encoded, y_val)], verbose=False)
+
+    train_rmse = float(np.sqrt(np.mean((regressor.predict(X_train_encoded) - y_train) ** 2)))
+
+    report.add(
+        mode='pipeline',
+        train_shape=list(X_train.shape),
+        val_shape=list(X_val.shape),
+        xgb_params=XGB_PARAMS,
+        xgb_nthread=booster_nthread(regressor.get_booster()),
+        final_train_rmse=train_rmse,
+        eval_metrics={'val': regressor.evals_result()['validation_0']},
+    )
 
     model_pipeline = Pipeline(
         steps=[
-            ('encoder', ce.TargetEncoder(cols=['location_district'], handle_unknown='value', handle_missing='value')),
-            ('regressor', xgb.XGBRegressor(**xgb_params))   
+            ('spatial', spatial),
+            ('encoder', encoder),
+            ('regressor', regressor)
         ])
-
-    model_pipeline.fit(X_train, y_train)
     return model_pipeline
 
 
-def save_model(model_pipeline):
-    output_file = 'model_pipeline.bin'
+def train_model_hist(df_final_cleaned, val_size=0.1, early_stopping_rounds=50, report=None):
+    report = report if report is not None else RunReport()
+
+    y = df_final_cleaned['price_log'].reset_index(drop=True)
+    X = df_final_cleaned.drop(columns=['price', 'price_log']).reset_index(drop=True)
+
+    # ### Method Note: Native categoricals instead of TargetEncoder + get_dummies
+    #
+    # 1.  `location_district` and the one-hot groups from transform() are turned into pandas 'category'
+    #     columns, so XGBoost can split on sets of categories directly (partition-based splits).
+    # 2.  The QuantileDMatrix sketches the features into histogram bins once, without keeping a full
+    #     float copy of the data around, which is what `tree_method='hist'` trains on anyway.
+    # 3.  A small validation split is held out for early stopping, so we stop adding trees once the
+    #     validation RMSE stops improving instead of always training 1000 rounds.
+
+    X_train, y_train, X_val, y_val = split_validation(X, y, val_size)
+
+    # The split comes first: the spatial index only holds training prices, otherwise the validation
+    # rows' own prices would leak into the k-NN features that early stopping is judged on
+    with report.stage('spatial_fit'):
+        spatial = SpatialFeatures()
+        X_train_spatial = spatial.fit_transform(X_train, y_train)
+        X_val_spatial = spatial.transform(X_val)
+
+    with report.stage('encoder_fit'):
+        onehot_groups = find_onehot_groups(X.columns)
+        categories = fit_categories(X_train, onehot_groups)
+        X_train_cat = collapse_onehot(X_train_spatial, onehot_groups, categories)
+        X_val_cat = collapse_onehot(X_val_spatial, onehot_groups, categories)
 
+    with report.stage('quantile_dmatrix'):
+        dtrain = xgb.QuantileDMatrix(X_train_cat, y_train, enable_categorical=True)
+        dval = xgb.QuantileDMatrix(X_val_cat, y_val, ref=dtrain, enable_categorical=True)
+
+    evals_result = {}
+    with report.stage('xgboost_fit'):
+        booster = xgb.train(
+            HIST_PARAMS,
+            dtrain,
+            num_boost_round=XGB_PARAMS['n_estimators'],
+            evals=[(dtrain, 'train'), (dval, 'val')],
+            evals_result=evals_result,
+            early_stopping_rounds=early_stopping_rounds,
+            verbose_eval=False
+        )
+
+    report.add(
+        mode='hist',
+        train_shape=list(X_train_cat.shape),
+        val_shape=list(X_val_cat.shape),
+        xgb_params=HIST_PARAMS,
+        xgb_nthread=booster_nthread(booster),
+        best_iteration=booster.best_iteration,
+        eval_metrics=evals_result,
+    )
+
+    # Keep only the trees up to the best validation round
+    booster = booster[: booster.best_iteration + 1]
+
+    return BoosterRegressor(booster, X.columns, onehot_groups, categories, spatial=spatial)
+
+
+def train_model_external(filename, chunk_rows=CHUNK_ROWS, val_size=0.1, early_stopping_rounds=50, shard_dir=None,
+                         report=None):
+    report = report if report is not None else RunReport()
+
+    # ### Method Note: Out-of-core training (external memory)
+    #
+    # 1.  The CSV is read `chunk_rows` rows at a time, passed through transform() and written to disk as
+    #     float32 .npz shards (train / val rows picked at random per chunk). The district target encoding
+    #     is accumulated as per-district sums and counts along the way.
+    # 2.  `ShardIterator` (an xgb.DataIter) hands XGBoost one shard at a time; ExtMemQuantileDMatrix
+    #     sketches the histogram bins from it and keeps the binned pages in a cache on disk, so peak memory
+    #     follows the chunk size instead of the dataset size.
+    # 3.  No SpatialFeatures step: its BallTree needs every listing's coordinates in memory at once.
+
+    with tempfile.TemporaryDirectory(dir=shard_dir) as tmp_dir:
+        with report.stage('shards'):
+            train_paths, val_paths, feature_names, encoder = write_shards(
+                filename, tmp_dir, chunk_rows=chunk_rows, val_size=val_size, seed=XGB_PARAMS['random_state'])
+            district_values, district_default = encoder.values(), encoder.prior()
+
+        position = feature_names.index(DISTRICT_COLUMN)
+        train_iter = ShardIterator(train_paths, position, district_values, district_default,
+                                   cache_prefix=os.path.join(tmp_dir, 'train'))
+        val_iter = ShardIterator(val_paths, position, district_values, district_default,
+                                 cache_prefix=os.path.join(tmp_dir, 'val'))
+
+        with report.stage('ext_dmatrix'):
+            dtrain = xgb.ExtMemQuantileDMatrix(train_iter, max_bin=256)
+            dval = xgb.ExtMemQuantileDMatrix(val_iter, max_bin=256, ref=dtrain)
+
+        evals_result = {}
+        with report.stage('xgboost_fit'):
+            booster = xgb.train(
+                HIST_PARAMS,
+                dtrain,
+                num_boost_round=XGB_PARAMS['n_estimators'],
+                evals=[(dtrain, 'train'), (dval, 'val')],
+                evals_result=evals_result,
+                early_stopping_rounds=early_stopping_rounds,
+                verbose_eval=False
+            )
+
+        report.add(
+            mode='external',
+            dataset={'file': filename, 'chunk_rows': chunk_rows, 'shards': len(train_paths)},
+            train_shape=[dtrain.num_row(), dtrain.num_col()],
+            val_shape=[dval.num_row(), dval.num_col()],
+            xgb_params=HIST_PARAMS,
+            xgb_nthread=booster_nthread(booster),
+            best_iteration=booster.best_iteration,
+            eval_metrics=evals_result,
+        )
+        # Free the DMatrix pages before their cache directory is removed
+        del dtrain, dval
+
+    booster = booster[: booster.best_iteration + 1]
+
+    return EncodedBoosterRegressor(booster, feature_names, district_values, district_default)
+
+
+TRAINERS = {
+    'pipeline': train_model,
+    'hist': train_model_hist,
+}
+
+
+def save_model(model_pipeline, output_file=MODEL_FILE):
     f_out = open(output_file, 'wb')
     pickle.dump((model_pipeline), f_out)
     f_out.close()
 
 if __name__ == '__main__':
-    df = load_data('mazowieckie-spring25.csv')
-    model_pipeline = train_model(df)
-    save_model(model_pipeline)
+    parser = argparse.ArgumentParser(description='Train the price prediction model')
+    parser.add_argument('--mode', choices=sorted(TRAINERS) + ['external'], default='pipeline',
+                        help="'pipeline': TargetEncoder + XGBRegressor, 'hist': native categoricals + QuantileDMatrix, "
+                             "'external': chunked CSV -> on-disk shards -> ExtMemQuantileDMatrix (bounded memory)")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS,
+                        help="rows per chunk / shard in 'external' mode")
+    args = parser.parse_args()
+
+    report = RunReport()
+    with report.stage('total'):
+        if args.mode == 'external':
+            model_pipeline = train_model_external('mazowieckie-spring25.csv', chunk_rows=args.chunk_rows,
+                                                  report=report)
+            save_model(model_pipeline)
+            # Not compilable: removes a model_compiled.npz left over from an earlier run
+            export_compiled_model(model_pipeline)
+            # The comps index needs the whole transformed frame in memory, which this mode avoids; remove
+            # the one from an earlier run so /comps doesn't serve listings of an older dataset (it returns 503)
+            if os.path.exists(COMPS_INDEX_FILE):
+                os.remove(COMPS_INDEX_FILE)
+                print(f'external mode: {COMPS_INDEX_FILE} removed, not rebuilt in this mode')
+        else:
+            df = load_data('mazowieckie-spring25.csv', report=report)
+            model_pipeline = TRAINERS[args.mode](df, report=report)
+            save_model(model_pipeline)
+
+            # Recompile model_compiled.npz from the new pipeline (or remove it for the 'hist' mode)
+            with report.stage('compile'):
+                export_compiled_model(model_pipeline, df.drop(columns=['price', 'price_log']).head(2000))
+
+            # Comparable-listings index for the /comps endpoint
+            with report.stage('comps_index'):
+                save_comps_index(build_comps_index(df))
+
+    report.save(os.path.join(os.path.dirname(os.path.abspath(MODEL_FILE)), REPORT_FILE))
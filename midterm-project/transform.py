@@ -1,7 +1,6 @@
 import pandas as pd
 import numpy as np
 import ast
-from sklearn.preprocessing import MultiLabelBinarizer
 
 # --- Configuration & Constants ---
 
@@ -37,6 +36,23 @@ STATUS_MAP = {
 
 COLUMNS_TO_ONEHOT = ['market', 'buildingMaterial', 'userType', 'ownership']
 
+# Model input columns; any missing from a batch (e.g. unseen categories) are added as zeros
+EXPECTED_COLUMNS = ['area', 'buildYear', 'buildingFloorsNumber', 'roomsNum',
+   'location_latitude', 'location_longitude', 'location_district',
+   'distance_from_center', 'taras', 'ogródek', 'winda', 'balkon',
+   'klimatyzacja', 'pom. użytkowe', 'piwnica', 'dwupoziomowe',
+   'garaż/miejsce parkingowe', 'oddzielna kuchnia', 'teren zamknięty',
+   'floor_numeric', 'constructionStatus_numeric', 'market_PRIMARY',
+   'market_SECONDARY', 'market_nan', 'buildingMaterial_breezeblock',
+   'buildingMaterial_brick', 'buildingMaterial_cellular_concrete',
+   'buildingMaterial_concrete', 'buildingMaterial_concrete_plate',
+   'buildingMaterial_hydroton', 'buildingMaterial_other',
+   'buildingMaterial_reinforced_concrete', 'buildingMaterial_silikat',
+   'buildingMaterial_wood', 'buildingMaterial_nan', 'userType_agency',
+   'userType_developer', 'userType_private', 'userType_nan',
+   'ownership_full_ownership', 'ownership_limited_ownership',
+   'ownership_share', 'ownership_usufruct', 'ownership_nan']
+
 
 # --- Helper Functions ---
 
@@ -74,6 +90,10 @@ def safe_convert_to_list(x):
 def transform(data: pd.DataFrame, drop_outliers: bool = False):
     """
     Cleans, engineers features, and prepares the dataframe for training or inference.
+
+    Every output column is computed once from the input column and the frame is assembled in one step
+    at the end: the API calls this on one-row frames, where each column insert or drop costs about as
+    much as on the whole training set.
     
     Args:
         data (pd.DataFrame): Raw input data.
@@ -83,109 +103,67 @@ def transform(data: pd.DataFrame, drop_outliers: bool = False):
         pd.DataFrame: Processed dataframe ready for the model.
     """
 
+    # 1. Filter Scope (Warsaw only); the input frame itself is never modified
+    if 'city' in data.columns:
+        data = data[data['city'] == 'warszawa']
 
-    EXPECTED_COLUMNS = ['area', 'buildYear', 'buildingFloorsNumber', 'roomsNum',
-       'location_latitude', 'location_longitude', 'location_district',
-       'distance_from_center', 'taras', 'ogródek', 'winda', 'balkon',
-       'klimatyzacja', 'pom. użytkowe', 'piwnica', 'dwupoziomowe',
-       'garaż/miejsce parkingowe', 'oddzielna kuchnia', 'teren zamknięty',
-       'floor_numeric', 'constructionStatus_numeric', 'market_PRIMARY',
-       'market_SECONDARY', 'market_nan', 'buildingMaterial_breezeblock',
-       'buildingMaterial_brick', 'buildingMaterial_cellular_concrete',
-       'buildingMaterial_concrete', 'buildingMaterial_concrete_plate',
-       'buildingMaterial_hydroton', 'buildingMaterial_other',
-       'buildingMaterial_reinforced_concrete', 'buildingMaterial_silikat',
-       'buildingMaterial_wood', 'buildingMaterial_nan', 'userType_agency',
-       'userType_developer', 'userType_private', 'userType_nan',
-       'ownership_full_ownership', 'ownership_limited_ownership',
-       'ownership_share', 'ownership_usufruct', 'ownership_nan']
-
-
-    # 1. Avoid modifying the original dataframe
-    df = data.copy()
-
-    # 2. Filter Scope (Warsaw only)
-    # We use .get() just in case 'city' is missing in future inputs, though expected
-    if 'city' in df.columns:
-        df = df[df['city'] == 'warszawa'].copy()
-    
-    # 3. Select relevant columns
+    # 2. Select relevant columns
     # We include 'price' only if it exists in the input
     cols_to_keep = BASE_FEATURES.copy()
-    if 'price' in df.columns:
+    if 'price' in data.columns:
         cols_to_keep.append('price')
-    
     # Filter columns that actually exist in the input to prevent KeyErrors
-    cols_present = [c for c in cols_to_keep if c in df.columns]
-    df = df[cols_present]
+    cols_present = [c for c in cols_to_keep if c in data.columns]
+    engineered = {'features', 'floorNumber', 'constructionStatus', *COLUMNS_TO_ONEHOT}
+    columns = {col: data[col] for col in cols_present if col not in engineered}
 
-    # 4. Feature Engineering: Location Distance
-    df['distance_from_center'] = haversine_vectorized(
-        df['location_latitude'], df['location_longitude'], 
+    # 3. Feature Engineering: Location Distance
+    columns['distance_from_center'] = haversine_vectorized(
+        data['location_latitude'], data['location_longitude'],
         WARSAW_CENTER_LAT, WARSAW_CENTER_LON
     )
 
-    # 5. Feature Engineering: "Features" column (MultiLabelBinarizer)
-    df['features'] = df['features'].apply(safe_convert_to_list)
-    
-    # Initialize MLB
-    mlb = MultiLabelBinarizer()
-    # We fit transform, but we must ensure we only keep the ones we care about
-    # Logic: fit on current batch, but then reindex to ensure consistent columns
-    features_encoded = pd.DataFrame(
-        mlb.fit_transform(df['features'].dropna()),
-        columns=mlb.classes_,
-        index=df.index[df['features'].notna()]
-    )
-    
-    # If a row had NaN features, fill with 0
-    features_encoded = features_encoded.reindex(df.index, fill_value=0)
-
-    # Keep only the specific engineered features we want; fill missing columns with 0
+    # 4. Feature Engineering: "Features" column (list of amenities as a string)
+    # Only the FEATURES_TO_ENGINEER flags are kept; rows without a parsable list get 0
+    listed = [set(x) if isinstance(x, list) else set() for x in map(safe_convert_to_list, data['features'])]
     for col in FEATURES_TO_ENGINEER:
-        if col not in features_encoded.columns:
-            features_encoded[col] = 0
-    
-    df = pd.concat([df, features_encoded[FEATURES_TO_ENGINEER]], axis=1)
-    df = df.drop(columns=['features'])
+        columns[col] = np.fromiter((col in row for row in listed), dtype=np.int64, count=len(listed))
+
+    # 5. Numeric Mapping & Cleaning
 
-    # 6. Numeric Mapping & Cleaning
-    
     # Floor Number
-    df['floor_numeric'] = df['floorNumber'].map(FLOOR_MAP)
-    df['floor_numeric'] = pd.to_numeric(df['floor_numeric'], errors='coerce')
+    floor = pd.to_numeric(data['floorNumber'].map(FLOOR_MAP), errors='coerce')
     # Simple imputation (ideally should be calculated on train set)
-    df['floor_numeric'] = df['floor_numeric'].fillna(df['floor_numeric'].median())
-    df = df.drop(columns=['floorNumber'])
+    columns['floor_numeric'] = floor.fillna(floor.median())
 
     # Rooms
-    df['roomsNum'] = df['roomsNum'].replace('more', 11)
-    df['roomsNum'] = pd.to_numeric(df['roomsNum'], errors='coerce')
+    if 'roomsNum' in columns:
+        columns['roomsNum'] = pd.to_numeric(columns['roomsNum'].replace('more', 11), errors='coerce')
 
     # Construction Status
-    df['constructionStatus_numeric'] = df['constructionStatus'].map(STATUS_MAP)
-    df['constructionStatus_numeric'] = df['constructionStatus_numeric'].fillna(0)
-    df = df.drop(columns=['constructionStatus'])
+    columns['constructionStatus_numeric'] = data['constructionStatus'].map(STATUS_MAP).fillna(0)
 
     # Impute other numerics
-    df['buildYear'] = df['buildYear'].fillna(df['buildYear'].median())
-    df['buildingFloorsNumber'] = df['buildingFloorsNumber'].fillna(df['buildingFloorsNumber'].median())
-
-    # 7. One-Hot Encoding (Categorical)
-    df = pd.get_dummies(
-        df, 
-        columns=COLUMNS_TO_ONEHOT, 
-        dummy_na=True, 
-        drop_first=False
-    )
-
-    if EXPECTED_COLUMNS is not None:
-        # Add missing columns with zeros
-        for col in EXPECTED_COLUMNS:
-            if col not in df.columns:
-                df[col] = 0 
-
-    # 8. Target Handling (Price)
+    for col in ['buildYear', 'buildingFloorsNumber']:
+        columns[col] = columns[col].fillna(columns[col].median())
+
+    # 6. One-Hot Encoding (Categorical), named like pd.get_dummies(dummy_na=True): '<column>_<value>'
+    # for every value present (sorted), then '<column>_nan'
+    for col in COLUMNS_TO_ONEHOT:
+        values = data[col]
+        missing = values.isna().to_numpy()
+        for value in np.sort(values[~missing].unique()):
+            columns[f'{col}_{value}'] = (values == value).to_numpy()
+        columns[f'{col}_nan'] = missing
+
+    # Add missing columns with zeros
+    for col in EXPECTED_COLUMNS:
+        if col not in columns:
+            columns[col] = np.zeros(len(data), dtype=np.int64)
+
+    df = pd.DataFrame(columns, index=data.index)
+
+    # 7. Target Handling (Price)
     if 'price' in df.columns:
         # Drop rows with no price info
         df = df.dropna(subset=['price'])